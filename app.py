@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import folium
 from streamlit_folium import folium_static
-import networkx as nx
 import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
@@ -17,11 +16,14 @@ import json
 # Add src to the path to import modules
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 from src.data.loader import load_data
+from src.data.network import get_road_network
 from src.algorithms.mst import run_mst_algorithm
 from src.algorithms.shortestpath import run_dijkstra, run_a_star
+from src.algorithms.ch import get_period_hierarchies
 from src.algorithms.dp import run_transit_optimization
 from src.algorithms.greedy import run_greedy_algorithm
 from src.visualization.network import create_base_map, visualize_solution
+from src.utils.cache import route_cache_key, cached_route, route_cache_stats
 from src.utils.export import export_to_csv, export_to_json, export_plot_to_png, export_map_to_html, export_report_to_html
 
 # Page config
@@ -41,7 +43,7 @@ def save_user_data():
         # Save the data with proper formatting
         with open(file_path, 'w') as f:
             json.dump(st.session_state.users, f, indent=4)
-            
+        
         return True
     except Exception as e:
         st.error(f"Error saving user data: {str(e)}")
@@ -330,34 +332,8 @@ def main():
     potential_roads = data['potential_roads']
     traffic_flows = data['traffic_flows']
     
-    # Create NetworkX graph
-    G = nx.Graph()
-    
-    # Add nodes
-    for node in neighborhoods:
-        G.add_node(node['id'], 
-                  name=node['name'], 
-                  population=node['population'], 
-                  type=node['type'], 
-                  x=node['x'], 
-                  y=node['y'], 
-                  node_type='neighborhood')
-    
-    for node in facilities:
-        G.add_node(node['id'], 
-                  name=node['name'], 
-                  type=node['type'], 
-                  x=node['x'], 
-                  y=node['y'], 
-                  node_type='facility')
-    
-    # Add existing road edges
-    for road in existing_roads:
-        G.add_edge(road['from'], road['to'], 
-                  distance=road['distance'], 
-                  capacity=road['capacity'], 
-                  condition=road['condition'], 
-                  road_type='existing')
+    # Shared CSR road network (rebuilt only when the data changes)
+    network = get_road_network(data)
     
     # Keep track of state
     if 'selected_algorithm' not in st.session_state:
@@ -451,7 +427,7 @@ def main():
         if st.button("Calculate Optimal Road Network"):
             with st.spinner("Running MST algorithm..."):
                 mst_graph, total_cost, results = run_mst_algorithm(
-                    G, 
+                    network, 
                     neighborhoods, 
                     facilities, 
                     existing_roads, 
@@ -544,6 +520,9 @@ def main():
             if destination_id.isdigit():
                 destination_id = int(destination_id)
         
+        # The departure-time profile costs far more than the route itself, so it is optional
+        show_profile = st.checkbox("Compare travel times over the day")
+        
         # Run algorithm
         if st.button("Find Optimal Route"):
             if origin_id == destination_id:
@@ -551,13 +530,22 @@ def main():
             else:
                 with st.spinner("Calculating optimal route..."):
                     try:
-                        # Run Dijkstra with time-dependent weights
-                        path, travel_time, path_edges, results = run_dijkstra(
-                            G, 
-                            origin_id, 
-                            destination_id, 
-                            time_period,
-                            traffic_flows
+                        # Contraction hierarchies are built once per traffic snapshot and answer every query
+                        hierarchies = get_period_hierarchies(network, traffic_flows)
+                        
+                        # Run Dijkstra with time-dependent weights (reusing recent identical queries)
+                        path, travel_time, path_edges, results = cached_route(
+                            route_cache_key(network, traffic_flows, origin_id, destination_id, time_period,
+                                            ('dijkstra', show_profile)),
+                            lambda: run_dijkstra(
+                                network, 
+                                origin_id, 
+                                destination_id, 
+                                time_period,
+                                traffic_flows,
+                                hierarchies=hierarchies,
+                                departure_profile=show_profile
+                            )
                         )
                         
                         if path:
@@ -580,17 +568,33 @@ def main():
                                 st.metric("Road Segments", len(path_edges))
                                 st.metric("Traffic Congestion", f"{results['congestion_level']}/10")
                             
-                            # Compare with other time periods
-                            st.subheader("Time Comparison")
-                            comparison_data = results["time_comparison"]
+                            cache_stats = route_cache_stats()
+                            st.caption(f"Route cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                                       f"({cache_stats['hit_rate'] * 100:.0f}% hit rate)")
                             
-                            fig = px.bar(
-                                x=list(time_mapping.keys()),
-                                y=[comparison_data[tp] for tp in time_mapping.values()],
-                                labels={"x": "Time of Day", "y": "Travel Time (minutes)"}
-                            )
-                            fig.update_layout(title="Travel Time Comparison by Time of Day")
-                            st.plotly_chart(fig)
+                            fig = None
+                            if show_profile:
+                                # Compare with other time periods
+                                st.subheader("Time Comparison")
+                                comparison_data = results["time_comparison"]
+                                
+                                fig = px.bar(
+                                    x=list(time_mapping.keys()),
+                                    y=[comparison_data[tp] for tp in time_mapping.values()],
+                                    labels={"x": "Time of Day", "y": "Travel Time (minutes)"}
+                                )
+                                fig.update_layout(title="Travel Time Comparison by Time of Day")
+                                st.plotly_chart(fig)
+                                
+                                # Travel time for every 15-minute departure slot from the profile search
+                                profile = results["departure_profile"]
+                                profile_fig = px.line(
+                                    x=[f"{int(m) // 60:02d}:{int(m) % 60:02d}" for m in profile["departure_minutes"]],
+                                    y=profile["travel_time"],
+                                    labels={"x": "Departure Time", "y": "Travel Time (minutes)"}
+                                )
+                                profile_fig.update_layout(title="Travel Time by Departure Time")
+                                st.plotly_chart(profile_fig)
                             
                             # Show detailed route
                             st.subheader("Route Details")
@@ -610,7 +614,8 @@ def main():
                             with col2:
                                 st.markdown("### Export Map & Report")
                                 st.markdown(export_map_to_html(route_map, "route_map.html"), unsafe_allow_html=True)
-                                st.markdown(export_plot_to_png(fig, "time_comparison.png"), unsafe_allow_html=True)
+                                if fig is not None:
+                                    st.markdown(export_plot_to_png(fig, "time_comparison.png"), unsafe_allow_html=True)
                                 st.markdown(export_report_to_html("Traffic Flow Optimization", results, "route_report.html"), unsafe_allow_html=True)
                             
                             # Save analysis
@@ -651,13 +656,16 @@ def main():
             try:
                 with st.spinner("Calculating emergency route..."):
                     # Run A* algorithm - no minimum road condition
-                    path, travel_time, path_edges, results = run_a_star(
-                        G, 
-                        emergency_id, 
-                        target_hospital,
-                        neighborhoods,
-                        facilities,
-                        1  # Use lowest possible condition to always find a path
+                    path, travel_time, path_edges, results = cached_route(
+                        route_cache_key(network, None, emergency_id, target_hospital, None, ('a_star', 1)),
+                        lambda: run_a_star(
+                            network, 
+                            emergency_id, 
+                            target_hospital,
+                            neighborhoods,
+                            facilities,
+                            1  # Use lowest possible condition to always find a path
+                        )
                     )
                 
                 if path:
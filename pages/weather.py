@@ -6,11 +6,12 @@ import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import networkx as nx
 
 # Add src to the path to import modules
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from src.data.loader import load_data
+from src.data.network import get_road_network, get_node_name
+from src.algorithms.shortestpath import dijkstra_search, reconstruct_path, get_period_weights
 from src.analysis.weather import (
     get_weather_for_date,
     simulate_weather_period,
@@ -21,68 +22,57 @@ from src.analysis.weather import (
 )
 from src.utils.export import export_to_csv, export_to_json, export_plot_to_png, export_report_to_html
 
-def find_route_between_points(origin_id, destination_id, existing_roads, neighborhoods, facilities):
+def find_route_between_points(origin_id, destination_id, network, traffic_flows, time_period):
     """
     Find a route between two points using the existing road network
     
     Args:
         origin_id: ID of the origin point
         destination_id: ID of the destination point
-        existing_roads: List of existing roads
-        neighborhoods: List of neighborhoods
-        facilities: List of facilities
+        network: Shared CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data
+        time_period: Time period the normal travel time is taken from
         
     Returns:
         Dictionary with route information or None if no route found
     """
-    # Create a directed graph
-    G = nx.DiGraph()
+    node_index = network['node_index']
+    if origin_id not in node_index or destination_id not in node_index:
+        return None
     
-    # Add all nodes (neighborhoods and facilities)
-    for n in neighborhoods:
-        G.add_node(n['id'], name=n['name'], type='neighborhood')
-    for f in facilities:
-        G.add_node(f['id'], name=f['name'], type='facility')
+    source = node_index[origin_id]
+    target = node_index[destination_id]
     
-    # Add all edges (roads)
-    for road in existing_roads:
-        # Add edge in both directions since roads are bidirectional
-        G.add_edge(road['from'], road['to'], 
-                  distance=road['distance'],
-                  condition=road['condition'])
-        G.add_edge(road['to'], road['from'],
-                  distance=road['distance'],
-                  condition=road['condition'])
+    # Find the shortest path by distance (roads are bidirectional)
+    distance_arcs = network['distance'][network['arc_edge']].tolist()
+    dist, pred, pred_edge = dijkstra_search(network, distance_arcs, [source], target)
     
-    try:
-        # Try to find the shortest path
-        path = nx.shortest_path(G, origin_id, destination_id, weight='distance')
-        
-        # Calculate total distance and time
-        total_distance = 0
-        for i in range(len(path) - 1):
-            edge_data = G.get_edge_data(path[i], path[i + 1])
-            total_distance += edge_data['distance']
-        
-        # Get origin and destination names
-        origin_name = next((n['name'] for n in neighborhoods if n['id'] == origin_id),
-                          next((f['name'] for f in facilities if f['id'] == origin_id), None))
-        dest_name = next((n['name'] for n in neighborhoods if n['id'] == destination_id),
-                        next((f['name'] for f in facilities if f['id'] == destination_id), None))
-        
-        # Calculate normal time (assuming average speed of 30 km/h)
-        normal_time = total_distance * 2  # 2 minutes per km
-        
-        return {
-            'name': f"{origin_name} to {dest_name}",
-            'distance': total_distance,
-            'normal_time': normal_time,
-            'origin': origin_id,
-            'destination': destination_id,
-            'path': path
-        }
-    except nx.NetworkXNoPath:
+    if dist[target] == float('inf'):
         return None
+    
+    path_nodes, path_edges = reconstruct_path(pred, pred_edge, target)
+    path = [network['node_ids'][i] for i in path_nodes]
+    
+    # Calculate total distance and time
+    total_distance = dist[target]
+    
+    # Get origin and destination names
+    origin_name = get_node_name(network, origin_id)
+    dest_name = get_node_name(network, destination_id)
+    
+    # Normal travel time under the period's traffic (same edge weights as route planning)
+    normal_time = float(get_period_weights(network, traffic_flows)["weights"][time_period][path_edges].sum())
+    
+    return {
+        'name': f"{origin_name} to {dest_name}",
+        'distance': total_distance,
+        'normal_time': normal_time,
+        'origin': origin_id,
+        'destination': destination_id,
+        'path': path,
+        'path_edges': path_edges,
+        'time_period': time_period
+    }
 
 def main():
     st.set_page_config(
@@ -107,6 +97,16 @@ def main():
     neighborhoods = data['neighborhoods']
     facilities = data['facilities']
     existing_roads = data['existing_roads']
+    traffic_flows = data['traffic_flows']
+    network = get_road_network(data)
+    road_lookup = {road_id: e for e, road_id in enumerate(network['road_ids'])}
+    
+    time_mapping = {
+        "Morning Peak (7-9 AM)": "morning_peak",
+        "Afternoon (12-2 PM)": "afternoon",
+        "Evening Peak (5-7 PM)": "evening_peak",
+        "Night (10 PM-5 AM)": "night"
+    }
     
     # Create a dictionary of routes with their normal conditions
     routes = {}
@@ -117,14 +117,15 @@ def main():
         dest = next((n['name'] for n in neighborhoods if n['id'] == road['to']), 
                    next((f['name'] for f in facilities if f['id'] == road['to']), None))
         
-        if origin and dest:
-            route_id = f"{road['from']}-{road['to']}"
+        route_id = f"{road['from']}-{road['to']}"
+        if origin and dest and route_id in road_lookup:
             routes[route_id] = {
                 'name': f"{origin} to {dest}",
                 'distance': road['distance'],
                 'normal_time': road['distance'] * 2,  # Assuming average speed of 30 km/h
                 'origin': road['from'],
-                'destination': road['to']
+                'destination': road['to'],
+                'path_edges': [road_lookup[route_id]]
             }
     
     # Create tabs for different analysis modes
@@ -204,15 +205,24 @@ def main():
         # Route selection for impact analysis
         st.subheader("Select Route to Analyze")
         
+        selected_time = st.selectbox("Select Time of Day", list(time_mapping), index=1)
+        time_period = time_mapping[selected_time]
+        
         # Origin selection
         origin_locations = [f"{n['id']} - {n['name']}" for n in neighborhoods] + [f"{f['id']} - {f['name']}" for f in facilities]
         selected_origin = st.selectbox("Select Origin", origin_locations)
-        origin_id = int(selected_origin.split(" - ")[0])
+        origin_id = selected_origin.split(" - ")[0]
+        # Convert to integer if it's a neighborhood ID
+        if origin_id.isdigit():
+            origin_id = int(origin_id)
         
         # Destination selection
         dest_locations = [f"{n['id']} - {n['name']}" for n in neighborhoods] + [f"{f['id']} - {f['name']}" for f in facilities]
         selected_dest = st.selectbox("Select Destination", dest_locations)
-        destination_id = int(selected_dest.split(" - ")[0])
+        destination_id = selected_dest.split(" - ")[0]
+        # Convert to integer if it's a neighborhood ID
+        if destination_id.isdigit():
+            destination_id = int(destination_id)
         
         # Check if origin and destination are the same
         if origin_id == destination_id:
@@ -220,7 +230,7 @@ def main():
             return
         
         # Find route between points
-        route_data = find_route_between_points(origin_id, destination_id, existing_roads, neighborhoods, facilities)
+        route_data = find_route_between_points(origin_id, destination_id, network, traffic_flows, time_period)
         
         if route_data:
             # Get weather conditions
@@ -234,7 +244,7 @@ def main():
             }
             
             # Calculate impact
-            impact = calculate_weather_impact_on_route(route_data, weather_conditions)
+            impact = calculate_weather_impact_on_route(route_data, weather_conditions, network, traffic_flows)
             
             # Display route information
             st.subheader("Route Information")
@@ -349,6 +359,8 @@ def main():
         )
         
         days = st.slider("Number of Days", 3, 30, 7)
+        simulation_time = st.selectbox("Time of Day", list(time_mapping), index=1, key="simulation_time")
+        simulation_period = time_mapping[simulation_time]
         
         # Season override for testing
         with st.expander("Advanced Settings"):
@@ -365,32 +377,22 @@ def main():
             # Run multi-day simulation
             weather_forecast = simulate_weather_period(start_date, days, season_override)
             
-            # Sample route data (would come from actual routes)
-            routes = {
-                "Downtown-Airport": {
-                    "distance": 18.5,
-                    "normal_time": 45,
-                    "importance": "high"
-                },
-                "Nasr City-Giza": {
-                    "distance": 12.3,
-                    "normal_time": 35,
-                    "importance": "medium"
-                },
-                "Maadi-Heliopolis": {
-                    "distance": 15.8,
-                    "normal_time": 40,
-                    "importance": "medium"
-                },
-                "El Marg-Dokki": {
-                    "distance": 20.1,
-                    "normal_time": 55,
-                    "importance": "low"
-                }
+            # Key corridors, routed over the road network (El Marg is not in the
+            # network, so its corridor starts from neighbouring Shubra)
+            corridors = {
+                "Downtown-Airport": (3, "F1", "high"),
+                "Nasr City-Giza": (2, 8, "medium"),
+                "Maadi-Heliopolis": (1, 5, "medium"),
+                "Shubra-Dokki": (11, 10, "low")
             }
+            network_routes = {}
+            for corridor, (origin_id, destination_id, importance) in corridors.items():
+                route = find_route_between_points(origin_id, destination_id, network, traffic_flows, simulation_period)
+                if route:
+                    network_routes[corridor] = dict(route, importance=importance)
             
             # Simulate network impact
-            network_impact = simulate_weather_impact_on_network(routes, weather_forecast)
+            network_impact = simulate_weather_impact_on_network(network_routes, weather_forecast, network, traffic_flows)
             
             # Display forecast
             st.subheader("Weather Forecast")
@@ -0,0 +1,152 @@
+import math
+import numpy as np
+
+from src.algorithms.shortestpath import TIME_PERIODS, dijkstra_search, get_period_weights
+
+# Landmarks per weight profile; each costs one full search to build and one row of V distances
+LANDMARK_COUNT = 8
+
+def select_landmarks(network, edge_weights, count=LANDMARK_COUNT):
+    """
+    Picks landmarks spread over the network by farthest-point selection.
+    
+    Each new landmark is the reachable node farthest from all landmarks chosen so
+    far, which keeps them near the edge of the network where the triangle
+    inequality gives the tightest bounds.
+    
+    Args:
+        network: CSR road network
+        edge_weights: NumPy array with one non-negative weight per edge
+        count: Number of landmarks to pick
+    
+    Returns:
+        landmarks: List of node indices
+    """
+    num_nodes = network['num_nodes']
+    if num_nodes == 0:
+        return []
+    
+    arc_weights = edge_weights[network['arc_edge']].tolist()
+    
+    # Start from the node farthest from an arbitrary node
+    dist, _, _ = dijkstra_search(network, arc_weights, [0])
+    landmarks = [_farthest(dist)]
+    
+    while len(landmarks) < min(count, num_nodes):
+        # One multi-source search gives every node's distance to the nearest landmark
+        dist, _, _ = dijkstra_search(network, arc_weights, landmarks)
+        candidate = _farthest(dist)
+        if candidate in landmarks:
+            break
+        landmarks.append(candidate)
+    
+    return landmarks
+
+def build_landmarks(network, edge_weights, count=LANDMARK_COUNT):
+    """
+    Precomputes landmark distances for ALT (A*, landmarks, triangle inequality) bounds.
+    
+    Roads are two-way with one weight per road, so the distance from a landmark
+    equals the distance to it and a single array per landmark serves both the
+    forward and backward bound.
+    
+    Args:
+        network: CSR road network
+        edge_weights: NumPy array with one non-negative weight per edge
+        count: Number of landmarks
+    
+    Returns:
+        landmark_set: Dictionary with the landmark node indices and a
+                      (landmarks x nodes) distance array
+    """
+    landmarks = select_landmarks(network, edge_weights, count)
+    arc_weights = edge_weights[network['arc_edge']].tolist()
+    
+    dist = np.empty((len(landmarks), network['num_nodes']), dtype=float)
+    for row, landmark in enumerate(landmarks):
+        dist[row], _, _ = dijkstra_search(network, arc_weights, [landmark])
+    
+    return {
+        "landmarks": landmarks,
+        "dist": dist,
+        "weights_key": hash(edge_weights.tobytes())
+    }
+
+def get_landmarks(network, profile, edge_weights, count=LANDMARK_COUNT, weights_key=None):
+    """
+    Returns the cached landmark set for a weight profile, rebuilding it when the weights change.
+    
+    Args:
+        network: CSR road network
+        profile: Profile name (e.g. 'emergency' or a time period)
+        edge_weights: NumPy array with the profile's current edge weights
+        count: Number of landmarks
+        weights_key: Fingerprint of edge_weights kept by the caller (hashed here when None)
+    
+    Returns:
+        landmark_set: Landmark set (see build_landmarks)
+    """
+    if weights_key is None:
+        weights_key = hash(edge_weights.tobytes())
+    
+    cache = network.setdefault('_landmarks', {})
+    landmark_set = cache.get(profile)
+    if landmark_set is None or landmark_set['weights_key'] != weights_key:
+        landmark_set = build_landmarks(network, edge_weights, count)
+        landmark_set['weights_key'] = weights_key
+        cache[profile] = landmark_set
+    return landmark_set
+
+def get_period_landmarks(network, traffic_flows, count=LANDMARK_COUNT):
+    """
+    Returns landmark sets for every time period's compiled travel times.
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+        count: Number of landmarks per period
+    
+    Returns:
+        landmarks: Dictionary of time period -> landmark set, for run_dijkstra
+    """
+    table = get_period_weights(network, traffic_flows)
+    return {period: get_landmarks(network, period, table['weights'][period], count) for period in TIME_PERIODS}
+
+def invalidate_landmarks(network):
+    """Drop every cached landmark set stored on a network"""
+    network.pop('_landmarks', None)
+
+def alt_heuristic(landmark_set, target):
+    """
+    Computes the landmark lower bound on the distance from every node to a target.
+    
+    By the triangle inequality d(v, t) >= |d(L, t) - d(L, v)| for every landmark L,
+    so the largest such difference is admissible and consistent for any
+    non-negative cost function the landmarks were built with.
+    
+    Args:
+        landmark_set: Landmark set (see build_landmarks)
+        target: Target node index
+    
+    Returns:
+        heuristic: List of lower bounds indexed by node index
+    """
+    dist = landmark_set['dist']
+    if len(dist) == 0:
+        return [0.0] * dist.shape[1]
+    
+    with np.errstate(invalid='ignore'):
+        bounds = np.abs(dist[:, target:target + 1] - dist)
+    
+    # Nodes unreachable from a landmark together with the target give no information
+    bounds[np.isnan(bounds)] = 0.0
+    return bounds.max(axis=0).tolist()
+
+def _farthest(dist):
+    """Index of the largest finite distance"""
+    best = -1
+    best_dist = -1.0
+    for node, d in enumerate(dist):
+        if d != math.inf and d > best_dist:
+            best, best_dist = node, d
+    return best
@@ -0,0 +1,176 @@
+import heapq
+import math
+
+from src.data.network import get_adjacency
+from src.algorithms.shortestpath import dijkstra_search, describe_route, get_period_weights
+
+def k_shortest_routes(network, arc_weights, edge_weights, source, target, k=3):
+    """
+    Finds the k shortest loopless routes with Yen's algorithm.
+    
+    One reverse shortest-path tree from the target is built up front and shared by
+    every spur search: its distances are an exact A* potential (still a lower
+    bound once roads are masked out), and whenever the tree path from a spur node
+    avoids the masked roads and root nodes it is the spur path and no search runs.
+    
+    Args:
+        network: CSR road network
+        arc_weights: List with one non-negative weight per CSR arc, equal in both directions
+        edge_weights: NumPy array with the same weights per edge
+        source: Source node index
+        target: Target node index
+        k: Number of routes
+    
+    Returns:
+        routes: List of (cost, path_nodes, path_edge_ids), cheapest first
+    """
+    # Shared reverse tree: to_target[v] is the cost from v to the target and
+    # toward[v] / toward_edge[v] the next hop along it
+    to_target, toward, toward_edge = dijkstra_search(network, arc_weights, [target])
+    if to_target[source] == math.inf:
+        return []
+    
+    first_nodes, first_edges = _tree_path(toward, toward_edge, source)
+    routes = [(to_target[source], first_nodes, first_edges)]
+    weights = edge_weights.tolist()
+    
+    candidates = []
+    seen = {tuple(first_edges)}
+    
+    while len(routes) < k:
+        _, last_nodes, last_edges = routes[-1]
+        
+        root_cost = 0.0
+        for i in range(len(last_nodes) - 1):
+            spur = last_nodes[i]
+            root_nodes = last_nodes[:i + 1]
+            root_edges = last_edges[:i]
+            
+            # Block the next road of every accepted route sharing this root, and
+            # the root's own nodes so spur paths stay loopless
+            blocked_edges = {edges[i] for _, nodes, edges in routes
+                             if len(edges) > i and edges[:i] == root_edges}
+            blocked_nodes = set(root_nodes[:-1])
+            
+            spur_nodes, spur_edges = _tree_path(toward, toward_edge, spur)
+            if blocked_edges.intersection(spur_edges) or blocked_nodes.intersection(spur_nodes):
+                spur_cost, spur_nodes, spur_edges = _masked_a_star(
+                    network, arc_weights, spur, target, to_target, blocked_edges, blocked_nodes
+                )
+            else:
+                spur_cost = to_target[spur]
+            
+            if spur_nodes is not None:
+                edges = root_edges + spur_edges
+                if tuple(edges) not in seen:
+                    seen.add(tuple(edges))
+                    heapq.heappush(candidates, (root_cost + spur_cost, edges, root_nodes[:-1] + spur_nodes))
+            
+            root_cost += weights[last_edges[i]]
+        
+        if not candidates:
+            break
+        cost, edges, nodes = heapq.heappop(candidates)
+        routes.append((cost, nodes, edges))
+    
+    return routes
+
+def run_k_alternatives(network, origin, destination, time_period, traffic_flows, k=3):
+    """
+    Finds the k fastest distinct routes between two nodes for a time period.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        origin: ID of the origin node
+        destination: ID of the destination node
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
+        traffic_flows: Dictionary containing traffic flow data
+        k: Number of routes (typically 3-5)
+    
+    Returns:
+        alternatives: List of route dictionaries, fastest first, each with 'rank',
+                      'path', 'travel_time', 'path_edges', 'total_distance',
+                      'congestion_level' and 'route_details' as in run_dijkstra
+    """
+    node_index = network['node_index']
+    if origin not in node_index or destination not in node_index:
+        return []
+    
+    table = get_period_weights(network, traffic_flows)
+    routes = k_shortest_routes(
+        network, table["arc_weights"][time_period], table["weights"][time_period],
+        node_index[origin], node_index[destination], k
+    )
+    
+    alternatives = []
+    for rank, (travel_time, path_nodes, path_edge_ids) in enumerate(routes, start=1):
+        path, path_edges, total_distance, congestion_level, route_details = describe_route(
+            network, table, time_period, path_nodes, path_edge_ids
+        )
+        alternatives.append({
+            "rank": rank,
+            "path": path,
+            "travel_time": travel_time,
+            "path_edges": path_edges,
+            "total_distance": total_distance,
+            "congestion_level": congestion_level,
+            "route_details": route_details
+        })
+    
+    return alternatives
+
+def _tree_path(toward, toward_edge, node):
+    """Follow the reverse tree from a node to its root (the target)"""
+    nodes = [node]
+    edges = []
+    while toward[nodes[-1]] != -1:
+        edges.append(toward_edge[nodes[-1]])
+        nodes.append(toward[nodes[-1]])
+    return nodes, edges
+
+def _masked_a_star(network, arc_weights, source, target, potential, blocked_edges, blocked_nodes):
+    """
+    A* from source to target that skips blocked roads and nodes.
+    
+    Returns:
+        cost: Path cost (inf if no path)
+        path_nodes: List of node indices (None if no path)
+        path_edge_ids: List of edge indices along the path
+    """
+    indptr, indices, arc_edge = get_adjacency(network)
+    
+    g_score = {source: 0.0}
+    came_from = {}
+    heap = [(potential[source], source)]
+    closed = set()
+    
+    while heap:
+        _, u = heapq.heappop(heap)
+        if u in closed:
+            continue
+        closed.add(u)
+        
+        if u == target:
+            nodes = [u]
+            edges = []
+            while nodes[-1] in came_from:
+                prev, e = came_from[nodes[-1]]
+                edges.append(e)
+                nodes.append(prev)
+            nodes.reverse()
+            edges.reverse()
+            return g_score[target], nodes, edges
+        
+        g = g_score[u]
+        for arc in range(indptr[u], indptr[u + 1]):
+            v = indices[arc]
+            e = arc_edge[arc]
+            if v in blocked_nodes or e in blocked_edges or v in closed:
+                continue
+            tentative = g + arc_weights[arc]
+            if tentative < g_score.get(v, math.inf):
+                g_score[v] = tentative
+                came_from[v] = (u, e)
+                heapq.heappush(heap, (tentative + potential[v], v))
+    
+    return math.inf, None, []
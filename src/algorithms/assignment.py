@@ -0,0 +1,300 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import RawArray
+
+from src.data.network import get_adjacency
+from src.algorithms.bpr import BPR_ALPHA, bpr_travel_times, free_flow_times, inverse_capacities
+from src.algorithms.shortestpath import dijkstra_search
+from src.algorithms.matrix import PARALLEL_MIN_ORIGINS
+
+# Stop once the relative gap between current and shortest-path travel times falls below this.
+# On a 200-district city with 400 OD pairs conjugate Frank-Wolfe reaches 1e-3 in about 40
+# iterations and plain Frank-Wolfe in about 60; 1e-4 takes about 120 and 400
+ASSIGNMENT_GAP = 1e-3
+ASSIGNMENT_MAX_ITERATIONS = 500
+
+# Conjugate Frank-Wolfe keeps at least this share of the all-or-nothing target in each
+# direction; smaller values let directions jam onto the previous one on congested networks
+CONJUGATE_DELTA = 0.05
+
+# Conjugate steps shorter than this restart from the plain Frank-Wolfe direction
+CONJUGATE_RESTART_STEP = 1e-6
+
+# Bisection steps of the line search (step length resolution 2^-30)
+LINE_SEARCH_STEPS = 30
+
+# Network view installed in each worker process by _init_worker
+_WORKER_STATE = {}
+
+def _init_worker(adjacency, num_nodes, num_edges, shared_weights):
+    """Install the shared adjacency and the shared arc weight buffer once per worker process"""
+    _WORKER_STATE['network'] = {"_adjacency": adjacency, "num_nodes": num_nodes, "num_edges": num_edges}
+    _WORKER_STATE['shared_weights'] = shared_weights
+    _WORKER_STATE['loading'] = None
+
+def _load_chunk(loading, origins):
+    """Worker entry point: all-or-nothing loading of a chunk of origins"""
+    if _WORKER_STATE['loading'] != loading:
+        # The parent rewrote the shared weights for a new loading: read them once per worker
+        _WORKER_STATE['arc_weights'] = np.frombuffer(_WORKER_STATE['shared_weights']).tolist()
+        _WORKER_STATE['loading'] = loading
+    return _all_or_nothing(_WORKER_STATE['network'], _WORKER_STATE['arc_weights'], origins)
+
+def _all_or_nothing(network, arc_weights, origins):
+    """
+    Loads each origin's demand onto its shortest-path tree.
+    
+    Args:
+        network: CSR road network (only the adjacency and sizes are used)
+        arc_weights: List with one travel time per CSR arc
+        origins: List of (origin index, destination indices, trips) tuples
+    
+    Returns:
+        flow: NumPy array of vehicles per hour per edge
+        unassigned: Trips whose destination is unreachable
+    """
+    flow = [0.0] * network['num_edges']
+    unassigned = 0.0
+    
+    for origin, destinations, trips in origins:
+        dist, pred, pred_edge = dijkstra_search(network, arc_weights, [origin])
+        
+        load = [0.0] * network['num_nodes']
+        for d, amount in zip(destinations, trips):
+            if dist[d] == float('inf'):
+                unassigned += amount
+            else:
+                load[d] += amount
+        
+        # Push every node's load one step up its tree, farthest nodes first, so each
+        # edge receives the total demand of the subtree below it
+        for v in sorted(range(network['num_nodes']), key=dist.__getitem__, reverse=True):
+            if load[v] and pred[v] != -1:
+                flow[pred_edge[v]] += load[v]
+                load[pred[v]] += load[v]
+    
+    return np.array(flow), unassigned
+
+def _demand_by_origin(network, demand):
+    """
+    Groups an OD demand matrix by origin index.
+    
+    Args:
+        network: CSR road network
+        demand: Dictionary of (origin ID, destination ID) -> vehicles per hour, or a
+                square array indexed by node index
+    
+    Returns:
+        origins: List of (origin index, destination indices, trips) tuples
+        unknown: Trips between node IDs missing from the network
+    """
+    grouped = {}
+    unknown = 0.0
+    
+    if isinstance(demand, dict):
+        node_index = network['node_index']
+        for (origin, destination), trips in demand.items():
+            if origin not in node_index or destination not in node_index:
+                unknown += trips
+                continue
+            grouped.setdefault(node_index[origin], []).append((node_index[destination], trips))
+    else:
+        demand = np.asarray(demand, dtype=float)
+        for origin, destination in zip(*np.nonzero(demand)):
+            grouped.setdefault(int(origin), []).append((int(destination), float(demand[origin, destination])))
+    
+    origins = []
+    for origin, pairs in grouped.items():
+        pairs = [(d, trips) for d, trips in pairs if d != origin and trips > 0]
+        if pairs:
+            destinations, trips = zip(*pairs)
+            origins.append((origin, list(destinations), list(trips)))
+    
+    return origins, unknown
+
+def _load_network(network, edge_costs, chunks, pool):
+    """Run all-or-nothing loading at the given edge costs, serially or on the pool"""
+    arc_costs = edge_costs[network['arc_edge']]
+    
+    if pool is None:
+        return _all_or_nothing(network, arc_costs.tolist(), chunks[0])
+    
+    # Workers read the costs from shared memory instead of a pickled copy per chunk;
+    # every chunk of the previous loading has returned, so the buffer is free to rewrite
+    np.frombuffer(pool['weights'])[:] = arc_costs
+    pool['loadings'] += 1
+    
+    flow = np.zeros(network['num_edges'])
+    unassigned = 0.0
+    for chunk_flow, chunk_unassigned in pool['executor'].map(_load_chunk, [pool['loadings']] * len(chunks), chunks):
+        flow += chunk_flow
+        unassigned += chunk_unassigned
+    return flow, unassigned
+
+def _line_search(link_costs, flow, direction):
+    """
+    Finds the step along a direction that minimizes the Beckmann objective.
+    
+    The objective's derivative along the direction, sum(t(x + step * d) * d), is
+    non-decreasing in the step, so its root is found by bisection.
+    """
+    if direction @ link_costs(flow + direction) <= 0:
+        return 1.0
+    
+    low, high = 0.0, 1.0
+    for _ in range(LINE_SEARCH_STEPS):
+        middle = (low + high) / 2
+        if direction @ link_costs(flow + middle * direction) > 0:
+            high = middle
+        else:
+            low = middle
+    return (low + high) / 2
+
+def run_traffic_assignment(network, demand, method='conjugate', max_iterations=ASSIGNMENT_MAX_ITERATIONS,
+                           gap=ASSIGNMENT_GAP, warm_start=None, processes=None,
+                           speed_multiplier=1.0, capacity_multiplier=1.0):
+    """
+    Computes static user-equilibrium link flows with (conjugate) Frank-Wolfe.
+    
+    Link travel times follow the same BPR model as the compiled period weights, but
+    with flows produced by routing the demand instead of fixed traffic counts. Each
+    iteration loads all demand onto shortest paths at the current travel times
+    (one search per origin, fanned out across a process pool for large demand
+    matrices) and moves toward that loading by an exact line search.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        demand: Dictionary of (origin ID, destination ID) -> vehicles per hour, or a
+                square array indexed by node index
+        method: 'conjugate' (conjugate Frank-Wolfe) or 'frank_wolfe'
+        max_iterations: Maximum number of iterations
+        gap: Relative gap at which the assignment counts as converged
+        warm_start: Previous assignment result (or flow array) for the same demand,
+                    e.g. before a capacity change, to start from instead of free-flow loading
+        processes: Number of worker processes (None picks automatically, 1 runs serially)
+        speed_multiplier: Free-flow speed multiplier (e.g. from weather conditions)
+        capacity_multiplier: Road capacity multiplier (e.g. from weather conditions)
+    
+    Returns:
+        results: Dictionary with per-edge 'flow' and 'travel_time' arrays, 'road_flows'
+                 by road ID, 'relative_gap' per iteration, 'iterations', 'converged',
+                 'total_travel_time' (vehicle-minutes) and 'unassigned_demand'
+    """
+    distance = network['distance']
+    capacity = network['capacity']
+    condition = network['condition']
+    
+    def link_costs(flow):
+        return bpr_travel_times(distance, capacity, condition, flow, None, speed_multiplier, capacity_multiplier)[0]
+    
+    # Derivative of the BPR function, used to make conjugate directions
+    free_flow = free_flow_times(distance, condition, speed_multiplier)
+    inverse_capacity, _ = inverse_capacities(capacity, capacity_multiplier)
+    cost_slope = free_flow * 4 * BPR_ALPHA * inverse_capacity ** 4
+    
+    origins, unknown = _demand_by_origin(network, demand)
+    
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(origins) >= PARALLEL_MIN_ORIGINS else 1
+    
+    pool = None
+    chunks = [origins]
+    if processes > 1:
+        # Split origins into contiguous chunks, a few per worker for load balancing
+        chunk_size = max(1, len(origins) // (processes * 4))
+        chunks = [origins[i:i + chunk_size] for i in range(0, len(origins), chunk_size)]
+        
+        # Arc costs change every iteration, so they live in a buffer shared with the workers
+        weights = RawArray('d', len(network['arc_edge']))
+        pool = {
+            "weights": weights,
+            "loadings": 0,
+            "executor": ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=_init_worker,
+                initargs=(get_adjacency(network), network['num_nodes'], network['num_edges'], weights)
+            )
+        }
+    
+    try:
+        if warm_start is not None:
+            flow = np.array(warm_start['flow'] if isinstance(warm_start, dict) else warm_start, dtype=float)
+        else:
+            flow, _ = _load_network(network, link_costs(np.zeros(network['num_edges'])), chunks, pool)
+        
+        relative_gap = []
+        converged = False
+        target = None
+        unassigned = 0.0
+        
+        for _ in range(max_iterations):
+            travel_time = link_costs(flow)
+            aon_flow, unassigned = _load_network(network, travel_time, chunks, pool)
+            
+            # Relative gap: how far current travel is above everyone taking a shortest path
+            total = flow @ travel_time
+            shortest = aon_flow @ travel_time
+            relative_gap.append(float((total - shortest) / total) if total > 0 else 0.0)
+            if relative_gap[-1] <= gap:
+                converged = True
+                break
+            
+            if method == 'conjugate' and target is not None:
+                # Mix the previous target in so the new direction is conjugate to the
+                # previous one with respect to the Hessian of the objective
+                slope = cost_slope * flow ** 3
+                previous = target - flow
+                numerator = previous @ (slope * (aon_flow - flow))
+                denominator = previous @ (slope * (aon_flow - target))
+                alpha = numerator / denominator if denominator != 0 else 0.0
+                alpha = min(max(alpha, 0.0), 1.0 - CONJUGATE_DELTA)
+                target = alpha * target + (1 - alpha) * aon_flow
+                
+                # Fall back to the plain Frank-Wolfe target if the mix is not a descent direction
+                if (target - flow) @ travel_time >= 0:
+                    target = aon_flow
+            else:
+                target = aon_flow
+            
+            direction = target - flow
+            step = _line_search(link_costs, flow, direction)
+            if step < CONJUGATE_RESTART_STEP and target is not aon_flow:
+                # The conjugate direction stalled: restart from the plain Frank-Wolfe target
+                target = aon_flow
+                direction = target - flow
+                step = _line_search(link_costs, flow, direction)
+            flow = flow + step * direction
+    finally:
+        if pool is not None:
+            pool['executor'].shutdown()
+    
+    travel_time = link_costs(flow)
+    
+    return {
+        "flow": flow,
+        "travel_time": travel_time,
+        "road_flows": dict(zip(network['road_ids'], flow.tolist())),
+        "relative_gap": relative_gap,
+        "iterations": len(relative_gap),
+        "converged": converged,
+        "total_travel_time": float(flow @ travel_time),
+        "unassigned_demand": unassigned + unknown
+    }
+
+def assignment_traffic_flows(network, results):
+    """
+    Converts assignment results into the traffic flow format used by the route planners.
+    
+    Args:
+        network: CSR road network
+        results: Dictionary of time period -> assignment result (see run_traffic_assignment)
+    
+    Returns:
+        traffic_flows: Dictionary of "from-to" road ID -> {period: vehicles per hour}
+    """
+    traffic_flows = {road_id: {} for road_id in network['road_ids']}
+    for period, result in results.items():
+        for road_id, flow in zip(network['road_ids'], np.asarray(result['flow']).tolist()):
+            traffic_flows[road_id][period] = round(flow)
+    return traffic_flows
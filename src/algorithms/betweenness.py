@@ -0,0 +1,241 @@
+import os
+import heapq
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from src.data.network import get_adjacency
+from src.algorithms.shortestpath import TIME_PERIODS, get_period_weights
+from src.algorithms.matrix import PARALLEL_MIN_ORIGINS
+
+# Networks up to this many nodes get exact betweenness (one search from every node)
+EXACT_MAX_NODES = 2000
+
+# Sources sampled per period for larger networks
+BETWEENNESS_SAMPLES = 500
+
+# Two-sided normal quantile for the reported error bounds (95% confidence)
+CONFIDENCE_Z = 1.96
+
+# Network view installed in each worker process by _init_worker
+_WORKER_STATE = {}
+
+def _init_worker(adjacency, num_nodes, num_edges):
+    """Install the shared adjacency once per worker process"""
+    _WORKER_STATE['network'] = {"_adjacency": adjacency, "num_nodes": num_nodes, "num_edges": num_edges}
+
+def _accumulate_chunk(arc_weights, sources):
+    """Worker entry point: betweenness contributions of a chunk of sources"""
+    return _source_contributions(_WORKER_STATE['network'], arc_weights, sources)
+
+def _source_contributions(network, arc_weights, sources):
+    """
+    Runs Brandes' dependency accumulation from each source.
+    
+    Args:
+        network: CSR road network (only the adjacency and sizes are used)
+        arc_weights: List with one non-negative weight per CSR arc
+        sources: List of source node indices
+    
+    Returns:
+        total: NumPy array with the summed per-edge contributions
+        squares: NumPy array with the summed squared per-source contributions
+    """
+    indptr, indices, arc_edge = get_adjacency(network)
+    num_nodes = network['num_nodes']
+    total = np.zeros(network['num_edges'])
+    squares = np.zeros(network['num_edges'])
+    
+    for source in sources:
+        dist = [math.inf] * num_nodes
+        sigma = [0] * num_nodes
+        preds = [[] for _ in range(num_nodes)]
+        settled = []
+        dist[source] = 0.0
+        sigma[source] = 1
+        heap = [(0.0, source)]
+        done = [False] * num_nodes
+        
+        # Dijkstra that counts shortest paths and keeps every tied predecessor
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            settled.append(u)
+            
+            for arc in range(indptr[u], indptr[u + 1]):
+                v = indices[arc]
+                nd = d + arc_weights[arc]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    sigma[v] = sigma[u]
+                    preds[v] = [(u, arc_edge[arc])]
+                    heapq.heappush(heap, (nd, v))
+                elif nd == dist[v] and nd < math.inf and not done[v]:
+                    sigma[v] += sigma[u]
+                    preds[v].append((u, arc_edge[arc]))
+        
+        # Walk back from the farthest node, splitting each node's dependency
+        # over its predecessors in proportion to their path counts
+        contribution = {}
+        delta = [0.0] * num_nodes
+        for w in reversed(settled):
+            for v, e in preds[w]:
+                share = sigma[v] / sigma[w] * (1.0 + delta[w])
+                contribution[e] = contribution.get(e, 0.0) + share
+                delta[v] += share
+        
+        if contribution:
+            edges = np.fromiter(contribution.keys(), dtype=np.int64, count=len(contribution))
+            values = np.fromiter(contribution.values(), dtype=float, count=len(contribution))
+            total[edges] += values
+            squares[edges] += values ** 2
+    
+    return total, squares
+
+def edge_betweenness(network, arc_weights, sources=None, processes=None, executor=None):
+    """
+    Computes (sampled) edge betweenness for one set of arc weights.
+    
+    Every source contributes the number of shortest paths from it that use each
+    road. Using all nodes as sources gives exact betweenness (Brandes); using a
+    uniform sample of k sources and scaling by n / k gives an unbiased estimate
+    whose spread is measured from the same per-source contributions.
+    
+    Args:
+        network: CSR road network
+        arc_weights: List with one non-negative weight per CSR arc
+        sources: List of source node indices (defaults to every node, i.e. exact)
+        processes: Number of worker processes (None picks automatically, 1 runs serially)
+        executor: Optional running process pool set up with _init_worker (with
+                  processes giving its number of workers)
+    
+    Returns:
+        betweenness: NumPy array with the number of shortest paths between
+                     unordered node pairs that use each edge
+        error: NumPy array with the 95% confidence half-width (zeros when exact);
+               a normal approximation, which holds for the busy roads at the top of a
+               ranking but is optimistic for roads that few sampled sources route over
+    """
+    num_nodes = network['num_nodes']
+    if sources is None:
+        sources = list(range(num_nodes))
+    sources = list(sources)
+    
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(sources) >= PARALLEL_MIN_ORIGINS else 1
+    
+    if executor is None and processes <= 1:
+        total, squares = _source_contributions(network, arc_weights, sources)
+    else:
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=_init_worker,
+                initargs=(get_adjacency(network), num_nodes, network['num_edges'])
+            )
+        try:
+            # Split sources into contiguous chunks, a few per worker for load balancing
+            chunk_size = max(1, len(sources) // (processes * 4))
+            chunks = [sources[i:i + chunk_size] for i in range(0, len(sources), chunk_size)]
+            total = np.zeros(network['num_edges'])
+            squares = np.zeros(network['num_edges'])
+            for chunk_total, chunk_squares in executor.map(_accumulate_chunk, [arc_weights] * len(chunks), chunks):
+                total += chunk_total
+                squares += chunk_squares
+        finally:
+            if own_executor:
+                executor.shutdown()
+    
+    # Each unordered pair is counted once from either end
+    k = len(sources)
+    if k == 0:
+        return np.zeros(network['num_edges']), np.zeros(network['num_edges'])
+    if k >= num_nodes:
+        return total / 2, np.zeros(network['num_edges'])
+    
+    scale = num_nodes / k
+    mean = total / k
+    variance = np.maximum(squares / k - mean ** 2, 0.0) * k / max(k - 1, 1)
+    
+    # Sampling without replacement: finite population correction
+    correction = (num_nodes - k) / (num_nodes - 1)
+    error = CONFIDENCE_Z * num_nodes * np.sqrt(variance / k * correction) / 2
+    return total * scale / 2, error
+
+def road_criticality(network, traffic_flows, time_periods=None, samples=BETWEENNESS_SAMPLES,
+                     exact_max_nodes=EXACT_MAX_NODES, processes=None, seed=None):
+    """
+    Ranks every road by betweenness under each time period's travel times.
+    
+    Small networks get exact betweenness; larger ones sample the same sources
+    for every period, so the periods stay comparable, and report 95% error
+    bounds. A single process pool serves all periods.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data
+        time_periods: List of time periods (defaults to all four)
+        samples: Number of sampled sources for networks above exact_max_nodes
+        exact_max_nodes: Largest network that gets exact betweenness
+        processes: Number of worker processes (None picks automatically, 1 runs serially)
+        seed: Random seed for the source sample
+    
+    Returns:
+        report: Dictionary with 'exact', 'sources' (number of sources searched),
+                per-period 'betweenness' and 'error' arrays per edge, and
+                'ranking': one row per road ("road", "condition", per-period
+                betweenness and error, "mean_betweenness"), most critical first
+    """
+    if time_periods is None:
+        time_periods = TIME_PERIODS
+    num_nodes = network['num_nodes']
+    
+    exact = num_nodes <= exact_max_nodes or samples >= num_nodes
+    if exact:
+        sources = list(range(num_nodes))
+    else:
+        sources = np.random.default_rng(seed).choice(num_nodes, size=samples, replace=False).tolist()
+    
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(sources) >= PARALLEL_MIN_ORIGINS else 1
+    
+    table = get_period_weights(network, traffic_flows)
+    betweenness = {}
+    error = {}
+    
+    executor = None
+    if processes > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(get_adjacency(network), num_nodes, network['num_edges'])
+        )
+    try:
+        for period in time_periods:
+            betweenness[period], error[period] = edge_betweenness(
+                network, table["arc_weights"][period], sources, processes, executor
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    mean = np.mean([betweenness[period] for period in time_periods], axis=0)
+    ranking = []
+    for e in np.argsort(-mean, kind='stable').tolist():
+        row = {"road": network['road_ids'][e], "condition": float(network['condition'][e])}
+        for period in time_periods:
+            row[period] = float(betweenness[period][e])
+            row[f"{period}_error"] = float(error[period][e])
+        row["mean_betweenness"] = float(mean[e])
+        ranking.append(row)
+    
+    return {
+        "exact": exact,
+        "sources": len(sources),
+        "betweenness": betweenness,
+        "error": error,
+        "ranking": ranking
+    }
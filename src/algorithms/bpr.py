@@ -0,0 +1,106 @@
+import numpy as np
+
+# Bureau of Public Roads volume-delay parameter: t = t0 * (1 + ALPHA * (v/c)^4)
+BPR_ALPHA = 0.15
+
+# Free-flow speed in km/h for a road in perfect condition
+BASE_SPEED = 60
+
+def edge_flow_matrix(network, traffic_flows, periods):
+    """
+    Gathers traffic counts into an edge x period array aligned with the network's edges.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary of "from-to" road id -> {period: vehicles per hour}
+        periods: List of time periods (columns of the result)
+    
+    Returns:
+        flow: NumPy array of shape (num_edges, len(periods))
+        has_flow: Boolean array marking edges with a traffic record
+    """
+    flow = np.zeros((network['num_edges'], len(periods)), dtype=float)
+    has_flow = np.zeros(network['num_edges'], dtype=bool)
+    
+    for i, road_id in enumerate(network['road_ids']):
+        record = traffic_flows.get(road_id)
+        if record is None:
+            # Roads may be recorded in the opposite direction
+            nodes = road_id.split("-")
+            record = traffic_flows.get(f"{nodes[1]}-{nodes[0]}")
+        if record is not None:
+            has_flow[i] = True
+            flow[i] = [record.get(period, 0) for period in periods]
+    
+    return flow, has_flow
+
+def free_flow_times(distance, condition, speed_multiplier=1.0):
+    """
+    Computes travel times in minutes on empty roads.
+    
+    Args:
+        distance: Array of edge lengths in km
+        condition: Array of road conditions (1-10)
+        speed_multiplier: Free-flow speed multiplier (e.g. 1 - weather speed reduction)
+    
+    Returns:
+        free_flow_time: Array of travel times in minutes with no traffic
+    """
+    # Better condition means faster travel; speed is BASE_SPEED at condition 10 with no traffic
+    condition_factor = 1.2 - (condition / 10)
+    return distance * condition_factor * (60 / (BASE_SPEED * speed_multiplier))
+
+def inverse_capacities(capacity, capacity_multiplier=1.0):
+    """
+    Computes 1 / capacity per edge, with 0 for edges without a positive capacity.
+    
+    Args:
+        capacity: Array of edge capacities in vehicles per hour
+        capacity_multiplier: Capacity multiplier (e.g. 1 - weather capacity reduction)
+    
+    Returns:
+        inverse_capacity: Array of inverse capacities
+        positive: Boolean array marking edges with a positive capacity
+    """
+    capacity = capacity * capacity_multiplier
+    positive = capacity > 0
+    return np.where(positive, 1.0 / np.where(positive, capacity, 1.0), 0.0), positive
+
+def bpr_travel_times(distance, capacity, condition, flow, has_flow=None,
+                     speed_multiplier=1.0, capacity_multiplier=1.0):
+    """
+    Computes BPR travel times for every edge and every period in one vectorized pass.
+    
+    Args:
+        distance: Array of edge lengths in km, shape (E,)
+        capacity: Array of edge capacities in vehicles per hour, shape (E,)
+        condition: Array of road conditions (1-10), shape (E,)
+        flow: Array of flows in vehicles per hour, shape (E,) or (E, P)
+        has_flow: Optional boolean array (E,); edges without a traffic record get no delay
+        speed_multiplier: Free-flow speed multiplier (e.g. 1 - weather speed reduction)
+        capacity_multiplier: Capacity multiplier (e.g. 1 - weather capacity reduction)
+    
+    Returns:
+        travel_time: Array shaped like flow with travel times in minutes
+        traffic_factor: Array shaped like flow with the BPR delay factor
+    """
+    flow = np.asarray(flow, dtype=float)
+    column = (slice(None),) + (None,) * (flow.ndim - 1)
+    
+    # Volume-to-capacity ratio affects speed; missing capacity counts as saturated
+    inverse_capacity, positive = inverse_capacities(capacity, capacity_multiplier)
+    v_c_ratio = flow * inverse_capacity[column]
+    if not positive.all():
+        v_c_ratio[~positive] = 1.0
+    
+    # t = t0 * (1 + 0.15 * (v/c)^4), computed in place on the ratio buffer
+    traffic_factor = np.square(v_c_ratio, out=v_c_ratio)
+    np.square(traffic_factor, out=traffic_factor)
+    traffic_factor *= BPR_ALPHA
+    traffic_factor += 1.0
+    if has_flow is not None and not has_flow.all():
+        traffic_factor[~has_flow] = 1.0
+    
+    free_flow_time = free_flow_times(distance, condition, speed_multiplier)
+    travel_time = traffic_factor * free_flow_time[column]
+    return travel_time, traffic_factor
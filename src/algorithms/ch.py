@@ -0,0 +1,400 @@
+import os
+import sys
+import hashlib
+import heapq
+import math
+import numpy as np
+
+# Settled-node budget for witness searches during contraction
+WITNESS_SETTLE_LIMIT = 60
+
+def weights_fingerprint(edge_weights):
+    """Fingerprint of a per-edge weight array, used to validate stored hierarchies"""
+    return hashlib.sha1(np.ascontiguousarray(edge_weights, dtype=float).tobytes()).hexdigest()
+
+def _witness_search(adj, ch_weight, source, skip, max_cost):
+    """
+    Bounded Dijkstra used while contracting a node.
+    
+    Args:
+        adj: Remaining (uncontracted) adjacency as a list of {neighbor: ch_edge} dicts
+        ch_weight: Weight per hierarchy edge
+        source: Node to search from
+        skip: Node being contracted (excluded from the search)
+        max_cost: Stop once distances exceed this cost
+    
+    Returns:
+        dist: Dictionary of tentative distances from the source
+    """
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    
+    while heap and settled < WITNESS_SETTLE_LIMIT:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > max_cost:
+            break
+        settled += 1
+        
+        for v, cid in adj[u].items():
+            if v == skip:
+                continue
+            nd = d + ch_weight[cid]
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    
+    return dist
+
+def _required_shortcuts(adj, ch_weight, v):
+    """List the shortcuts (u, x, weight, edge_u, edge_x) needed to contract node v"""
+    neighbors = list(adj[v].items())
+    shortcuts = []
+    
+    for i, (u, cu) in enumerate(neighbors):
+        rest = neighbors[i + 1:]
+        if not rest:
+            continue
+        
+        max_cost = ch_weight[cu] + max(ch_weight[cx] for _, cx in rest)
+        dist = _witness_search(adj, ch_weight, u, v, max_cost)
+        
+        for x, cx in rest:
+            via_cost = ch_weight[cu] + ch_weight[cx]
+            # A witness path of equal cost makes the shortcut unnecessary
+            if dist.get(x, math.inf) > via_cost:
+                shortcuts.append((u, x, via_cost, cu, cx))
+    
+    return shortcuts
+
+def build_contraction_hierarchy(network, edge_weights):
+    """
+    Builds a Contraction Hierarchies (CH) index for one weight profile.
+    
+    Nodes are contracted in order of edge difference (shortcuts added minus edges
+    removed) with lazy priority updates. Every shortcut remembers the two
+    hierarchy edges it replaces so query results can be unpacked to road edges.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        edge_weights: NumPy array with one non-negative weight per road edge
+    
+    Returns:
+        hierarchy: Dictionary with node ranks, the upward graph in CSR form and
+                   the hierarchy edge table (original roads and shortcuts)
+    """
+    num_nodes = network['num_nodes']
+    edge_from = network['edge_from'].tolist()
+    edge_to = network['edge_to'].tolist()
+    weights = np.asarray(edge_weights, dtype=float).tolist()
+    
+    # Hierarchy edge table
+    ch_u, ch_v, ch_weight, ch_orig, ch_via, ch_child1, ch_child2 = [], [], [], [], [], [], []
+    
+    def add_edge(u, v, weight, orig, via, child1, child2):
+        ch_u.append(u)
+        ch_v.append(v)
+        ch_weight.append(weight)
+        ch_orig.append(orig)
+        ch_via.append(via)
+        ch_child1.append(child1)
+        ch_child2.append(child2)
+        return len(ch_u) - 1
+    
+    # Keep only the cheapest road between any pair of nodes
+    adj = [dict() for _ in range(num_nodes)]
+    for e in range(len(weights)):
+        u, v = edge_from[e], edge_to[e]
+        if u == v:
+            continue
+        existing = adj[u].get(v)
+        if existing is not None and ch_weight[existing] <= weights[e]:
+            continue
+        cid = add_edge(u, v, weights[e], e, -1, -1, -1)
+        adj[u][v] = cid
+        adj[v][u] = cid
+    
+    contracted_neighbors = [0] * num_nodes
+    
+    def priority(v):
+        shortcuts = _required_shortcuts(adj, ch_weight, v)
+        return len(shortcuts) - len(adj[v]) + contracted_neighbors[v], shortcuts
+    
+    heap = [(priority(v)[0], v) for v in range(num_nodes)]
+    heapq.heapify(heap)
+    
+    rank = [-1] * num_nodes
+    upward = [None] * num_nodes
+    order = 0
+    
+    while heap:
+        _, v = heapq.heappop(heap)
+        if rank[v] != -1:
+            continue
+        
+        # Lazy update: re-queue if the node's priority got worse
+        current, shortcuts = priority(v)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+        
+        for u, x, weight, cu, cx in shortcuts:
+            existing = adj[u].get(x)
+            if existing is not None and ch_weight[existing] <= weight:
+                continue
+            cid = add_edge(u, x, weight, -1, v, cu, cx)
+            adj[u][x] = cid
+            adj[x][u] = cid
+        
+        # Every remaining neighbor is contracted later, so these edges point upward
+        upward[v] = list(adj[v].items())
+        for u in adj[v]:
+            del adj[u][v]
+            contracted_neighbors[u] += 1
+        adj[v] = {}
+        
+        rank[v] = order
+        order += 1
+    
+    # Pack the upward graph into CSR arrays
+    up_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum([len(up) for up in upward], out=up_indptr[1:])
+    up_heads = np.array([u for up in upward for u, _ in up], dtype=np.int32)
+    up_edges = np.array([cid for up in upward for _, cid in up], dtype=np.int32)
+    
+    return {
+        "rank": np.array(rank, dtype=np.int32),
+        "up_indptr": up_indptr,
+        "up_heads": up_heads,
+        "up_edges": up_edges,
+        "ch_u": np.array(ch_u, dtype=np.int32),
+        "ch_v": np.array(ch_v, dtype=np.int32),
+        "ch_weight": np.array(ch_weight, dtype=float),
+        "ch_orig": np.array(ch_orig, dtype=np.int32),
+        "ch_via": np.array(ch_via, dtype=np.int32),
+        "ch_child1": np.array(ch_child1, dtype=np.int32),
+        "ch_child2": np.array(ch_child2, dtype=np.int32),
+        "network_version": network['version'],
+        "weights_hash": weights_fingerprint(edge_weights)
+    }
+
+def _query_lists(hierarchy):
+    """Plain-list view of a hierarchy for the query loops (built once)"""
+    if '_lists' not in hierarchy:
+        hierarchy['_lists'] = {
+            name: hierarchy[name].tolist()
+            for name in ["up_indptr", "up_heads", "up_edges", "ch_u", "ch_v", "ch_weight",
+                         "ch_orig", "ch_via", "ch_child1", "ch_child2"]
+        }
+    return hierarchy['_lists']
+
+def _unpack_edge(lists, cid, start):
+    """Expand a hierarchy edge traversed from `start` into road edge ids and nodes"""
+    edges = []
+    nodes = []
+    stack = [(cid, start)]
+    
+    while stack:
+        cid, a = stack.pop()
+        u = lists["ch_u"][cid]
+        v = lists["ch_v"][cid]
+        if lists["ch_orig"][cid] >= 0:
+            edges.append(lists["ch_orig"][cid])
+            nodes.append(v if a == u else u)
+            continue
+        
+        # Shortcut u-x via m: child1 covers u-m and child2 covers m-x
+        via = lists["ch_via"][cid]
+        if a == u:
+            first, second = lists["ch_child1"][cid], lists["ch_child2"][cid]
+        else:
+            first, second = lists["ch_child2"][cid], lists["ch_child1"][cid]
+        stack.append((second, via))
+        stack.append((first, a))
+    
+    return edges, nodes
+
+def ch_shortest_path(hierarchy, source, target):
+    """
+    Answers a point-to-point query with bidirectional search on the upward graph.
+    
+    Args:
+        hierarchy: Contraction hierarchy (see build_contraction_hierarchy)
+        source: Source node index
+        target: Target node index
+    
+    Returns:
+        distance: Shortest path cost (inf if unreachable)
+        path_nodes: List of node indices along the unpacked path (None if unreachable)
+        path_edge_ids: List of road edge indices along the path
+    """
+    if source == target:
+        return 0.0, [source], []
+    
+    lists = _query_lists(hierarchy)
+    up_indptr = lists["up_indptr"]
+    up_heads = lists["up_heads"]
+    up_edges = lists["up_edges"]
+    ch_weight = lists["ch_weight"]
+    
+    dist = [{source: 0.0}, {target: 0.0}]
+    parent = [{source: (-1, -1)}, {target: (-1, -1)}]
+    heaps = [[(0.0, source)], [(0.0, target)]]
+    best = math.inf
+    meet = -1
+    
+    while heaps[0] or heaps[1]:
+        for side in (0, 1):
+            heap = heaps[side]
+            if not heap:
+                continue
+            d, u = heapq.heappop(heap)
+            if d > dist[side][u]:
+                continue
+            if d >= best:
+                # Nothing cheaper can come from this direction
+                heap.clear()
+                continue
+            
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best = d + other
+                meet = u
+            
+            for arc in range(up_indptr[u], up_indptr[u + 1]):
+                v = up_heads[arc]
+                cid = up_edges[arc]
+                nd = d + ch_weight[cid]
+                if nd < dist[side].get(v, math.inf):
+                    dist[side][v] = nd
+                    parent[side][v] = (u, cid)
+                    heapq.heappush(heap, (nd, v))
+    
+    if meet == -1:
+        return math.inf, None, []
+    
+    # Hierarchy edges from the source up to the meeting node, then down to the target
+    forward = []
+    node = meet
+    while parent[0][node][0] != -1:
+        prev, cid = parent[0][node]
+        forward.append((cid, prev))
+        node = prev
+    forward.reverse()
+    
+    node = meet
+    while parent[1][node][0] != -1:
+        prev, cid = parent[1][node]
+        forward.append((cid, node))
+        node = prev
+    
+    path_nodes = [source]
+    path_edge_ids = []
+    for cid, start in forward:
+        edges, nodes = _unpack_edge(lists, cid, start)
+        path_edge_ids.extend(edges)
+        path_nodes.extend(nodes)
+    
+    return best, path_nodes, path_edge_ids
+
+def save_contraction_hierarchy(hierarchy, path):
+    """
+    Persists a hierarchy to an .npz file.
+    
+    Args:
+        hierarchy: Contraction hierarchy
+        path: Destination file path
+    """
+    arrays = {name: value for name, value in hierarchy.items()
+              if isinstance(value, np.ndarray)}
+    np.savez(path,
+             network_version=np.array(hierarchy['network_version']),
+             weights_hash=np.array(hierarchy['weights_hash']),
+             **arrays)
+
+def load_contraction_hierarchy(path, network=None, edge_weights=None):
+    """
+    Loads a hierarchy saved with save_contraction_hierarchy.
+    
+    Args:
+        path: File path of the stored hierarchy
+        network: Optional network the hierarchy must have been built from
+        edge_weights: Optional weight array the hierarchy must have been built for
+    
+    Returns:
+        hierarchy: The loaded hierarchy, or None if missing or stale
+    """
+    if not os.path.exists(path):
+        return None
+    
+    with np.load(path) as stored:
+        hierarchy = {name: stored[name] for name in stored.files}
+    hierarchy['network_version'] = str(hierarchy['network_version'])
+    hierarchy['weights_hash'] = str(hierarchy['weights_hash'])
+    
+    if network is not None and hierarchy['network_version'] != network['version']:
+        return None
+    if edge_weights is not None and hierarchy['weights_hash'] != weights_fingerprint(edge_weights):
+        return None
+    
+    return hierarchy
+
+def get_period_hierarchies(network, traffic_flows, directory=None, build_missing=True):
+    """
+    Loads (and optionally builds) one hierarchy per time period.
+    
+    Without a directory the hierarchies are built in memory, once per traffic
+    snapshot, and cached on the network next to the compiled period weights.
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+        directory: Directory holding the stored hierarchies (None keeps them in memory)
+        build_missing: Build and save hierarchies that are missing or stale
+    
+    Returns:
+        hierarchies: Dictionary mapping time period to hierarchy
+    """
+    from src.algorithms.shortestpath import TIME_PERIODS, get_period_weights
+    
+    table = get_period_weights(network, traffic_flows)
+    
+    if directory is None:
+        cached = network.get('_hierarchies')
+        if cached is not None and cached[0] is table:
+            return cached[1]
+        if not build_missing:
+            return {}
+        hierarchies = {period: build_contraction_hierarchy(network, table["weights"][period]) for period in TIME_PERIODS}
+        network['_hierarchies'] = (table, hierarchies)
+        return hierarchies
+    
+    hierarchies = {}
+    
+    for period in TIME_PERIODS:
+        weights = table["weights"][period]
+        path = os.path.join(directory, f"ch_{period}.npz")
+        hierarchy = load_contraction_hierarchy(path, network, weights)
+        
+        if hierarchy is None and build_missing:
+            hierarchy = build_contraction_hierarchy(network, weights)
+            os.makedirs(directory, exist_ok=True)
+            save_contraction_hierarchy(hierarchy, path)
+        
+        if hierarchy is not None:
+            hierarchies[period] = hierarchy
+    
+    return hierarchies
+
+if __name__ == "__main__":
+    # Offline build: python -m src.algorithms.ch [output directory]
+    from src.data.loader import load_data
+    from src.data.network import get_road_network
+    
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "ch")
+    data = load_data()
+    built = get_period_hierarchies(get_road_network(data), data['traffic_flows'], output_dir)
+    for period, hierarchy in built.items():
+        print(f"{period}: {len(hierarchy['ch_u'])} hierarchy edges")
@@ -0,0 +1,182 @@
+import math
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+from src.algorithms.shortestpath import get_period_weights, describe_route
+
+def sparse_weight_graph(network, edge_weights):
+    """
+    Exports the road network with per-edge weights as a scipy.sparse CSR matrix.
+    
+    Every road becomes two arcs; where several roads join the same pair of nodes
+    only the cheapest is kept, since a sparse matrix holds one entry per pair.
+    Zero weights are stored as explicit entries, which csgraph treats as roads;
+    roads with infinite weight are left out.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        edge_weights: NumPy array with one non-negative weight per edge
+    
+    Returns:
+        graph: Dictionary with the sparse 'matrix' and the edge index behind
+               each stored entry ('entry_edge')
+    """
+    num_nodes = network['num_nodes']
+    arc_edge = network['arc_edge']
+    rows = np.repeat(np.arange(num_nodes), np.diff(network['indptr']))
+    cols = network['indices']
+    weights = edge_weights[arc_edge]
+    
+    # Sort by (row, column, weight) and keep the first, cheapest arc of each pair
+    finite = np.flatnonzero(np.isfinite(weights))
+    order = finite[np.lexsort((weights[finite], cols[finite], rows[finite]))]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (rows[order][1:] != rows[order][:-1]) | (cols[order][1:] != cols[order][:-1])
+    order = order[first]
+    
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows[order], minlength=num_nodes), out=indptr[1:])
+    
+    return {
+        "matrix": csr_matrix((weights[order], cols[order], indptr), shape=(num_nodes, num_nodes)),
+        "entry_edge": arc_edge[order]
+    }
+
+def get_sparse_graph(network, traffic_flows, time_period):
+    """
+    Returns the sparse graph for a time period, exporting it on first use.
+    
+    Graphs are stored on the network next to the compiled period weights and are
+    rebuilt whenever those are recompiled for a new traffic snapshot.
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
+    
+    Returns:
+        graph: Sparse graph (see sparse_weight_graph)
+    """
+    table = get_period_weights(network, traffic_flows)
+    
+    cached = network.get('_sparse_graphs')
+    if cached is None or cached[0] is not table:
+        cached = (table, {})
+        network['_sparse_graphs'] = cached
+    
+    if time_period not in cached[1]:
+        cached[1][time_period] = sparse_weight_graph(network, table["weights"][time_period])
+    return cached[1][time_period]
+
+def sparse_shortest_paths(graph, sources, limit=np.inf):
+    """
+    Runs csgraph's compiled Dijkstra from many sources in one call.
+    
+    Args:
+        graph: Sparse graph (see sparse_weight_graph)
+        sources: List of source node indices
+        limit: Largest distance of interest; farther nodes are reported as inf
+    
+    Returns:
+        dist: NumPy array of distances, one row per source (inf if unreachable)
+        predecessors: NumPy array of predecessor node indices, one row per source
+                      (-9999 for sources and unreached nodes, as in scipy)
+    """
+    return csgraph_dijkstra(graph["matrix"], directed=True, indices=sources,
+                            return_predecessors=True, limit=limit)
+
+def sparse_path(graph, predecessors, target):
+    """
+    Walks one row of csgraph predecessors back from a target node.
+    
+    Args:
+        graph: Sparse graph the predecessors were computed on
+        predecessors: Predecessor row of one source
+        target: Target node index
+    
+    Returns:
+        nodes: List of node indices from source to target
+        edges: List of edge indices along the path
+    """
+    matrix = graph["matrix"]
+    nodes = [target]
+    edges = []
+    while predecessors[nodes[-1]] >= 0:
+        u, v = int(predecessors[nodes[-1]]), nodes[-1]
+        
+        # Column indices are sorted within each row, so the entry is found by bisection
+        start, end = matrix.indptr[u], matrix.indptr[u + 1]
+        entry = start + np.searchsorted(matrix.indices[start:end], v)
+        edges.append(int(graph["entry_edge"][entry]))
+        nodes.append(u)
+    nodes.reverse()
+    edges.reverse()
+    return nodes, edges
+
+def sparse_distance_matrix(network, traffic_flows, time_period, origins=None, destinations=None):
+    """
+    Computes an origin x destination travel time matrix with csgraph.
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
+        origins: List of origin node IDs (defaults to every node)
+        destinations: List of destination node IDs (defaults to every node)
+    
+    Returns:
+        matrix: NumPy array of travel times in minutes (inf where unreachable)
+    """
+    node_index = network['node_index']
+    sources = [node_index[o] for o in (network['node_ids'] if origins is None else origins)]
+    targets = [node_index[d] for d in (network['node_ids'] if destinations is None else destinations)]
+    if not sources:
+        return np.zeros((0, len(targets)))
+    
+    dist = csgraph_dijkstra(get_sparse_graph(network, traffic_flows, time_period)["matrix"],
+                            directed=True, indices=sources)
+    return dist.reshape(len(sources), -1)[:, targets]
+
+def run_sparse_routes(network, origins, destinations, time_period, traffic_flows):
+    """
+    Finds shortest routes between every origin and destination with one csgraph call.
+    
+    The routes carry the same path, travel time and per-road details as
+    run_dijkstra, without its departure-time comparison.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        origins: List of origin node IDs
+        destinations: List of destination node IDs
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
+        traffic_flows: Dictionary containing traffic flow data
+    
+    Returns:
+        routes: Dictionary of (origin ID, destination ID) -> (path, travel_time,
+                path_edges), with (None, inf, []) where no path exists
+    """
+    node_index = network['node_index']
+    table = get_period_weights(network, traffic_flows)
+    graph = get_sparse_graph(network, traffic_flows, time_period)
+    
+    known = [o for o in dict.fromkeys(origins) if o in node_index]
+    routes = {(o, d): (None, float('inf'), []) for o in origins for d in destinations}
+    if not known:
+        return routes
+    
+    dist, predecessors = sparse_shortest_paths(graph, [node_index[o] for o in known])
+    dist = dist.reshape(len(known), -1)
+    predecessors = predecessors.reshape(len(known), -1)
+    
+    for row, origin in enumerate(known):
+        for destination in destinations:
+            target = node_index.get(destination)
+            if target is None or dist[row, target] == math.inf:
+                continue
+            
+            path_nodes, path_edge_ids = sparse_path(graph, predecessors[row], target)
+            path, path_edges, _, _, _ = describe_route(network, table, time_period, path_nodes, path_edge_ids)
+            routes[(origin, destination)] = (path, float(dist[row, target]), path_edges)
+    
+    return routes
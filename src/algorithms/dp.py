@@ -1,3 +1,9 @@
+import heapq
+import math
+
+# Above this many buses to move, start from the continuous optimum instead of one bus at a time
+BULK_ALLOCATION_MIN = 64
+
 def run_transit_optimization(total_buses, max_waiting_time, optimize_transfers):
     """
     Implements a dynamic programming solution for public transit optimization.
@@ -6,7 +12,7 @@ def run_transit_optimization(total_buses, max_waiting_time, optimize_transfers):
         total_buses: Total number of buses available
         max_waiting_time: Maximum acceptable waiting time in minutes
         optimize_transfers: Whether to optimize metro-bus transfers
-        
+    
     Returns:
         optimized_schedule: Dictionary with optimized bus allocations
         results: Dictionary with additional information
@@ -156,123 +162,17 @@ def run_transit_optimization(total_buses, max_waiting_time, optimize_transfers):
     # Dynamic Programming approach to allocate buses
     # We want to minimize waiting time based on passenger demand
     
-    # First, calculate the "value" of adding a bus to each route
-    # Value is the reduction in passenger waiting time (in passenger-minutes)
-    route_values = []
-    
-    for route in bus_routes:
-        # Calculate current waiting time in passenger-minutes
-        current_peak_wait = route["current_headway_peak"] / 2 * route["peak_hourly_demand"] * peak_hours
-        current_offpeak_wait = route["current_headway_offpeak"] / 2 * route["offpeak_hourly_demand"] * offpeak_hours
-        current_total_wait = current_peak_wait + current_offpeak_wait
-        
-        # Calculate waiting time if one bus is added
-        new_peak_wait = (operational_minutes / 6) / (route["current_buses"] + 1) / 2 * route["peak_hourly_demand"] * peak_hours
-        new_offpeak_wait = (operational_minutes / 12) / (route["current_buses"] + 1) / 2 * route["offpeak_hourly_demand"] * offpeak_hours
-        new_total_wait = new_peak_wait + new_offpeak_wait
-        
-        # Value is the reduction in waiting time
-        value = current_total_wait - new_total_wait
-        
-        route_values.append({
-            "route_id": route["id"],
-            "value": value,
-            "current_buses": route["current_buses"],
-            "daily_passengers": route["daily_passengers"]
-        })
-    
-    # Sort routes by value (highest first)
-    route_values.sort(key=lambda x: x["value"], reverse=True)
-    
-    # Initialize allocation with current buses
-    allocation = {route["id"]: route["current_buses"] for route in bus_routes}
-    
-    # Allocate additional buses greedily by value until total_buses is reached
-    current_total = sum(allocation.values())
-    extra_buses = total_buses - current_total
+    # Waiting time on a route is K / buses passenger-minutes, so each route's
+    # allocation only depends on its weight K
+    wait_weights = [
+        (operational_minutes / 6) / 2 * route["peak_hourly_demand"] * peak_hours +
+        (operational_minutes / 12) / 2 * route["offpeak_hourly_demand"] * offpeak_hours
+        for route in bus_routes
+    ]
     
-    # If we have extra buses to allocate
-    if extra_buses > 0:
-        # Keep allocating buses until we run out
-        while extra_buses > 0:
-            # Recalculate values after each allocation
-            route_values = []
-            
-            for route in bus_routes:
-                # Calculate current waiting time with current allocation
-                current_buses = allocation[route["id"]]
-                current_peak_wait = (operational_minutes / 6) / current_buses / 2 * route["peak_hourly_demand"] * peak_hours
-                current_offpeak_wait = (operational_minutes / 12) / current_buses / 2 * route["offpeak_hourly_demand"] * offpeak_hours
-                current_total_wait = current_peak_wait + current_offpeak_wait
-                
-                # Calculate waiting time if one bus is added
-                new_peak_wait = (operational_minutes / 6) / (current_buses + 1) / 2 * route["peak_hourly_demand"] * peak_hours
-                new_offpeak_wait = (operational_minutes / 12) / (current_buses + 1) / 2 * route["offpeak_hourly_demand"] * offpeak_hours
-                new_total_wait = new_peak_wait + new_offpeak_wait
-                
-                # Value is the reduction in waiting time
-                value = current_total_wait - new_total_wait
-                
-                route_values.append({
-                    "route_id": route["id"],
-                    "value": value,
-                    "current_buses": current_buses,
-                    "daily_passengers": route["daily_passengers"]
-                })
-            
-            # Sort routes by value (highest first)
-            route_values.sort(key=lambda x: x["value"], reverse=True)
-            
-            # Allocate a bus to the route with highest value
-            allocation[route_values[0]["route_id"]] += 1
-            extra_buses -= 1
-    
-    # If we need to reduce buses
-    elif extra_buses < 0:
-        # Keep removing buses until we meet the target
-        while extra_buses < 0:
-            # Recalculate values for removing a bus
-            route_values = []
-            
-            for route in bus_routes:
-                # Only consider routes with more than 1 bus
-                current_buses = allocation[route["id"]]
-                if current_buses <= 1:
-                    # Can't remove the last bus
-                    route_values.append({
-                        "route_id": route["id"],
-                        "value": float('inf'),  # Infinite cost to remove the last bus
-                        "current_buses": current_buses,
-                        "daily_passengers": route["daily_passengers"]
-                    })
-                    continue
-                
-                # Calculate current waiting time with current allocation
-                current_peak_wait = (operational_minutes / 6) / current_buses / 2 * route["peak_hourly_demand"] * peak_hours
-                current_offpeak_wait = (operational_minutes / 12) / current_buses / 2 * route["offpeak_hourly_demand"] * offpeak_hours
-                current_total_wait = current_peak_wait + current_offpeak_wait
-                
-                # Calculate waiting time if one bus is removed
-                new_peak_wait = (operational_minutes / 6) / (current_buses - 1) / 2 * route["peak_hourly_demand"] * peak_hours
-                new_offpeak_wait = (operational_minutes / 12) / (current_buses - 1) / 2 * route["offpeak_hourly_demand"] * offpeak_hours
-                new_total_wait = new_peak_wait + new_offpeak_wait
-                
-                # Cost is the increase in waiting time
-                cost = new_total_wait - current_total_wait
-                
-                route_values.append({
-                    "route_id": route["id"],
-                    "value": cost,  # This is actually the cost of removing
-                    "current_buses": current_buses,
-                    "daily_passengers": route["daily_passengers"]
-                })
-            
-            # Sort routes by value (lowest first - we want to remove from routes with lowest cost)
-            route_values.sort(key=lambda x: x["value"])
-            
-            # Remove a bus from the route with lowest cost
-            allocation[route_values[0]["route_id"]] -= 1
-            extra_buses += 1
+    # Start from the current buses and add or remove buses by marginal value
+    buses = allocate_buses(wait_weights, [route["current_buses"] for route in bus_routes], total_buses)
+    allocation = {route["id"]: count for route, count in zip(bus_routes, buses)}
     
     # Calculate waiting times with new allocation
     waiting_times = []
@@ -404,3 +304,134 @@ def run_transit_optimization(total_buses, max_waiting_time, optimize_transfers):
     }
     
     return optimized_schedule, results
+
+def allocate_buses(wait_weights, current_buses, total_buses, bulk=None):
+    """
+    Allocates a fleet across routes to minimize total waiting time sum(K / buses).
+    
+    Adds buses to the routes with the largest waiting-time reduction K / (b (b + 1))
+    until the fleet is used, or removes them from the routes with the smallest
+    increase K / (b (b - 1)), never dropping a route below one bus. Only the
+    changed route's marginal value is recomputed, using a heap.
+    
+    Because the marginal values shrink as buses are added, large moves can start
+    from the continuous optimum b proportional to sqrt(K) (clipped to the current
+    allocation) and let the heap correct the rounding.
+    
+    Args:
+        wait_weights: List with each route's waiting-time weight K (passenger-minutes x buses)
+        current_buses: List with each route's current number of buses
+        total_buses: Total number of buses available
+        bulk: Whether to start from the continuous optimum (None decides by fleet change)
+    
+    Returns:
+        buses: List with the number of buses allocated to each route
+    """
+    buses = list(current_buses)
+    extra_buses = total_buses - sum(buses)
+    if extra_buses == 0 or not buses:
+        return buses
+    
+    if bulk is None:
+        bulk = abs(extra_buses) >= BULK_ALLOCATION_MIN
+    
+    if extra_buses > 0:
+        if bulk:
+            # Round the continuous optimum down (one extra bus of slack) so the
+            # heap only ever needs to add buses
+            target = _continuous_allocation(wait_weights, buses, [math.inf] * len(buses), total_buses)
+            buses = [max(b, math.floor(t) - 1) for b, t in zip(buses, target)]
+            extra_buses = total_buses - sum(buses)
+        
+        _add_buses(wait_weights, buses, extra_buses)
+    else:
+        if bulk:
+            # Round the continuous optimum up (one extra bus of slack) so the
+            # heap only ever needs to remove buses
+            target = _continuous_allocation(wait_weights, [1] * len(buses), buses, total_buses)
+            buses = [min(b, max(1, math.ceil(t) + 1)) for b, t in zip(buses, target)]
+            extra_buses = total_buses - sum(buses)
+            
+            if extra_buses > 0:
+                # The rounding overshot, e.g. when routes with zero waiting weight are
+                # pinned at one bus and the others cannot absorb the rest: hand buses
+                # back where they save the most, up to each route's current count
+                _add_buses(wait_weights, buses, extra_buses, current_buses)
+                return buses
+        
+        # Min-heap of the waiting time added by one less bus; the last bus is never removed
+        heap = [(_waiting_change(k, b - 1, b), i) for i, (k, b) in enumerate(zip(wait_weights, buses)) if b > 1]
+        heapq.heapify(heap)
+        while extra_buses < 0 and heap:
+            _, i = heap[0]
+            buses[i] -= 1
+            if buses[i] > 1:
+                heapq.heapreplace(heap, (_waiting_change(wait_weights[i], buses[i] - 1, buses[i]), i))
+            else:
+                heapq.heappop(heap)
+            extra_buses += 1
+    
+    return buses
+
+def _add_buses(wait_weights, buses, count, upper=None):
+    """
+    Adds buses one at a time where each saves the most waiting time (in place).
+    
+    Args:
+        wait_weights: List with each route's waiting-time weight K
+        buses: List with each route's number of buses, updated in place
+        count: Number of buses to add
+        upper: Optional list with the most buses each route may get
+    """
+    # Max-heap of the waiting time saved by one more bus
+    heap = [(-_waiting_change(k, b, b + 1), i) for i, (k, b) in enumerate(zip(wait_weights, buses))
+            if upper is None or b < upper[i]]
+    heapq.heapify(heap)
+    while count > 0 and heap:
+        _, i = heap[0]
+        buses[i] += 1
+        if upper is None or buses[i] < upper[i]:
+            heapq.heapreplace(heap, (-_waiting_change(wait_weights[i], buses[i], buses[i] + 1), i))
+        else:
+            heapq.heappop(heap)
+        count -= 1
+
+def _waiting_change(weight, fewer, more):
+    """Waiting time saved on a route by going from fewer to more buses"""
+    return weight / fewer - weight / more
+
+def _continuous_allocation(wait_weights, lower, upper, total_buses):
+    """
+    Solves min sum(K / b) subject to sum(b) = total_buses and lower <= b <= upper.
+    
+    The unconstrained optimum is b = lam * sqrt(K). Each clipped route is piecewise
+    linear in lam with breakpoints at lower / sqrt(K) and upper / sqrt(K), so lam is
+    found exactly by sweeping the sorted breakpoints.
+    
+    Returns:
+        target: List of fractional bus counts per route
+    """
+    roots = [math.sqrt(k) for k in wait_weights]
+    
+    # Slope changes of the total allocation as lam grows
+    breakpoints = []
+    for r, l, u in zip(roots, lower, upper):
+        if r > 0:
+            breakpoints.append((l / r, r))
+            if u < math.inf:
+                breakpoints.append((u / r, -r))
+    breakpoints.sort()
+    
+    lam = 0.0
+    allocated = sum(lower)
+    slope = 0.0
+    for point, change in breakpoints:
+        reach = allocated + slope * (point - lam)
+        if reach >= total_buses:
+            break
+        allocated, lam = reach, point
+        slope += change
+    if slope > 0:
+        lam += (total_buses - allocated) / slope
+    
+    return [min(u, max(l, lam * r)) for r, l, u in zip(roots, lower, upper)]
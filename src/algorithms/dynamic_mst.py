@@ -0,0 +1,518 @@
+from collections import deque
+
+from src.algorithms.mst import prepare_mst_edges, summarize_mst, _union
+
+# Key given to road-network nodes in the link-cut forest, below every road key
+_NODE_KEY = (float('-inf'), -1)
+
+def build_mst_state(network, neighborhoods, facilities, existing_roads, potential_roads,
+                    prioritize_hospitals=True, prioritize_high_population=True):
+    """
+    Builds an incremental minimum spanning tree that can absorb road edits.
+    
+    The tree is kept in a link-cut forest where every road is its own forest node
+    carrying its (weight, id) key, so the heaviest road on the tree path between two
+    nodes is found in O(log V) amortized. Roads outside the tree are indexed by
+    endpoint, so a replacement for a removed tree road is found among the roads
+    touching the smaller side of the cut.
+    
+    Args:
+        network: Shared CSR road network (see src.data.network)
+        neighborhoods: List of neighborhood data
+        facilities: List of facility data
+        existing_roads: List of existing road data
+        potential_roads: List of potential new road data
+        prioritize_hospitals: Whether to prioritize connections to hospitals
+        prioritize_high_population: Whether to prioritize connections between high-population areas
+    
+    Returns:
+        state: Dictionary holding the forest, road table and current tree
+    """
+    num_nodes = network['num_nodes']
+    state = {
+        "network": network,
+        "neighborhoods": neighborhoods,
+        "facilities": facilities,
+        "prioritize_hospitals": prioritize_hospitals,
+        "prioritize_high_population": prioritize_high_population,
+        "roads": [],          # road id -> (from, to, data), None once removed
+        "road_data": [],      # road id -> original road dictionary
+        "road_lookup": {},    # (from, to, road_type) -> road id
+        "in_tree": [],
+        "non_tree_adjacency": [set() for _ in range(num_nodes)],  # node -> ids of roads outside the tree
+        "tree_adjacency": [set() for _ in range(num_nodes)],
+        "forest": _new_forest(num_nodes)
+    }
+    
+    for road in existing_roads:
+        _add_road_slot(state, road, 'existing')
+    for road in potential_roads:
+        _add_road_slot(state, road, 'potential')
+    
+    _rebuild_tree(state)
+    return state
+
+def insert_road(state, road, road_type='potential'):
+    """
+    Adds a road and updates the tree in O(log V) amortized.
+    
+    Args:
+        state: Incremental MST state (see build_mst_state)
+        road: Road data (from, to, distance, capacity and condition or cost)
+        road_type: 'existing' or 'potential'
+    
+    Returns:
+        bool: True if the road entered the spanning tree
+    """
+    key = (road['from'], road['to'], road_type)
+    if key in state['road_lookup']:
+        raise ValueError(f"Road {road['from']}-{road['to']} ({road_type}) is already part of the network")
+    
+    road_id = _add_road_slot(state, road, road_type)
+    return _place_road(state, road_id)
+
+def remove_road(state, from_id, to_id, road_type='potential'):
+    """
+    Removes a road, reconnecting the tree through the lightest replacement road.
+    
+    Removing a road outside the tree is O(1). Removing a tree road cuts the
+    forest in O(log V) amortized, then labels the smaller side S of the cut and
+    takes the lightest non-tree road leaving it: O(|S| + d(S)), where d(S) is
+    the number of non-tree roads touching S. |S| is at most V / 2, so a cut
+    through the middle of a dense network still costs O(V + E).
+    
+    Args:
+        state: Incremental MST state
+        from_id: ID of the road's first endpoint
+        to_id: ID of the road's second endpoint
+        road_type: 'existing' or 'potential'
+    
+    Returns:
+        bool: True if the removed road was part of the spanning tree
+    """
+    road_id = _lookup_road(state, from_id, to_id, road_type)
+    was_tree = _detach_road(state, road_id)
+    
+    road = state['road_data'][road_id]
+    del state['road_lookup'][(road['from'], road['to'], road_type)]
+    state['roads'][road_id] = None
+    return was_tree
+
+def update_road(state, from_id, to_id, road_type='existing', **changes):
+    """
+    Re-rates a road (e.g. a new condition or cost) and repairs the tree.
+    
+    A tree road that gets cheaper or a non-tree road that gets dearer only moves
+    its key; every other change is a detach followed by a re-insert under the
+    same road id, so ties keep resolving in the original road order.
+    
+    Args:
+        state: Incremental MST state
+        from_id: ID of the road's first endpoint
+        to_id: ID of the road's second endpoint
+        road_type: 'existing' or 'potential'
+        **changes: Road fields to overwrite (distance, capacity, condition, cost)
+    
+    Returns:
+        bool: True if the road is part of the spanning tree after the update
+    """
+    road_id = _lookup_road(state, from_id, to_id, road_type)
+    road = dict(state['road_data'][road_id], **changes)
+    state['road_data'][road_id] = road
+    
+    u, v, old_data = state['roads'][road_id]
+    _, _, data = prepare_mst_edges(state['network'], [road], road_type,
+                                   state['prioritize_hospitals'], state['prioritize_high_population'])[0]
+    old_key = (old_data['weight'], road_id)
+    new_key = (data['weight'], road_id)
+    
+    if state['in_tree'][road_id] and new_key <= old_key:
+        # Still the lightest way across every cut it spans
+        state['roads'][road_id] = (u, v, data)
+        _set_key(state['forest'], state['network']['num_nodes'] + road_id, new_key)
+        return True
+    
+    if not state['in_tree'][road_id] and new_key >= old_key:
+        # Still heavier than the tree path it closes
+        state['roads'][road_id] = (u, v, data)
+        return False
+    
+    _detach_road(state, road_id)
+    state['roads'][road_id] = (u, v, data)
+    return _place_road(state, road_id)
+
+def set_mst_priorities(state, prioritize_hospitals=True, prioritize_high_population=True):
+    """
+    Changes the prioritization flags, which re-weights every road and rebuilds the tree.
+    
+    Args:
+        state: Incremental MST state
+        prioritize_hospitals: Whether to prioritize connections to hospitals
+        prioritize_high_population: Whether to prioritize connections between high-population areas
+    """
+    if (prioritize_hospitals == state['prioritize_hospitals']
+            and prioritize_high_population == state['prioritize_high_population']):
+        return
+    
+    state['prioritize_hospitals'] = prioritize_hospitals
+    state['prioritize_high_population'] = prioritize_high_population
+    
+    for road_type in ('existing', 'potential'):
+        road_ids = [i for i, edge in enumerate(state['roads'])
+                    if edge is not None and edge[2]['road_type'] == road_type]
+        edges = prepare_mst_edges(state['network'], [state['road_data'][i] for i in road_ids], road_type,
+                                  prioritize_hospitals, prioritize_high_population)
+        for road_id, edge in zip(road_ids, edges):
+            state['roads'][road_id] = edge
+    
+    num_nodes = state['network']['num_nodes']
+    state['forest'] = _new_forest(num_nodes)
+    state['tree_adjacency'] = [set() for _ in range(num_nodes)]
+    state['non_tree_adjacency'] = [set() for _ in range(num_nodes)]
+    for road_id in range(len(state['roads'])):
+        _grow_forest(state['forest'])
+    _rebuild_tree(state)
+
+def mst_snapshot(state):
+    """
+    Returns the current tree in the same form as run_mst_algorithm.
+    
+    Args:
+        state: Incremental MST state
+    
+    Returns:
+        mst_graph: The MST as a NetworkX graph
+        total_cost: The total cost of the MST solution
+        results: Dictionary with additional information
+    """
+    roads = state['roads']
+    tree_ids = [i for i, in_tree in enumerate(state['in_tree']) if in_tree]
+    
+    # Kruskal's selection order: ascending (weight, id)
+    tree_ids.sort(key=lambda i: (roads[i][2]['weight'], i))
+    return summarize_mst(state['network'], state['neighborhoods'], state['facilities'],
+                         [roads[i] for i in tree_ids])
+
+def _add_road_slot(state, road, road_type):
+    """Register a road (not yet placed) and return its id"""
+    road_id = len(state['roads'])
+    state['roads'].append(prepare_mst_edges(state['network'], [road], road_type,
+                                            state['prioritize_hospitals'], state['prioritize_high_population'])[0])
+    state['road_data'].append(road)
+    state['road_lookup'][(road['from'], road['to'], road_type)] = road_id
+    state['in_tree'].append(False)
+    _grow_forest(state['forest'])
+    return road_id
+
+def _lookup_road(state, from_id, to_id, road_type):
+    """Find the id of a live road given either endpoint order"""
+    lookup = state['road_lookup']
+    road_id = lookup.get((from_id, to_id, road_type), lookup.get((to_id, from_id, road_type)))
+    if road_id is None:
+        raise KeyError(f"No {road_type} road between {from_id} and {to_id}")
+    return road_id
+
+def _rebuild_tree(state):
+    """Run Kruskal's algorithm over every live road and load the result into the forest"""
+    network = state['network']
+    node_index = network['node_index']
+    roads = state['roads']
+    
+    road_ids = [i for i, edge in enumerate(roads) if edge is not None]
+    road_ids.sort(key=lambda i: (roads[i][2]['weight'], i))
+    
+    parent = list(range(network['num_nodes']))
+    rank = [0] * network['num_nodes']
+    
+    for road_id in road_ids:
+        u, v, _ = roads[road_id]
+        if _union(parent, rank, node_index[u], node_index[v]):
+            _attach_tree_road(state, road_id)
+        else:
+            _add_non_tree(state, road_id)
+
+def _place_road(state, road_id):
+    """Insert a road that is not in the tree, swapping out the heaviest road on its cycle"""
+    network = state['network']
+    forest = state['forest']
+    u, v, data = state['roads'][road_id]
+    a = network['node_index'][u]
+    b = network['node_index'][v]
+    key = (data['weight'], road_id)
+    
+    if a == b:
+        # A loop road never joins anything
+        pass
+    elif _find_root(forest, a) != _find_root(forest, b):
+        # Joins two trees
+        _attach_tree_road(state, road_id)
+        return True
+    else:
+        heaviest = _path_max(forest, a, b) - network['num_nodes']
+        heaviest_key = (state['roads'][heaviest][2]['weight'], heaviest)
+        if heaviest_key > key:
+            # The new road is cheaper than the heaviest road on the cycle it closes
+            _detach_tree_road(state, heaviest)
+            _add_non_tree(state, heaviest)
+            _attach_tree_road(state, road_id)
+            return True
+    
+    _add_non_tree(state, road_id)
+    return False
+
+def _detach_road(state, road_id):
+    """Take a road out of the tree or the non-tree index, reconnecting the tree if needed"""
+    if not state['in_tree'][road_id]:
+        _remove_non_tree(state, road_id)
+        return False
+    
+    _detach_tree_road(state, road_id)
+    replacement = _find_replacement(state, road_id)
+    if replacement is not None:
+        _remove_non_tree(state, replacement)
+        _attach_tree_road(state, replacement)
+    return True
+
+def _find_replacement(state, road_id):
+    """Find the lightest non-tree road reconnecting the two sides of a removed tree road"""
+    network = state['network']
+    node_index = network['node_index']
+    u, v, _ = state['roads'][road_id]
+    side = _smaller_side(state, node_index[u], node_index[v])
+    
+    # A non-tree road always lies inside one tree, so a road leaving this side
+    # crosses the cut
+    roads = state['roads']
+    non_tree_adjacency = state['non_tree_adjacency']
+    best = None
+    best_key = None
+    for node in side:
+        for candidate in non_tree_adjacency[node]:
+            a, b, data = roads[candidate]
+            if node_index[a] in side and node_index[b] in side:
+                continue
+            key = (data['weight'], candidate)
+            if best is None or key < best_key:
+                best, best_key = candidate, key
+    return best
+
+def _smaller_side(state, a, b):
+    """Label the smaller of the two trees containing a and b by growing both in lockstep"""
+    adjacency = state['tree_adjacency']
+    roads = state['roads']
+    node_index = state['network']['node_index']
+    
+    seen = ({a}, {b})
+    queues = (deque([a]), deque([b]))
+    while True:
+        for side in (0, 1):
+            if not queues[side]:
+                return seen[side]
+            node = queues[side].popleft()
+            for road_id in adjacency[node]:
+                u, v, _ = roads[road_id]
+                other = node_index[v] if node_index[u] == node else node_index[u]
+                if other not in seen[side]:
+                    seen[side].add(other)
+                    queues[side].append(other)
+
+def _add_non_tree(state, road_id):
+    """Index a road outside the tree under both of its endpoints"""
+    node_index = state['network']['node_index']
+    u, v, _ = state['roads'][road_id]
+    state['in_tree'][road_id] = False
+    state['non_tree_adjacency'][node_index[u]].add(road_id)
+    state['non_tree_adjacency'][node_index[v]].add(road_id)
+
+def _remove_non_tree(state, road_id):
+    """Drop a road from the non-tree index"""
+    node_index = state['network']['node_index']
+    u, v, _ = state['roads'][road_id]
+    state['non_tree_adjacency'][node_index[u]].discard(road_id)
+    state['non_tree_adjacency'][node_index[v]].discard(road_id)
+
+def _attach_tree_road(state, road_id):
+    """Link a road into the forest between its endpoints"""
+    network = state['network']
+    u, v, data = state['roads'][road_id]
+    a = network['node_index'][u]
+    b = network['node_index'][v]
+    slot = network['num_nodes'] + road_id
+    
+    forest = state['forest']
+    _set_key(forest, slot, (data['weight'], road_id))
+    _link(forest, a, slot)
+    _link(forest, slot, b)
+    
+    state['in_tree'][road_id] = True
+    state['tree_adjacency'][a].add(road_id)
+    state['tree_adjacency'][b].add(road_id)
+
+def _detach_tree_road(state, road_id):
+    """Cut a road out of the forest"""
+    network = state['network']
+    u, v, _ = state['roads'][road_id]
+    a = network['node_index'][u]
+    b = network['node_index'][v]
+    slot = network['num_nodes'] + road_id
+    
+    forest = state['forest']
+    _cut(forest, a, slot)
+    _cut(forest, slot, b)
+    
+    state['in_tree'][road_id] = False
+    state['tree_adjacency'][a].discard(road_id)
+    state['tree_adjacency'][b].discard(road_id)
+
+# Link-cut forest over parallel lists; -1 marks a missing child or parent
+
+def _new_forest(num_nodes):
+    """Create a forest with one isolated forest node per road-network node"""
+    return {
+        "left": [-1] * num_nodes,
+        "right": [-1] * num_nodes,
+        "parent": [-1] * num_nodes,
+        "flip": [False] * num_nodes,
+        "key": [_NODE_KEY] * num_nodes,
+        "max": list(range(num_nodes))
+    }
+
+def _grow_forest(forest):
+    """Append one isolated forest node (a road slot)"""
+    slot = len(forest['left'])
+    forest['left'].append(-1)
+    forest['right'].append(-1)
+    forest['parent'].append(-1)
+    forest['flip'].append(False)
+    forest['key'].append(_NODE_KEY)
+    forest['max'].append(slot)
+
+def _is_root(forest, x):
+    """True if x is the root of its splay tree"""
+    p = forest['parent'][x]
+    return p == -1 or (forest['left'][p] != x and forest['right'][p] != x)
+
+def _push(forest, x):
+    """Push a pending path reversal down to x's children"""
+    flip = forest['flip']
+    if flip[x]:
+        left, right = forest['left'], forest['right']
+        l, r = left[x], right[x]
+        left[x], right[x] = r, l
+        if l != -1:
+            flip[l] = not flip[l]
+        if r != -1:
+            flip[r] = not flip[r]
+        flip[x] = False
+
+def _pull(forest, x):
+    """Recompute the heaviest forest node in x's splay subtree"""
+    key, best = forest['key'], forest['max']
+    m = x
+    l, r = forest['left'][x], forest['right'][x]
+    if l != -1 and key[best[l]] > key[m]:
+        m = best[l]
+    if r != -1 and key[best[r]] > key[m]:
+        m = best[r]
+    best[x] = m
+
+def _rotate(forest, x):
+    """Rotate x above its parent"""
+    left, right, parent = forest['left'], forest['right'], forest['parent']
+    p = parent[x]
+    g = parent[p]
+    if not _is_root(forest, p):
+        if left[g] == p:
+            left[g] = x
+        else:
+            right[g] = x
+    parent[x] = g
+    
+    if left[p] == x:
+        left[p] = right[x]
+        if right[x] != -1:
+            parent[right[x]] = p
+        right[x] = p
+    else:
+        right[p] = left[x]
+        if left[x] != -1:
+            parent[left[x]] = p
+        left[x] = p
+    parent[p] = x
+    
+    _pull(forest, p)
+    _pull(forest, x)
+
+def _splay(forest, x):
+    """Move x to the root of its splay tree"""
+    left, parent = forest['left'], forest['parent']
+    
+    # Resolve pending reversals from the splay root down to x
+    stack = [x]
+    y = x
+    while not _is_root(forest, y):
+        y = parent[y]
+        stack.append(y)
+    for y in reversed(stack):
+        _push(forest, y)
+    
+    while not _is_root(forest, x):
+        p = parent[x]
+        if not _is_root(forest, p):
+            g = parent[p]
+            _rotate(forest, p if (left[g] == p) == (left[p] == x) else x)
+        _rotate(forest, x)
+
+def _access(forest, x):
+    """Make the root-to-x path preferred and splay x to its top"""
+    right, parent = forest['right'], forest['parent']
+    last = -1
+    y = x
+    while y != -1:
+        _splay(forest, y)
+        right[y] = last
+        _pull(forest, y)
+        last = y
+        y = parent[y]
+    _splay(forest, x)
+
+def _make_root(forest, x):
+    """Re-root x's tree at x"""
+    _access(forest, x)
+    forest['flip'][x] = not forest['flip'][x]
+
+def _find_root(forest, x):
+    """Return the root of x's tree"""
+    _access(forest, x)
+    left = forest['left']
+    _push(forest, x)
+    while left[x] != -1:
+        x = left[x]
+        _push(forest, x)
+    _splay(forest, x)
+    return x
+
+def _link(forest, x, y):
+    """Join the trees of x and y with a forest edge"""
+    _make_root(forest, x)
+    forest['parent'][x] = y
+
+def _cut(forest, x, y):
+    """Remove the forest edge between adjacent x and y"""
+    _make_root(forest, x)
+    _access(forest, y)
+    forest['left'][y] = -1
+    forest['parent'][x] = -1
+    _pull(forest, y)
+
+def _path_max(forest, x, y):
+    """Return the heaviest forest node on the tree path between x and y"""
+    _make_root(forest, x)
+    _access(forest, y)
+    return forest['max'][y]
+
+def _set_key(forest, x, key):
+    """Change the key of forest node x"""
+    _access(forest, x)
+    forest['key'][x] = key
+    _pull(forest, x)
@@ -0,0 +1,299 @@
+import heapq
+import math
+import numpy as np
+
+from src.data.network import get_adjacency
+from src.algorithms.bpr import bpr_travel_times, edge_flow_matrix
+from src.algorithms.shortestpath import dijkstra_search, emergency_edge_costs
+
+def build_spt_state(network, traffic_flows=None, time_period=None, sources=None, min_road_condition=6):
+    """
+    Builds shortest-path trees for frequently used origins that can absorb road updates.
+    
+    With a time period the trees use the same BPR travel times as run_dijkstra;
+    without one they use the emergency cost model of run_a_star. Road conditions
+    and flows are copied into the state, so updates never touch the shared network.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data (period model only)
+        time_period: Time period to consider, or None for the emergency cost model
+        sources: List of origin node IDs (defaults to every hospital and district)
+        min_road_condition: Minimum acceptable road condition (emergency model only)
+    
+    Returns:
+        state: Dictionary holding the cost model, current edge weights and one tree per origin
+    """
+    if sources is None:
+        sources = [
+            node_id for node_id, kind, node_type in
+            zip(network['node_ids'], network['node_kinds'], network['node_types'])
+            if kind == 'neighborhood' or node_type == 'Medical'
+        ]
+    
+    # Positions of each edge's two arcs in the CSR arrays
+    edge_arcs = np.argsort(network['arc_edge'], kind='stable').reshape(-1, 2)
+    
+    state = {
+        "network": network,
+        "time_period": time_period,
+        "min_road_condition": min_road_condition,
+        "condition": network['condition'].copy(),
+        "flow": None,
+        "has_flow": None,
+        "road_lookup": {road_id: e for e, road_id in enumerate(network['road_ids'])},
+        "edge_arcs": edge_arcs.tolist(),
+        "trees": {}
+    }
+    
+    if time_period is not None:
+        flow, has_flow = edge_flow_matrix(network, traffic_flows, [time_period])
+        state["flow"] = flow[:, 0]
+        state["has_flow"] = has_flow
+    
+    state["edge_weights"] = _model_weights(state, np.arange(network['num_edges']))
+    state["arc_weights"] = state["edge_weights"][network['arc_edge']].tolist()
+    
+    for source_id in sources:
+        source = network['node_index'][source_id]
+        dist, pred, pred_edge = dijkstra_search(network, state["arc_weights"], [source])
+        children = [set() for _ in range(network['num_nodes'])]
+        for node, parent in enumerate(pred):
+            if parent != -1:
+                children[parent].add(node)
+        state["trees"][source_id] = {
+            "source": source,
+            "dist": dist,
+            "pred": pred,
+            "pred_edge": pred_edge,
+            "children": children
+        }
+    
+    return state
+
+def update_road(state, from_id, to_id, condition=None, flow=None):
+    """
+    Applies a new condition and/or traffic flow to a road and repairs every tree.
+    
+    Args:
+        state: Shortest-path tree state (see build_spt_state)
+        from_id: ID of the road's first endpoint
+        to_id: ID of the road's second endpoint
+        condition: New road condition (1-10), or None to keep it
+        flow: New flow in vehicles per hour (period model only), or None to keep it
+    
+    Returns:
+        changed: Number of (origin, node) distances that changed
+    """
+    lookup = state['road_lookup']
+    edge = lookup.get(f"{from_id}-{to_id}", lookup.get(f"{to_id}-{from_id}"))
+    if edge is None:
+        raise KeyError(f"No road between {from_id} and {to_id}")
+    
+    if condition is not None:
+        state['condition'][edge] = condition
+    if flow is not None and state['flow'] is not None:
+        state['flow'][edge] = flow
+        state['has_flow'][edge] = True
+    
+    return set_edge_weight(state, edge, float(_model_weights(state, np.array([edge]))[0]))
+
+def set_edge_weight(state, edge, weight):
+    """
+    Sets one edge's weight and repairs every tree incrementally.
+    
+    A weight increase only affects the subtree hanging below the edge (if it is a
+    tree edge at all): that subtree is cut off, each of its nodes takes its best
+    entry from the rest of the tree, and a Dijkstra search restricted to the
+    subtree settles the final distances. A decrease propagates outward from the
+    edge and only touches nodes whose distance improves. Either way the work is
+    proportional to the affected part of the tree rather than the whole network.
+    
+    Args:
+        state: Shortest-path tree state
+        edge: Edge index
+        weight: New non-negative edge weight
+    
+    Returns:
+        changed: Number of (origin, node) distances that changed
+    """
+    old_weight = float(state['edge_weights'][edge])
+    if weight == old_weight:
+        return 0
+    
+    state['edge_weights'][edge] = weight
+    for arc in state['edge_arcs'][edge]:
+        state['arc_weights'][arc] = weight
+    
+    changed = 0
+    for tree in state['trees'].values():
+        if weight > old_weight:
+            changed += _raise_edge(state, tree, edge)
+        else:
+            changed += _lower_edge(state, tree, edge, weight)
+    return changed
+
+def spt_route(state, source_id, target_id):
+    """
+    Reads a route from a maintained tree.
+    
+    Args:
+        state: Shortest-path tree state
+        source_id: ID of a tree origin
+        target_id: ID of the destination node
+    
+    Returns:
+        cost: Route cost (travel time, or emergency cost; inf if unreachable)
+        path: List of node IDs (None if unreachable)
+        roads: List of "from-to" road IDs along the route
+    """
+    network = state['network']
+    tree = state['trees'][source_id]
+    target = network['node_index'][target_id]
+    if tree['dist'][target] == math.inf:
+        return math.inf, None, []
+    
+    nodes = [target]
+    edges = []
+    while tree['pred'][nodes[-1]] != -1:
+        edges.append(tree['pred_edge'][nodes[-1]])
+        nodes.append(tree['pred'][nodes[-1]])
+    
+    node_ids = network['node_ids']
+    road_ids = network['road_ids']
+    return tree['dist'][target], [node_ids[n] for n in reversed(nodes)], [road_ids[e] for e in reversed(edges)]
+
+def _model_weights(state, edges):
+    """Recompute the cost model's weight for the given edge indices"""
+    network = state['network']
+    distance = network['distance'][edges]
+    condition = state['condition'][edges]
+    
+    if state['time_period'] is None:
+        _, edge_cost = emergency_edge_costs({"distance": distance, "condition": condition}, state['min_road_condition'])
+        return edge_cost
+    
+    travel_time, _ = bpr_travel_times(
+        distance, network['capacity'][edges], condition, state['flow'][edges], state['has_flow'][edges]
+    )
+    return travel_time
+
+def _set_parent(tree, node, parent, edge):
+    """Re-hang a node below a new parent"""
+    old_parent = tree['pred'][node]
+    if old_parent != -1:
+        tree['children'][old_parent].discard(node)
+    if parent != -1:
+        tree['children'][parent].add(node)
+    tree['pred'][node] = parent
+    tree['pred_edge'][node] = edge
+
+def _raise_edge(state, tree, edge):
+    """Repair a tree after an edge got more expensive"""
+    network = state['network']
+    pred = tree['pred']
+    pred_edge = tree['pred_edge']
+    
+    # Only the subtree below a tree edge can get farther away
+    u = int(network['edge_from'][edge])
+    v = int(network['edge_to'][edge])
+    if pred_edge[v] == edge and pred[v] == u:
+        child = v
+    elif pred_edge[u] == edge and pred[u] == v:
+        child = u
+    else:
+        return 0
+    
+    indptr, indices, arc_edge = get_adjacency(network)
+    arc_weights = state['arc_weights']
+    dist = tree['dist']
+    children = tree['children']
+    
+    subtree = [child]
+    i = 0
+    while i < len(subtree):
+        subtree.extend(children[subtree[i]])
+        i += 1
+    in_subtree = set(subtree)
+    old_dist = {x: dist[x] for x in subtree}
+    
+    # Cut the subtree off; its nodes are re-hung as they are settled
+    for x in subtree:
+        _set_parent(tree, x, -1, -1)
+        dist[x] = math.inf
+    
+    # Best entry into each subtree node from the unaffected part of the tree
+    heap = []
+    for x in subtree:
+        for arc in range(indptr[x], indptr[x + 1]):
+            y = indices[arc]
+            if y not in in_subtree and dist[y] + arc_weights[arc] < dist[x]:
+                dist[x] = dist[y] + arc_weights[arc]
+                pred[x] = y
+                pred_edge[x] = arc_edge[arc]
+        if dist[x] < math.inf:
+            heap.append((dist[x], x))
+    heapq.heapify(heap)
+    
+    # Dijkstra restricted to the subtree
+    settled = set()
+    while heap:
+        d, x = heapq.heappop(heap)
+        if x in settled or d > dist[x]:
+            continue
+        settled.add(x)
+        children[pred[x]].add(x)
+        
+        for arc in range(indptr[x], indptr[x + 1]):
+            y = indices[arc]
+            if y in in_subtree and y not in settled:
+                nd = d + arc_weights[arc]
+                if nd < dist[y]:
+                    dist[y] = nd
+                    pred[y] = x
+                    pred_edge[y] = arc_edge[arc]
+                    heapq.heappush(heap, (nd, y))
+    
+    # Nodes that could not be reached again are cut off from the origin
+    for x in subtree:
+        if x not in settled:
+            pred[x] = -1
+            pred_edge[x] = -1
+    
+    return sum(1 for x in subtree if dist[x] != old_dist[x])
+
+def _lower_edge(state, tree, edge, weight):
+    """Repair a tree after an edge got cheaper"""
+    network = state['network']
+    dist = tree['dist']
+    u = int(network['edge_from'][edge])
+    v = int(network['edge_to'][edge])
+    
+    heap = []
+    for a, b in ((u, v), (v, u)):
+        if dist[a] + weight < dist[b]:
+            dist[b] = dist[a] + weight
+            _set_parent(tree, b, a, edge)
+            heap.append((dist[b], b))
+    if not heap:
+        return 0
+    
+    # Propagate the improvement; only nodes that get closer are touched
+    indptr, indices, arc_edge = get_adjacency(network)
+    arc_weights = state['arc_weights']
+    improved = set()
+    while heap:
+        d, x = heapq.heappop(heap)
+        if d > dist[x]:
+            continue
+        improved.add(x)
+        
+        for arc in range(indptr[x], indptr[x + 1]):
+            y = indices[arc]
+            nd = d + arc_weights[arc]
+            if nd < dist[y]:
+                dist[y] = nd
+                _set_parent(tree, y, x, arc_edge[arc])
+                heapq.heappush(heap, (nd, y))
+    
+    return len(improved)
@@ -0,0 +1,258 @@
+import os
+import sys
+import json
+import heapq
+import math
+import numpy as np
+
+from src.data.network import get_adjacency
+from src.algorithms.ch import weights_fingerprint
+
+# Arrays of a stored label index, one .npy file each
+_LABEL_ARRAYS = ("offsets", "hubs", "dists", "order")
+
+def build_hub_labels(network, edge_weights, hierarchy=None):
+    """
+    Builds a hub-label distance index with pruned landmark labeling.
+    
+    Nodes are processed from most to least important; each one runs a Dijkstra
+    search that stops expanding wherever the labels built so far already give the
+    right distance, and adds itself as a hub to every node it does reach. Any two
+    connected nodes then share a hub on a shortest path between them, so a distance
+    is the minimum over common hubs of the two label distances.
+    
+    Args:
+        network: CSR road network
+        edge_weights: NumPy array with one non-negative weight per edge
+        hierarchy: Optional contraction hierarchy for the same weights (see
+                   src.algorithms.ch) whose node order is used instead of node degree
+    
+    Returns:
+        labels: Dictionary with CSR-packed labels ('offsets', and per label the hub
+                rank in 'hubs' and float64 distance in 'dists', sorted by hub), the node
+                order ('order') and the fingerprints of the network and weights
+    """
+    indptr, indices, _ = get_adjacency(network)
+    arc_weights = edge_weights[network['arc_edge']].tolist()
+    num_nodes = network['num_nodes']
+    
+    if hierarchy is not None:
+        order = np.argsort(-hierarchy['rank'], kind='stable')
+    else:
+        order = np.argsort(-np.diff(network['indptr']), kind='stable')
+    order = order.tolist()
+    
+    label_hubs = [[] for _ in range(num_nodes)]
+    label_dists = [[] for _ in range(num_nodes)]
+    root_dist = [math.inf] * num_nodes  # indexed by hub rank
+    
+    for rank, root in enumerate(order):
+        for hub, d in zip(label_hubs[root], label_dists[root]):
+            root_dist[hub] = d
+        
+        dist = {root: 0.0}
+        heap = [(0.0, root)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            
+            # Prune: an earlier hub already covers the root-to-u distance
+            covered = math.inf
+            for hub, hd in zip(label_hubs[u], label_dists[u]):
+                if root_dist[hub] + hd < covered:
+                    covered = root_dist[hub] + hd
+            if covered <= d:
+                continue
+            
+            label_hubs[u].append(rank)
+            label_dists[u].append(d)
+            
+            for arc in range(indptr[u], indptr[u + 1]):
+                v = indices[arc]
+                nd = d + arc_weights[arc]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        
+        for hub in label_hubs[root]:
+            root_dist[hub] = math.inf
+    
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum([len(hubs) for hubs in label_hubs], out=offsets[1:])
+    
+    return {
+        "offsets": offsets,
+        "hubs": np.array([hub for hubs in label_hubs for hub in hubs], dtype=np.int32),
+        "dists": np.array([d for dists in label_dists for d in dists], dtype=np.float64),
+        "order": np.array(order, dtype=np.int32),
+        "network_version": network['version'],
+        "weights_hash": weights_fingerprint(edge_weights)
+    }
+
+def hub_distance(labels, source, target):
+    """
+    Computes a shortest distance by merging two sorted labels; no graph search.
+    
+    Args:
+        labels: Hub labels (see build_hub_labels)
+        source: Source node index
+        target: Target node index
+    
+    Returns:
+        distance: Shortest distance (inf if unreachable)
+    """
+    offsets = labels['offsets']
+    a_start, a_end = int(offsets[source]), int(offsets[source + 1])
+    b_start, b_end = int(offsets[target]), int(offsets[target + 1])
+    a_hubs = labels['hubs'][a_start:a_end].tolist()
+    b_hubs = labels['hubs'][b_start:b_end].tolist()
+    a_dists = labels['dists'][a_start:a_end].tolist()
+    b_dists = labels['dists'][b_start:b_end].tolist()
+    
+    best = math.inf
+    i = j = 0
+    while i < len(a_hubs) and j < len(b_hubs):
+        if a_hubs[i] == b_hubs[j]:
+            if a_dists[i] + b_dists[j] < best:
+                best = a_dists[i] + b_dists[j]
+            i += 1
+            j += 1
+        elif a_hubs[i] < b_hubs[j]:
+            i += 1
+        else:
+            j += 1
+    return best
+
+def hub_distance_matrix(labels, sources, targets):
+    """
+    Computes a sources x targets distance matrix from hub labels.
+    
+    Each row scatters the source's label into a hub-indexed array and reduces every
+    target's label against it in one vectorized pass.
+    
+    Args:
+        labels: Hub labels (see build_hub_labels)
+        sources: List of source node indices
+        targets: List of target node indices
+    
+    Returns:
+        matrix: NumPy array of shortest distances (inf where unreachable)
+    """
+    offsets = np.asarray(labels['offsets'])
+    hubs = labels['hubs']
+    dists = labels['dists']
+    matrix = np.full((len(sources), len(targets)), np.inf)
+    if len(targets) == 0:
+        return matrix
+    
+    # Concatenate the target labels once, remembering where each one starts
+    positions = [np.arange(offsets[t], offsets[t + 1]) for t in targets]
+    lengths = np.array([len(p) for p in positions])
+    target_hubs = np.asarray(hubs[np.concatenate(positions)])
+    target_dists = np.asarray(dists[np.concatenate(positions)], dtype=float)
+    segment_starts = np.cumsum(lengths) - lengths
+    has_label = lengths > 0
+    
+    via_hub = np.full(len(labels['order']), np.inf)
+    for row, source in enumerate(sources):
+        start, end = int(offsets[source]), int(offsets[source + 1])
+        source_hubs = np.asarray(hubs[start:end])
+        via_hub[source_hubs] = dists[start:end]
+        if has_label.any():
+            totals = via_hub[target_hubs] + target_dists
+            matrix[row, has_label] = np.minimum.reduceat(totals, segment_starts[has_label])
+        via_hub[source_hubs] = np.inf
+    
+    return matrix
+
+def save_hub_labels(labels, directory):
+    """
+    Stores hub labels as a directory of .npy arrays that can be memory-mapped.
+    
+    Args:
+        labels: Hub labels
+        directory: Destination directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name in _LABEL_ARRAYS:
+        np.save(os.path.join(directory, f"{name}.npy"), labels[name])
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"network_version": labels['network_version'], "weights_hash": labels['weights_hash']}, f)
+
+def load_hub_labels(directory, network=None, edge_weights=None):
+    """
+    Memory-maps hub labels saved with save_hub_labels.
+    
+    The label arrays are opened read-only with mmap_mode='r', so startup costs no
+    parsing and processes sharing the files share the pages.
+    
+    Args:
+        directory: Directory holding the stored labels
+        network: Optional network the labels must have been built from
+        edge_weights: Optional weight array the labels must have been built for
+    
+    Returns:
+        labels: The loaded labels, or None if missing or stale (including labels
+                saved with float32 distances by earlier versions)
+    """
+    meta_path = os.path.join(directory, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    
+    with open(meta_path) as f:
+        labels = json.load(f)
+    
+    if network is not None and labels['network_version'] != network['version']:
+        return None
+    if edge_weights is not None and labels['weights_hash'] != weights_fingerprint(edge_weights):
+        return None
+    
+    for name in _LABEL_ARRAYS:
+        labels[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+    if labels['dists'].dtype != np.float64:
+        return None
+    return labels
+
+def get_period_hub_labels(network, traffic_flows, directory, build_missing=True):
+    """
+    Loads (and optionally builds) one hub-label index per time period.
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+        directory: Directory holding one subdirectory of stored labels per period
+        build_missing: Build and save labels that are missing or stale
+    
+    Returns:
+        hub_labels: Dictionary mapping time period to hub labels
+    """
+    from src.algorithms.shortestpath import TIME_PERIODS, get_period_weights
+    
+    table = get_period_weights(network, traffic_flows)
+    hub_labels = {}
+    
+    for period in TIME_PERIODS:
+        weights = table["weights"][period]
+        path = os.path.join(directory, f"hl_{period}")
+        labels = load_hub_labels(path, network, weights)
+        
+        if labels is None and build_missing:
+            save_hub_labels(build_hub_labels(network, weights), path)
+            labels = load_hub_labels(path)
+        
+        if labels is not None:
+            hub_labels[period] = labels
+    
+    return hub_labels
+
+if __name__ == "__main__":
+    # Offline build: python -m src.algorithms.hub_labels [output directory]
+    from src.data.loader import load_data
+    from src.data.network import get_road_network
+    
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "hub_labels")
+    data = load_data()
+    built = get_period_hub_labels(get_road_network(data), data['traffic_flows'], output_dir)
+    for period, labels in built.items():
+        print(f"{period}: {len(labels['hubs'])} labels")
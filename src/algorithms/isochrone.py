@@ -0,0 +1,297 @@
+import heapq
+import math
+from bisect import bisect_right
+import numpy as np
+
+from src.data.network import get_adjacency, FACILITY_MEDICAL
+from src.algorithms.shortestpath import (
+    get_period_weights, emergency_edge_costs, emergency_edge_times, get_nearest_hospital_index
+)
+
+# Default coverage thresholds in minutes
+ISOCHRONE_THRESHOLDS = (10, 20, 30)
+
+def isochrone_edge_weights(network, traffic_flows=None, time_period=None, emergency=False):
+    """
+    Returns per-edge travel times in minutes for reachability searches.
+    
+    The weights are the compiled period travel times used by run_dijkstra, or in
+    emergency mode the emergency vehicle driving times run_a_star reports. Those
+    depend only on distance and road condition, so emergency weights are the same
+    in every time period.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data (not used in emergency mode)
+        time_period: Time period to consider (not used in emergency mode)
+        emergency: Whether to use emergency vehicle driving times
+    
+    Returns:
+        edge_weights: NumPy array with one travel time per edge
+    """
+    if emergency:
+        return emergency_edge_times(network)
+    if time_period is None:
+        raise ValueError("time_period is required outside emergency mode")
+    return get_period_weights(network, traffic_flows)["weights"][time_period]
+
+def emergency_search(network, sources, limit, min_road_condition=6):
+    """
+    Finds the emergency driving time to every node within a time limit.
+    
+    Routes are chosen the way run_a_star chooses them, by the lowest emergency
+    cost (distance with road condition penalties), and timed with the emergency
+    driving times, so the minutes match run_a_star's travel time. Each road's
+    time is at least a fixed share of its cost, which bounds how far the cost
+    search has to go.
+    
+    Args:
+        network: CSR road network
+        sources: Iterable of source node indices (all start at time 0)
+        limit: Largest travel time of interest
+        min_road_condition: Minimum acceptable road condition
+    
+    Returns:
+        order: List of reached node indices in non-decreasing travel time
+        dist: Dictionary of reached node index -> travel time
+    """
+    indptr, indices, arc_edge = get_adjacency(network)
+    _, edge_cost = emergency_edge_costs(network, min_road_condition)
+    edge_times = emergency_edge_times(network)
+    
+    # Travel time per unit of cost on the "fastest" road: no route within the
+    # time limit costs more than limit / time_per_cost
+    positive = edge_cost > 0
+    time_per_cost = float((edge_times[positive] / edge_cost[positive]).min()) if positive.any() else math.inf
+    cost_limit = limit / time_per_cost if time_per_cost > 0 else math.inf
+    
+    cost_arcs = edge_cost[network['arc_edge']].tolist()
+    time_arcs = edge_times[network['arc_edge']].tolist()
+    
+    cost = {}
+    time = {}
+    heap = [(0.0, s, 0.0) for s in sources]
+    heapq.heapify(heap)
+    best = {s: 0.0 for s in sources}
+    
+    while heap:
+        c, u, t = heapq.heappop(heap)
+        if u in cost:
+            continue
+        cost[u] = c
+        time[u] = t
+        
+        for arc in range(indptr[u], indptr[u + 1]):
+            v = indices[arc]
+            nc = c + cost_arcs[arc]
+            if nc <= cost_limit and nc < best.get(v, math.inf) and v not in cost:
+                best[v] = nc
+                heapq.heappush(heap, (nc, v, t + time_arcs[arc]))
+    
+    order = sorted((u for u, t in time.items() if t <= limit), key=time.get)
+    return order, {u: time[u] for u in order}
+
+def truncated_search(network, arc_weights, sources, limit):
+    """
+    Runs Dijkstra's algorithm from one or more sources, stopping at a time limit.
+    
+    Nodes beyond the limit are never queued, so the work is proportional to the
+    reachable area rather than the whole network.
+    
+    Args:
+        network: CSR road network
+        arc_weights: List with one non-negative weight per CSR arc
+        sources: Iterable of source node indices (all start at time 0)
+        limit: Largest travel time of interest
+    
+    Returns:
+        order: List of reached node indices in non-decreasing travel time
+        dist: Dictionary of reached node index -> travel time
+    """
+    indptr, indices, _ = get_adjacency(network)
+    
+    dist = {}
+    order = []
+    heap = [(0.0, s) for s in sources]
+    heapq.heapify(heap)
+    best = {s: 0.0 for s in sources}
+    
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u in dist:
+            continue
+        dist[u] = d
+        order.append(u)
+        
+        for arc in range(indptr[u], indptr[u + 1]):
+            v = indices[arc]
+            nd = d + arc_weights[arc]
+            if nd <= limit and nd < best.get(v, math.inf) and v not in dist:
+                best[v] = nd
+                heapq.heappush(heap, (nd, v))
+    
+    return order, dist
+
+def isochrone_layers(network, edge_weights, order, dist, thresholds):
+    """
+    Splits the result of one truncated search into one isochrone per threshold.
+    
+    A road counts as reachable when the time left at its endpoints covers its
+    whole length, possibly driving in from both ends; roads only partly covered
+    are reported with the covered fraction.
+    
+    Args:
+        network: CSR road network
+        edge_weights: NumPy array with the travel time per edge used for the search
+        order: Reached node indices in non-decreasing travel time (see truncated_search)
+        dist: Dictionary of reached node index -> travel time
+        thresholds: Iterable of time limits in minutes
+    
+    Returns:
+        layers: Dictionary of threshold -> {'nodes': node indices,
+                'edges': edge indices, 'partial_edges': {edge index: fraction}}
+    """
+    indptr, _, arc_edge = get_adjacency(network)
+    
+    # Every road touching a reached node, with the times at both of its ends
+    touched = sorted({arc_edge[arc] for u in order for arc in range(indptr[u], indptr[u + 1])})
+    touched = np.array(touched, dtype=np.int64)
+    from_time = np.array([dist.get(u, math.inf) for u in network['edge_from'][touched].tolist()])
+    to_time = np.array([dist.get(v, math.inf) for v in network['edge_to'][touched].tolist()])
+    length = edge_weights[touched]
+    
+    times = [dist[u] for u in order]
+    
+    layers = {}
+    for threshold in thresholds:
+        # Nodes come out of the search in time order, so each isochrone is a prefix
+        nodes = order[:bisect_right(times, threshold)]
+        
+        # Time left to drive into the road from each end
+        covered = np.maximum(threshold - from_time, 0.0) + np.maximum(threshold - to_time, 0.0)
+        fraction = np.divide(covered, length, out=np.where(covered > 0, 1.0, 0.0), where=length > 0)
+        
+        full = fraction >= 1.0
+        partial = (fraction > 0.0) & ~full
+        layers[threshold] = {
+            "nodes": nodes,
+            "edges": touched[full].tolist(),
+            "partial_edges": dict(zip(touched[partial].tolist(), fraction[partial].tolist()))
+        }
+    
+    return layers
+
+def compute_isochrones(network, sources, time_period=None, traffic_flows=None, thresholds=ISOCHRONE_THRESHOLDS,
+                       emergency=False, min_road_condition=6):
+    """
+    Computes the nodes and roads reachable within each time threshold for a batch of sources.
+    
+    Each source costs one search bounded by the largest threshold; all smaller
+    thresholds are read off the same search. Emergency isochrones do not depend
+    on the time period or traffic (see isochrone_edge_weights).
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        sources: List of source node IDs
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night);
+                     not used in emergency mode
+        traffic_flows: Dictionary containing traffic flow data (not used in emergency mode)
+        thresholds: Iterable of time limits in minutes
+        emergency: Whether to time emergency vehicles on run_a_star's routes (see emergency_search)
+        min_road_condition: Minimum acceptable road condition (emergency mode only)
+    
+    Returns:
+        isochrones: Dictionary of source ID -> {'travel_time': {node ID: minutes},
+                    'isochrones': {threshold: {'nodes', 'edges', 'partial_edges'}}}
+                    with node IDs and "from-to" road IDs ({'error': ...} for unknown sources)
+    """
+    thresholds = sorted(thresholds)
+    node_index = network['node_index']
+    
+    edge_weights = isochrone_edge_weights(network, traffic_flows, time_period, emergency)
+    arc_weights = edge_weights[network['arc_edge']].tolist()
+    
+    isochrones = {}
+    for source_id in sources:
+        if source_id not in node_index:
+            isochrones[source_id] = {"error": "Unknown node"}
+            continue
+        
+        if emergency:
+            order, dist = emergency_search(network, [node_index[source_id]], thresholds[-1], min_road_condition)
+        else:
+            order, dist = truncated_search(network, arc_weights, [node_index[source_id]], thresholds[-1])
+        layers = isochrone_layers(network, edge_weights, order, dist, thresholds)
+        isochrones[source_id] = _describe_reach(network, order, dist, layers)
+    
+    return isochrones
+
+def hospital_coverage(network, thresholds=ISOCHRONE_THRESHOLDS, min_road_condition=6):
+    """
+    Computes emergency coverage maps for every Medical facility.
+    
+    Each hospital gets its own isochrones. In the combined coverage every node is
+    served by its nearest hospital by condition-penalized distance, reached on the
+    cheapest emergency route, as run_a_star dispatches it; its time is read off
+    that hospital's search. Emergency vehicles are timed like run_a_star, from
+    distance and road condition only, so the coverage is the same in every time
+    period.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        thresholds: Iterable of time limits in minutes
+        min_road_condition: Minimum acceptable road condition
+    
+    Returns:
+        coverage: Dictionary with per-hospital isochrones ('hospitals'), the
+                  combined reach ('combined') and the population covered within
+                  each threshold ('population_covered')
+    """
+    thresholds = sorted(thresholds)
+    node_ids = network['node_ids']
+    hospital_nodes = np.flatnonzero(network['facility_flags'] & FACILITY_MEDICAL).tolist()
+    edge_weights = isochrone_edge_weights(network, emergency=True)
+    nearest = get_nearest_hospital_index(network, [node_ids[h] for h in hospital_nodes], min_road_condition)
+    
+    hospitals = {}
+    dist = {}
+    for h in hospital_nodes:
+        reach_order, reach = emergency_search(network, [h], thresholds[-1], min_road_condition)
+        layers = isochrone_layers(network, edge_weights, reach_order, reach, thresholds)
+        hospitals[node_ids[h]] = _describe_reach(network, reach_order, reach, layers)
+        
+        # The nearest hospital is not always the quickest one to reach
+        for u in reach_order:
+            if nearest['hospital'][u] == h:
+                dist[u] = reach[u]
+    
+    order = sorted(dist, key=dist.get)
+    layers = isochrone_layers(network, edge_weights, order, dist, thresholds)
+    
+    population = network['population']
+    population_covered = {
+        threshold: float(population[layer["nodes"]].sum()) for threshold, layer in layers.items()
+    }
+    
+    return {
+        "hospitals": hospitals,
+        "combined": _describe_reach(network, order, dist, layers),
+        "population_covered": population_covered
+    }
+
+def _describe_reach(network, order, dist, layers):
+    """Convert node and edge indices of a search result to node IDs and road IDs"""
+    node_ids = network['node_ids']
+    road_ids = network['road_ids']
+    
+    return {
+        "travel_time": {node_ids[u]: dist[u] for u in order},
+        "isochrones": {
+            threshold: {
+                "nodes": [node_ids[u] for u in layer["nodes"]],
+                "edges": [road_ids[e] for e in layer["edges"]],
+                "partial_edges": {road_ids[e]: fraction for e, fraction in layer["partial_edges"].items()}
+            }
+            for threshold, layer in layers.items()
+        }
+    }
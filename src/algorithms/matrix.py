@@ -0,0 +1,117 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from src.data.network import get_adjacency
+from src.algorithms.shortestpath import dijkstra_search, get_period_weights, period_weights_hash
+from src.algorithms.hub_labels import hub_distance_matrix
+
+# Below this many origins a process pool costs more than it saves
+PARALLEL_MIN_ORIGINS = 64
+
+# Network view installed in each worker process by _init_worker
+_WORKER_STATE = {}
+
+def _init_worker(adjacency, num_nodes, arc_weights):
+    """Install the shared adjacency and weights once per worker process"""
+    _WORKER_STATE['network'] = {"_adjacency": adjacency, "num_nodes": num_nodes}
+    _WORKER_STATE['arc_weights'] = arc_weights
+
+def _search_rows(sources, destinations):
+    """Worker entry point: search rows against the installed network view"""
+    return _distance_rows(_WORKER_STATE['network'], _WORKER_STATE['arc_weights'], sources, destinations)
+
+def _distance_rows(network, arc_weights, sources, destinations):
+    """Run one single-source search per origin and keep the destination columns"""
+    rows = []
+    for source in sources:
+        dist, _, _ = dijkstra_search(network, arc_weights, [source])
+        rows.append([dist[d] for d in destinations])
+    return rows
+
+def travel_time_matrix(network, traffic_flows, time_period, origins=None, destinations=None, processes=None,
+                       hub_labels=None, backend="dijkstra"):
+    """
+    Computes an origin x destination travel time matrix for a time period.
+    
+    Runs one single-source Dijkstra per origin over the compiled period weights
+    instead of one query per pair, and fans origins out across a process pool
+    for large batches.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
+        origins: List of origin node IDs (defaults to every node)
+        destinations: List of destination node IDs (defaults to every node)
+        processes: Number of worker processes (None picks automatically, 1 runs serially)
+        hub_labels: Optional dictionary of time period -> hub labels (see
+                    src.algorithms.hub_labels); answers the matrix from labels without searching,
+                    unless they were built for other weights
+        backend: "dijkstra" for the process-pool searches, or "csgraph" for scipy's
+                 compiled multi-source Dijkstra (see src.algorithms.csgraph_backend)
+    
+    Returns:
+        matrix: NumPy array of travel times in minutes (inf where unreachable)
+    """
+    table = get_period_weights(network, traffic_flows)
+    
+    # Labels built from another network or traffic snapshot would answer with stale times
+    labels = hub_labels.get(time_period) if hub_labels else None
+    if (labels is not None and labels['network_version'] == network['version']
+            and labels['weights_hash'] == period_weights_hash(table, time_period)):
+        node_index = network['node_index']
+        sources = [node_index[o] for o in (network['node_ids'] if origins is None else origins)]
+        targets = [node_index[d] for d in (network['node_ids'] if destinations is None else destinations)]
+        return hub_distance_matrix(labels, sources, targets)
+    
+    if backend == "csgraph":
+        from src.algorithms.csgraph_backend import sparse_distance_matrix
+        return sparse_distance_matrix(network, traffic_flows, time_period, origins, destinations)
+    
+    return weighted_distance_matrix(network, table["arc_weights"][time_period], origins, destinations, processes)
+
+def weighted_distance_matrix(network, arc_weights, origins=None, destinations=None, processes=None):
+    """
+    Computes an origin x destination shortest-distance matrix for arbitrary arc weights.
+    
+    Args:
+        network: CSR road network
+        arc_weights: List with one non-negative weight per CSR arc
+        origins: List of origin node IDs (defaults to every node)
+        destinations: List of destination node IDs (defaults to every node)
+        processes: Number of worker processes (None picks automatically, 1 runs serially)
+    
+    Returns:
+        matrix: NumPy array of shortest distances (inf where unreachable)
+    """
+    node_index = network['node_index']
+    if origins is None:
+        origins = network['node_ids']
+    if destinations is None:
+        destinations = network['node_ids']
+    
+    sources = [node_index[o] for o in origins]
+    targets = [node_index[d] for d in destinations]
+    
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(sources) >= PARALLEL_MIN_ORIGINS else 1
+    
+    if processes <= 1:
+        rows = _distance_rows(network, arc_weights, sources, targets)
+        return np.array(rows, dtype=float).reshape(len(sources), len(targets))
+    
+    # Split origins into contiguous chunks, a few per worker for load balancing
+    chunk_size = max(1, len(sources) // (processes * 4))
+    chunks = [sources[i:i + chunk_size] for i in range(0, len(sources), chunk_size)]
+    
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(get_adjacency(network), network['num_nodes'], arc_weights)
+    ) as executor:
+        for chunk_rows in executor.map(_search_rows, chunks, [targets] * len(chunks)):
+            rows.extend(chunk_rows)
+    
+    return np.array(rows, dtype=float).reshape(len(sources), len(targets))
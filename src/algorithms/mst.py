@@ -1,27 +1,141 @@
 import networkx as nx
-import math
-from operator import itemgetter
+import numpy as np
 
-def run_mst_algorithm(G, neighborhoods, facilities, existing_roads, potential_roads, 
+def run_mst_algorithm(network, neighborhoods, facilities, existing_roads, potential_roads, 
                      prioritize_hospitals=True, prioritize_high_population=True):
     """
     Implements Kruskal's algorithm to find the minimum spanning tree for the transportation network.
     
     Args:
-        G: The original network as a NetworkX graph
+        network: Shared CSR road network (see src.data.network)
         neighborhoods: List of neighborhood data
         facilities: List of facility data
         existing_roads: List of existing road data
         potential_roads: List of potential new road data
         prioritize_hospitals: Whether to prioritize connections to hospitals
         prioritize_high_population: Whether to prioritize connections between high-population areas
+    
+    Returns:
+        mst_graph: The MST as a NetworkX graph
+        total_cost: The total cost of the MST solution
+        results: Dictionary with additional information
+    """
+    # Prepare edges for Kruskal's algorithm
+    edges = prepare_mst_edges(network, existing_roads, 'existing', prioritize_hospitals, prioritize_high_population)
+    edges += prepare_mst_edges(network, potential_roads, 'potential', prioritize_hospitals, prioritize_high_population)
+    
+    # Sort edges by weight for Kruskal's algorithm
+    edges.sort(key=lambda x: x[2]['weight'])
+    
+    # Implement Kruskal's algorithm
+    # Initialize each node as a separate tree in an array-backed disjoint set
+    node_index = network['node_index']
+    parent = list(range(network['num_nodes']))
+    rank = [0] * network['num_nodes']
+    components = network['num_nodes']
+    
+    # Track selected edges
+    tree_edges = []
+    
+    # Kruskal's algorithm
+    for u, v, data in edges:
+        # A spanning tree has V-1 edges; nothing later can be selected
+        if components <= 1:
+            break
         
+        # If u and v are in different trees, merge them and keep the edge
+        if _union(parent, rank, node_index[u], node_index[v]):
+            components -= 1
+            tree_edges.append((u, v, data))
+    
+    return summarize_mst(network, neighborhoods, facilities, tree_edges)
+
+def prepare_mst_edges(network, roads, road_type, prioritize_hospitals=True, prioritize_high_population=True):
+    """
+    Computes prioritized MST edge weights for a list of roads.
+    
+    Existing roads are weighted by distance times a maintenance cost derived from
+    their condition, potential roads by construction cost. Both then get the
+    population and hospital/airport discounts.
+    
+    Args:
+        network: Shared CSR road network providing the node attribute index
+        roads: List of road data
+        road_type: 'existing' or 'potential'
+        prioritize_hospitals: Whether to prioritize connections to hospitals
+        prioritize_high_population: Whether to prioritize connections between high-population areas
+    
+    Returns:
+        edges: List of (from, to, data) tuples ready for Kruskal's algorithm
+    """
+    edges = []
+    
+    if road_type == 'existing':
+        # Calculate a cost based on the inverse of road condition (worse condition = higher cost)
+        distance = np.array([road['distance'] for road in roads], dtype=float)
+        maintenance_cost = (11 - np.array([road['condition'] for road in roads])) * 10  # Scale from 10 to 100
+        
+        # Apply prioritization factors
+        weights = _prioritized_weights(
+            network, roads, distance * maintenance_cost,
+            0.7 if prioritize_high_population else None,  # 30% discount for high-population areas
+            0.6 if prioritize_hospitals else None  # 40% discount for connections to hospitals/airport
+        )
+        
+        for road, weight, cost in zip(roads, weights.tolist(), maintenance_cost.tolist()):
+            edges.append((
+                road['from'], 
+                road['to'], 
+                {
+                    'weight': weight,
+                    'distance': road['distance'],
+                    'capacity': road['capacity'],
+                    'condition': road['condition'],
+                    'road_type': 'existing',
+                    'original_weight': weight,
+                    'cost': cost
+                }
+            ))
+    else:
+        # Use construction cost directly as the weight, with the same prioritization factors
+        weights = _prioritized_weights(
+            network, roads, np.array([road['cost'] for road in roads], dtype=float),
+            0.8 if prioritize_high_population else None,  # 20% discount for high-population areas
+            0.7 if prioritize_hospitals else None  # 30% discount for connections to hospitals/airport
+        )
+        
+        for road, weight in zip(roads, weights.tolist()):
+            edges.append((
+                road['from'], 
+                road['to'], 
+                {
+                    'weight': weight,
+                    'distance': road['distance'],
+                    'capacity': road['capacity'],
+                    'cost': road['cost'],  # Construction cost in millions EGP
+                    'road_type': 'potential',
+                    'original_weight': weight
+                }
+            ))
+    
+    return edges
+
+def summarize_mst(network, neighborhoods, facilities, tree_edges):
+    """
+    Builds the MST graph, cost and result summary from the selected edges.
+    
+    Args:
+        network: Shared CSR road network
+        neighborhoods: List of neighborhood data
+        facilities: List of facility data
+        tree_edges: List of (from, to, data) tuples in selection order
+    
     Returns:
         mst_graph: The MST as a NetworkX graph
         total_cost: The total cost of the MST solution
         results: Dictionary with additional information
     """
-    # Create a new graph for MST calculation
+    # Create a new graph for the MST
     mst_graph = nx.Graph()
     
     # Add all nodes
@@ -32,7 +146,7 @@ def run_mst_algorithm(G, neighborhoods, facilities, existing_roads, potential_ro
                            type=node['type'], 
                            x=node['x'], 
                            y=node['y'])
-        
+    
     for node in facilities:
         mst_graph.add_node(node['id'], 
                            name=node['name'], 
@@ -40,180 +154,39 @@ def run_mst_algorithm(G, neighborhoods, facilities, existing_roads, potential_ro
                            x=node['x'], 
                            y=node['y'])
     
-    # Prepare edges for Kruskal's algorithm
-    edges = []
-    
-    # Process existing roads
-    for road in existing_roads:
-        # Calculate a cost based on the inverse of road condition (worse condition = higher cost)
-        maintenance_cost = (11 - road['condition']) * 10  # Scale from 10 to 100
-        
-        # Apply prioritization factors
-        weight = road['distance'] * maintenance_cost
-        
-        # Prioritize high-population areas if enabled
-        if prioritize_high_population:
-            # Check if this road connects high-population areas
-            source_id = road['from']
-            target_id = road['to']
-            
-            source_pop = None
-            target_pop = None
-            
-            # Get population data for neighborhoods
-            for n in neighborhoods:
-                if n['id'] == source_id:
-                    source_pop = n['population']
-                if n['id'] == target_id:
-                    target_pop = n['population']
-            
-            # If both are neighborhoods with high population, reduce the weight
-            if source_pop and target_pop and (source_pop >= 400000 or target_pop >= 400000):
-                weight *= 0.7  # 30% discount for high-population areas
-        
-        # Prioritize hospital connections if enabled
-        if prioritize_hospitals:
-            # Check if this road connects to a hospital
-            source_id = road['from']
-            target_id = road['to']
-            
-            is_hospital_connection = False
-            
-            # Check if either end is a hospital (F9 or F10)
-            if source_id == "F9" or source_id == "F10" or target_id == "F9" or target_id == "F10":
-                is_hospital_connection = True
-                
-            # Also prioritize connections to the airport (F1)
-            if source_id == "F1" or target_id == "F1":
-                is_hospital_connection = True
-            
-            if is_hospital_connection:
-                weight *= 0.6  # 40% discount for connections to hospitals/airport
-        
-        # Add the edge
-        edges.append((
-            road['from'], 
-            road['to'], 
-            {
-                'weight': weight,
-                'distance': road['distance'],
-                'capacity': road['capacity'],
-                'condition': road['condition'],
-                'road_type': 'existing',
-                'original_weight': weight,
-                'cost': maintenance_cost
-            }
-        ))
-    
-    # Process potential new roads
-    for road in potential_roads:
-        # Use construction cost directly as the weight
-        weight = road['cost']
-        
-        # Apply same prioritization factors
-        # Prioritize high-population areas if enabled
-        if prioritize_high_population:
-            # Check if this road connects high-population areas
-            source_id = road['from']
-            target_id = road['to']
-            
-            source_pop = None
-            target_pop = None
-            
-            # Get population data for neighborhoods
-            for n in neighborhoods:
-                if n['id'] == source_id:
-                    source_pop = n['population']
-                if n['id'] == target_id:
-                    target_pop = n['population']
-            
-            # If both are neighborhoods with high population, reduce the weight
-            if source_pop and target_pop and (source_pop >= 400000 or target_pop >= 400000):
-                weight *= 0.8  # 20% discount for high-population areas
-        
-        # Prioritize hospital connections if enabled
-        if prioritize_hospitals:
-            # Check if this road connects to a hospital
-            source_id = road['from']
-            target_id = road['to']
-            
-            is_hospital_connection = False
-            
-            # Check if either end is a hospital (F9 or F10)
-            if source_id == "F9" or source_id == "F10" or target_id == "F9" or target_id == "F10":
-                is_hospital_connection = True
-                
-            # Also prioritize connections to the airport (F1)
-            if source_id == "F1" or target_id == "F1":
-                is_hospital_connection = True
-            
-            if is_hospital_connection:
-                weight *= 0.7  # 30% discount for connections to hospitals/airport
-        
-        # Add the edge
-        edges.append((
-            road['from'], 
-            road['to'], 
-            {
-                'weight': weight,
-                'distance': road['distance'],
-                'capacity': road['capacity'],
-                'cost': road['cost'],  # Construction cost in millions EGP
-                'road_type': 'potential',
-                'original_weight': weight
-            }
-        ))
-    
-    # Sort edges by weight for Kruskal's algorithm
-    edges.sort(key=lambda x: x[2]['weight'])
-    
-    # Implement Kruskal's algorithm
-    # Initialize each node as a separate tree
-    trees = {node: {node} for node in mst_graph.nodes()}
-    
-    # Track selected edges
     selected_roads = []
     existing_count = 0
     new_count = 0
     total_cost = 0
     
-    # Kruskal's algorithm
-    for u, v, data in edges:
-        # If u and v are in different trees
-        if trees[u] != trees[v]:
-            # Add the edge to the MST
-            mst_graph.add_edge(u, v, **data)
-            selected_roads.append({
-                'from': u,
-                'to': v,
-                'distance': data['distance'],
-                'road_type': data['road_type'],
-                'weight': data['weight']
-            })
-            
-            # Track costs
-            if data['road_type'] == 'existing':
-                # Use maintenance cost
-                existing_count += 1
-                total_cost += data.get('cost', 0)
-            else:
-                # Use construction cost for new roads
-                new_count += 1
-                total_cost += data.get('cost', 0)
-            
-            # Merge trees
-            union = trees[u].union(trees[v])
-            for node in union:
-                trees[node] = union
-    
-    # Check if all nodes are connected (should be in a single tree)
-    all_connected = len(set(frozenset(tree) for tree in trees.values())) == 1
+    for u, v, data in tree_edges:
+        # Add the edge to the MST
+        mst_graph.add_edge(u, v, **data)
+        selected_roads.append({
+            'from': u,
+            'to': v,
+            'distance': data['distance'],
+            'road_type': data['road_type'],
+            'weight': data['weight']
+        })
+        
+        # Track costs
+        if data['road_type'] == 'existing':
+            # Use maintenance cost
+            existing_count += 1
+            total_cost += data.get('cost', 0)
+        else:
+            # Use construction cost for new roads
+            new_count += 1
+            total_cost += data.get('cost', 0)
+    
+    # Check if all nodes are connected (a spanning tree has V-1 edges)
+    all_connected = len(tree_edges) == mst_graph.number_of_nodes() - 1
     
     # Count critical facilities that are connected
-    critical_facilities = ["F1", "F9", "F10"]  # Airport and hospitals
-    connected_critical = sum(1 for facility in critical_facilities if any(
-        road['from'] == facility or road['to'] == facility for road in selected_roads
-    ))
+    critical_facilities = [network['node_ids'][i] for i in np.flatnonzero(network['facility_flags'])]  # Airport and hospitals
+    connected_nodes = {road['from'] for road in selected_roads} | {road['to'] for road in selected_roads}
+    connected_critical = sum(1 for facility in critical_facilities if facility in connected_nodes)
     
     # Prepare the results
     results = {
@@ -226,3 +199,64 @@ def run_mst_algorithm(G, neighborhoods, facilities, existing_roads, potential_ro
     }
     
     return mst_graph, total_cost, results
+
+def _prioritized_weights(network, roads, weights, population_factor=None, critical_factor=None):
+    """
+    Applies the population and critical-facility discounts to a whole weight column.
+    
+    Args:
+        network: Shared CSR road network providing the node attribute index
+        roads: List of road data (from, to)
+        weights: NumPy array of base weights, one per road
+        population_factor: Multiplier for roads touching a high-population area (None to skip)
+        critical_factor: Multiplier for roads touching a hospital or the airport (None to skip)
+    
+    Returns:
+        weights: NumPy array of prioritized weights
+    """
+    node_index = network['node_index']
+    sources = np.array([node_index[road['from']] for road in roads], dtype=np.int64)
+    targets = np.array([node_index[road['to']] for road in roads], dtype=np.int64)
+    
+    if population_factor is not None:
+        # Both ends must be populated neighborhoods, at least one of them large
+        source_pop = network['population'][sources]
+        target_pop = network['population'][targets]
+        high_population = (source_pop > 0) & (target_pop > 0) & ((source_pop >= 400000) | (target_pop >= 400000))
+        weights = np.where(high_population, weights * population_factor, weights)
+    
+    if critical_factor is not None:
+        # Either end is a hospital or the airport
+        flags = network['facility_flags']
+        critical = (flags[sources] | flags[targets]) != 0
+        weights = np.where(critical, weights * critical_factor, weights)
+    
+    return weights
+
+def _find(parent, i):
+    """Find the root of node i, compressing the path along the way"""
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
+
+def _union(parent, rank, a, b):
+    """
+    Merges the trees containing a and b using union by rank.
+    
+    Returns:
+        bool: True if the nodes were in different trees, False if already joined
+    """
+    root_a = _find(parent, a)
+    root_b = _find(parent, b)
+    if root_a == root_b:
+        return False
+    
+    if rank[root_a] < rank[root_b]:
+        root_a, root_b = root_b, root_a
+    parent[root_b] = root_a
+    if rank[root_a] == rank[root_b]:
+        rank[root_a] += 1
+    return True
@@ -0,0 +1,252 @@
+import heapq
+import math
+import numpy as np
+
+from src.data.network import get_adjacency
+from src.algorithms.shortestpath import TIME_PERIODS, get_period_weights
+
+# Time-of-day resolution of the travel time functions
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Minute of the day at which each period's compiled weights apply exactly;
+# travel times in between are interpolated linearly (wrapping around midnight)
+PERIOD_ANCHORS = {
+    "night": 2 * 60,
+    "morning_peak": 8 * 60,
+    "afternoon": 13 * 60,
+    "evening_peak": 17 * 60 + 30
+}
+
+def build_travel_time_functions(network, traffic_flows):
+    """
+    Builds a piecewise-linear travel time function over the day for every edge.
+    
+    Each function is stored by its values at the start of every SLOT_MINUTES slot
+    and is linear in between.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data
+    
+    Returns:
+        ttf: NumPy array of shape (num_edges, SLOTS_PER_DAY) with travel times in minutes
+    """
+    table = get_period_weights(network, traffic_flows)
+    
+    cached = network.get('_travel_time_functions')
+    if cached is not None and cached[0] is table:
+        return cached[1]
+    
+    slot_minutes = np.arange(SLOTS_PER_DAY) * SLOT_MINUTES
+    anchors = [PERIOD_ANCHORS[period] for period in TIME_PERIODS]
+    
+    # Interpolation weights of each period at each slot: (periods x slots)
+    interpolation = np.array([
+        np.interp(slot_minutes, anchors, np.eye(len(TIME_PERIODS))[p], period=24 * 60)
+        for p in range(len(TIME_PERIODS))
+    ])
+    
+    period_weights = np.column_stack([table['weights'][period] for period in TIME_PERIODS])
+    ttf = period_weights @ interpolation
+    
+    network['_travel_time_functions'] = (table, ttf)
+    return ttf
+
+def profile_search(network, ttf, source, target, departures=None):
+    """
+    Computes travel time from source to target as a function of departure time.
+    
+    Runs one label-correcting search whose labels are vectors of arrival times,
+    one entry per departure time, so a single search answers every departure.
+    Each edge is traversed with the travel time at the moment it is entered.
+    Once the target has been reached, labels that are no earlier than the
+    target's arrival for any departure are dropped, since travel times are
+    non-negative and they cannot improve it.
+    
+    Args:
+        network: CSR road network
+        ttf: Travel time functions (see build_travel_time_functions)
+        source: Source node index
+        target: Target node index
+        departures: Departure times in minutes after midnight (defaults to every slot start)
+    
+    Returns:
+        departures: NumPy array of departure times in minutes
+        travel_time: NumPy array of travel times in minutes (inf if unreachable)
+    """
+    if departures is None:
+        departures = np.arange(SLOTS_PER_DAY) * float(SLOT_MINUTES)
+    departures = np.asarray(departures, dtype=float)
+    
+    indptr, indices, arc_edge = get_adjacency(network)
+    arrival = {source: departures.copy()}
+    heap = [(departures.min(), source)]
+    queued = {source}
+    target_arrival = None
+    
+    while heap:
+        key, u = heapq.heappop(heap)
+        if u not in queued:
+            continue
+        queued.discard(u)
+        
+        # No later label can beat any arrival already found at the target
+        if target_arrival is not None and key >= target_arrival.max():
+            break
+        
+        label = arrival[u]
+        slot_position = label / SLOT_MINUTES
+        slot = np.floor(slot_position)
+        fraction = slot_position - slot
+        slot = slot.astype(np.int64) % SLOTS_PER_DAY
+        next_slot = (slot + 1) % SLOTS_PER_DAY
+        
+        for arc in range(indptr[u], indptr[u + 1]):
+            v = indices[arc]
+            values = ttf[arc_edge[arc]]
+            candidate = label + values[slot] * (1 - fraction) + values[next_slot] * fraction
+            
+            # Prune: not better than the target's arrival for any departure
+            if target_arrival is not None and (candidate >= target_arrival).all():
+                continue
+            
+            current = arrival.get(v)
+            if current is None:
+                arrival[v] = candidate
+            elif (candidate < current).any():
+                arrival[v] = np.minimum(current, candidate)
+            else:
+                continue
+            
+            if v == target:
+                target_arrival = arrival[v]
+            queued.add(v)
+            heapq.heappush(heap, (arrival[v].min(), v))
+    
+    if target not in arrival:
+        return departures, np.full(len(departures), np.inf)
+    return departures, arrival[target] - departures
+
+def path_arrival(ttf, path_edge_ids, departure):
+    """
+    Follows a fixed route through the travel time functions.
+    
+    Args:
+        ttf: Travel time functions (see build_travel_time_functions)
+        path_edge_ids: List of edge indices along the route
+        departure: Departure time in minutes after midnight
+    
+    Returns:
+        arrival: Arrival time in minutes after midnight
+    """
+    time = departure
+    for e in path_edge_ids:
+        position = time / SLOT_MINUTES
+        slot = int(position)
+        fraction = position - slot
+        slot %= SLOTS_PER_DAY
+        time += float(ttf[e, slot]) * (1 - fraction) + float(ttf[e, (slot + 1) % SLOTS_PER_DAY]) * fraction
+    return time
+
+def departure_times(network, ttf, source, target, departures, path_edge_ids):
+    """
+    Computes travel times for a few departure times with time-dependent A* searches.
+    
+    A known route (e.g. the one found for the selected period) bounds every
+    answer from above. One backward search over each edge's smallest travel
+    time of the day, truncated at that bound, gives lower bounds to the target;
+    they guide each departure's search and prune every node that cannot lead to
+    a faster arrival than the known route.
+    
+    Args:
+        network: CSR road network
+        ttf: Travel time functions (see build_travel_time_functions)
+        source: Source node index
+        target: Target node index
+        departures: Departure times in minutes after midnight
+        path_edge_ids: Edge indices of any route from source to target
+    
+    Returns:
+        travel_time: NumPy array of travel times in minutes, one per departure
+    """
+    from src.algorithms.isochrone import truncated_search
+    
+    indptr, indices, arc_edge = get_adjacency(network)
+    values = ttf.ravel()
+    item = values.item
+    
+    bounds = [path_arrival(ttf, path_edge_ids, departure) - departure for departure in departures]
+    _, to_target = truncated_search(network, _lower_bound_arcs(network, ttf), [target], max(bounds))
+    
+    travel_time = []
+    for departure, bound in zip(departures, bounds):
+        limit = departure + bound
+        arrival = {source: departure}
+        done = set()
+        heap = [(departure + to_target.get(source, 0.0), departure, source)]
+        best = bound
+        
+        while heap:
+            _, time, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            if u == target:
+                best = time - departure
+                break
+            done.add(u)
+            
+            position = time / SLOT_MINUTES
+            slot = int(position)
+            fraction = position - slot
+            slot %= SLOTS_PER_DAY
+            next_slot = (slot + 1) % SLOTS_PER_DAY
+            
+            for arc in range(indptr[u], indptr[u + 1]):
+                v = indices[arc]
+                remaining = to_target.get(v)
+                if remaining is None or v in done:
+                    continue
+                row = arc_edge[arc] * SLOTS_PER_DAY
+                next_time = time + item(row + slot) * (1 - fraction) + item(row + next_slot) * fraction
+                if next_time + remaining <= limit and next_time < arrival.get(v, math.inf):
+                    arrival[v] = next_time
+                    heapq.heappush(heap, (next_time + remaining, next_time, v))
+        
+        travel_time.append(best)
+    
+    return np.array(travel_time)
+
+def _lower_bound_arcs(network, ttf):
+    """Smallest travel time of the day per CSR arc, cached next to the functions"""
+    cached = network.get('_ttf_lower_bounds')
+    if cached is None or cached[0] is not ttf:
+        cached = (ttf, ttf.min(axis=1)[network['arc_edge']].tolist())
+        network['_ttf_lower_bounds'] = cached
+    return cached[1]
+
+def run_profile_query(network, origin, destination, traffic_flows):
+    """
+    Returns the travel time profile over the day for an origin/destination pair.
+    
+    Args:
+        network: CSR road network
+        origin: ID of the origin node
+        destination: ID of the destination node
+        traffic_flows: Dictionary containing traffic flow data
+    
+    Returns:
+        profile: Dictionary with 'departure_minutes', 'travel_time' (per slot)
+                 and 'period_times' (at each period's anchor time)
+    """
+    node_index = network['node_index']
+    ttf = build_travel_time_functions(network, traffic_flows)
+    departures, travel_time = profile_search(network, ttf, node_index[origin], node_index[destination])
+    
+    return {
+        "departure_minutes": departures.tolist(),
+        "travel_time": travel_time.tolist(),
+        "period_times": {
+            period: float(travel_time[PERIOD_ANCHORS[period] // SLOT_MINUTES]) for period in TIME_PERIODS
+        }
+    }
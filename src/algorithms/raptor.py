@@ -0,0 +1,508 @@
+import math
+from bisect import bisect_left
+import numpy as np
+
+from src.data.network import get_node_name, traffic_fingerprint
+from src.algorithms.shortestpath import TIME_PERIODS, dijkstra_search, get_period_weights
+from src.algorithms.isochrone import truncated_search
+
+# Vehicle and passenger speeds in km/h
+METRO_SPEED = 35
+WALK_SPEED = 5
+
+# Kilometres per degree of latitude, for straight-line distances between node coordinates
+KM_PER_DEGREE = 111.32
+
+# Minutes spent at each stop, and the minimum time to change vehicles
+METRO_DWELL_MINUTES = 1
+BUS_DWELL_MINUTES = 2
+CHANGE_MINUTES = 3
+
+# Longest walking (or driving) leg to the first stop and from the last one, and between stops
+MAX_ACCESS_MINUTES = 30
+MAX_TRANSFER_WALK_MINUTES = 10
+
+# Minutes a bus rests at each terminus before the return trip
+BUS_LAYOVER_MINUTES = 10
+
+# Periods in which metro lines run at their peak frequency
+PEAK_PERIODS = ("morning_peak", "evening_peak")
+
+# Timetables repeat the period's frequencies from midnight until this minute
+TIMETABLE_END = 24 * 60 + 3 * 60
+
+MAX_TRANSFERS = 4
+
+def resolve_station(network, name, station_aliases=None):
+    """
+    Maps a transit station or stop name to a road network node index.
+    
+    Args:
+        network: CSR road network
+        name: Station or stop name
+        station_aliases: Optional dictionary of station name -> node ID for names
+                         that differ from the node names (see load_data)
+    
+    Returns:
+        node: Node index, or None if the name is unknown
+    """
+    node_names = network['node_names']
+    if name in node_names:
+        return node_names.index(name)
+    node_id = (station_aliases or {}).get(name)
+    return network['node_index'].get(node_id)
+
+def straight_line_km(network, a, b):
+    """Straight-line distance in km between two nodes, from their coordinates"""
+    dx = (network['x'][a] - network['x'][b]) * math.cos(math.radians((network['y'][a] + network['y'][b]) / 2))
+    dy = network['y'][a] - network['y'][b]
+    return float(math.hypot(dx, dy) * KM_PER_DEGREE)
+
+def build_transit_network(network, metro_lines, bus_routes, traffic_flows, time_period, bus_allocation=None,
+                          station_aliases=None):
+    """
+    Builds array-packed RAPTOR route and stop tables for one time period.
+    
+    Every metro line and bus route becomes two routes (one per direction) with a
+    frequency-based timetable: trips leave the first stop every headway, metro lines
+    at the period's peak or off-peak frequency and buses at their round-trip time
+    divided by the number of buses. Stops are road network nodes, so lines meeting
+    at a node share a stop and passengers can change there.
+    
+    Buses take the period's road travel time between stops. Metro trains run on
+    their own tracks, so they cover the straight-line distance between the
+    stations' coordinates at METRO_SPEED, whether or not roads join them. A route
+    with fewer than two known stops, or a bus route between stops with no road
+    connection, is left out and reported in 'dropped_routes'.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        metro_lines: List of metro line data (id, stations, frequency_peak, frequency_offpeak)
+        bus_routes: List of bus route data (id, stops, current_buses)
+        traffic_flows: Dictionary containing traffic flow data
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
+        bus_allocation: Optional dictionary of bus route ID -> number of buses
+                        (e.g. from run_transit_optimization) instead of current_buses
+        station_aliases: Optional dictionary of station name -> node ID (see resolve_station)
+    
+    Returns:
+        transit: Dictionary with stop tables ('stops', 'stop_index', 'stop_routes',
+                 'stop_route_offsets', 'footpaths', 'footpath_offsets'), route tables
+                 ('route_ids', 'route_modes', 'route_stops', 'route_offsets',
+                 'num_trips', 'time_offsets', 'stop_times'), 'unmapped_stops' and
+                 'dropped_routes' (line ID -> reason)
+    """
+    table = get_period_weights(network, traffic_flows)
+    road_arcs = table["arc_weights"][time_period]
+    
+    lines = []
+    unmapped = set()
+    dropped = {}
+    for mode, line_list, key in (("metro", metro_lines, "stations"), ("bus", bus_routes, "stops")):
+        for line in line_list:
+            nodes = []
+            for name in line[key]:
+                node = resolve_station(network, name, station_aliases)
+                if node is None:
+                    unmapped.add(name)
+                elif not nodes or nodes[-1] != node:
+                    nodes.append(node)
+            if len(nodes) >= 2:
+                lines.append((mode, line, nodes))
+            else:
+                dropped[line["id"]] = "fewer than two known stops"
+    
+    # Road searches from every bus stop give the bus segment times
+    road_time = {}
+    for node in sorted({node for mode, _, nodes in lines if mode == "bus" for node in nodes}):
+        road_time[node], _, _ = dijkstra_search(network, road_arcs, [node])
+    
+    allocation = bus_allocation or {}
+    routes = []
+    for mode, line, nodes in lines:
+        if mode == "bus" and any(road_time[a][b] == math.inf for a, b in zip(nodes, nodes[1:])):
+            dropped[line["id"]] = "no road between consecutive stops"
+            continue
+        
+        for direction, sequence in (("outbound", nodes), ("inbound", nodes[::-1])):
+            if mode == "metro":
+                segments = [straight_line_km(network, a, b) / METRO_SPEED * 60 + METRO_DWELL_MINUTES
+                            for a, b in zip(sequence, sequence[1:])]
+                if time_period in PEAK_PERIODS:
+                    headway = line.get("frequency_peak", 5)
+                else:
+                    headway = line.get("frequency_offpeak", 10)
+            else:
+                segments = [road_time[a][b] + BUS_DWELL_MINUTES for a, b in zip(sequence, sequence[1:])]
+                buses = max(allocation.get(line["id"], line.get("current_buses", 1)), 1)
+                headway = (2 * sum(segments) + 2 * BUS_LAYOVER_MINUTES) / buses
+            
+            routes.append((f"{line['id']} {direction}", mode, sequence, segments, headway))
+    
+    stop_nodes = sorted({node for _, _, sequence, _, _ in routes for node in sequence})
+    
+    # Pack routes: stops of route r are route_stops[route_offsets[r]:route_offsets[r + 1]],
+    # and the times of trip j at position p are stop_times[time_offsets[r] + p * num_trips[r] + j]
+    # (column-major, so each stop's departures are one sorted run)
+    stop_index = {node: i for i, node in enumerate(stop_nodes)}
+    route_stops = []
+    route_offsets = [0]
+    num_trips = []
+    time_offsets = []
+    stop_times = []
+    stop_route_lists = [[] for _ in stop_nodes]
+    
+    for r, (_, _, sequence, segments, headway) in enumerate(routes):
+        for position, node in enumerate(sequence):
+            stop_route_lists[stop_index[node]].append((r, position))
+        route_stops.extend(stop_index[node] for node in sequence)
+        route_offsets.append(len(route_stops))
+        
+        first_departures = np.arange(0.0, TIMETABLE_END, headway)
+        elapsed = np.concatenate([[0.0], np.cumsum(segments)])
+        num_trips.append(len(first_departures))
+        time_offsets.append(len(stop_times))
+        stop_times.extend((elapsed[:, None] + first_departures[None, :]).ravel().tolist())
+    
+    stop_routes = [entry for entries in stop_route_lists for entry in entries]
+    stop_route_offsets = np.cumsum([0] + [len(entries) for entries in stop_route_lists]).tolist()
+    
+    # Walking transfers between nearby stops
+    walk_arcs = (network['distance'] * (60 / WALK_SPEED))[network['arc_edge']].tolist()
+    footpaths = []
+    footpath_offsets = [0]
+    for node in stop_nodes:
+        _, dist = truncated_search(network, walk_arcs, [node], MAX_TRANSFER_WALK_MINUTES)
+        footpaths.extend((stop_index[other], minutes) for other, minutes in dist.items()
+                         if other != node and other in stop_index)
+        footpath_offsets.append(len(footpaths))
+    
+    return {
+        "stops": stop_nodes,
+        "stop_index": stop_index,
+        "stop_routes": stop_routes,
+        "stop_route_offsets": stop_route_offsets,
+        "footpaths": footpaths,
+        "footpath_offsets": footpath_offsets,
+        "route_ids": [route[0] for route in routes],
+        "route_modes": [route[1] for route in routes],
+        "route_stops": route_stops,
+        "route_offsets": route_offsets,
+        "num_trips": num_trips,
+        "time_offsets": time_offsets,
+        "stop_times": stop_times,
+        "unmapped_stops": sorted(unmapped),
+        "dropped_routes": dropped
+    }
+
+def get_transit_network(network, metro_lines, bus_routes, traffic_flows, time_period, bus_allocation=None,
+                        station_aliases=None):
+    """
+    Returns the cached transit tables for a period, rebuilding them when their inputs change.
+    
+    Args:
+        network: CSR road network
+        metro_lines: List of metro line data
+        bus_routes: List of bus route data
+        traffic_flows: Dictionary containing traffic flow data
+        time_period: Time period to consider
+        bus_allocation: Optional dictionary of bus route ID -> number of buses
+        station_aliases: Optional dictionary of station name -> node ID
+    
+    Returns:
+        transit: Transit tables (see build_transit_network)
+    """
+    key = (
+        time_period,
+        traffic_fingerprint(traffic_flows, TIME_PERIODS),
+        repr(metro_lines),
+        repr(bus_routes),
+        tuple(sorted((bus_allocation or {}).items())),
+        repr(station_aliases)
+    )
+    
+    cache = network.setdefault('_transit', {})
+    if key not in cache:
+        # Only the latest tables per period are kept
+        for stale in [k for k in cache if k[0] == time_period]:
+            del cache[stale]
+        cache[key] = build_transit_network(network, metro_lines, bus_routes, traffic_flows, time_period,
+                                           bus_allocation, station_aliases)
+    return cache[key]
+
+def raptor_search(transit, access, egress, departure, max_transfers=MAX_TRANSFERS):
+    """
+    Runs a round-based (RAPTOR) earliest-arrival search.
+    
+    Round k finds the earliest arrival at every stop using k vehicles. Each round
+    scans every route serving a stop improved in the previous round once, in stop
+    order, hopping onto the earliest catchable trip, so no priority queue is needed.
+    The rounds yield the Pareto set of arrival time against number of vehicles.
+    
+    Args:
+        transit: Transit tables (see build_transit_network)
+        access: Dictionary of stop index -> minutes from the origin to the stop
+        egress: Dictionary of stop index -> minutes from the stop to the destination
+        departure: Departure time in minutes after midnight
+        max_transfers: Maximum number of changes between vehicles
+    
+    Returns:
+        journeys: List of (vehicles, arrival, label) tuples, one for each round (from
+                  round 0, without any vehicle) that improved the arrival at the destination; the label at the last stop
+                  links back through every leg of the journey
+    """
+    num_stops = len(transit['stops'])
+    stop_routes = transit['stop_routes']
+    stop_route_offsets = transit['stop_route_offsets']
+    footpaths = transit['footpaths']
+    footpath_offsets = transit['footpath_offsets']
+    route_stops = transit['route_stops']
+    route_offsets = transit['route_offsets']
+    num_trips = transit['num_trips']
+    time_offsets = transit['time_offsets']
+    stop_times = transit['stop_times']
+    
+    # best[p]: earliest arrival at p over all rounds; ready[p]: earliest boarding time at p.
+    # Labels record how a stop was reached and link back to the label boarded from
+    best = [math.inf] * num_stops
+    best_label = [None] * num_stops
+    ready = [math.inf] * num_stops
+    ready_label = [None] * num_stops
+    marked = set()
+    
+    for stop, minutes in access.items():
+        best[stop] = ready[stop] = departure + minutes
+        best_label[stop] = ready_label[stop] = ("access", stop, minutes)
+        marked.add(stop)
+    
+    # Round 0: reaching the destination from a stop without boarding anything
+    journeys = []
+    target_arrival = math.inf
+    final_label = None
+    for p in marked:
+        if p in egress and best[p] + egress[p] < target_arrival:
+            target_arrival = best[p] + egress[p]
+            final_label = best_label[p]
+    if final_label is not None:
+        journeys.append((0, target_arrival, final_label))
+    
+    for k in range(1, max_transfers + 2):
+        # Each route is scanned from the earliest marked stop it serves
+        queue = {}
+        for p in marked:
+            for i in range(stop_route_offsets[p], stop_route_offsets[p + 1]):
+                r, position = stop_routes[i]
+                if position < queue.get(r, math.inf):
+                    queue[r] = position
+        
+        marked = set()
+        
+        for r, start in queue.items():
+            first = route_offsets[r]
+            length = route_offsets[r + 1] - first
+            trips = num_trips[r]
+            base = time_offsets[r]
+            
+            trip = -1
+            boarded = None
+            for position in range(start, length):
+                p = route_stops[first + position]
+                column = base + position * trips
+                
+                if trip != -1:
+                    arrival = stop_times[column + trip]
+                    if arrival < best[p] and arrival < target_arrival:
+                        best[p] = arrival
+                        best_label[p] = ("trip", r, trip, boarded, position)
+                        marked.add(p)
+                
+                # Hop onto an earlier trip if the previous rounds reach this stop in time
+                if ready[p] < math.inf and (trip == -1 or ready[p] < stop_times[column + trip]):
+                    earlier = bisect_left(stop_times, ready[p], column, column + trips) - column
+                    if earlier < trips and earlier != trip:
+                        trip = earlier
+                        boarded = (position, ready_label[p])
+        
+        # Walking transfers from stops reached by a vehicle in this round
+        for p in list(marked):
+            label = best_label[p]
+            if label[0] != "trip":
+                continue
+            for i in range(footpath_offsets[p], footpath_offsets[p + 1]):
+                q, minutes = footpaths[i]
+                arrival = best[p] + minutes
+                if arrival < best[q] and arrival < target_arrival:
+                    best[q] = arrival
+                    best_label[q] = ("walk", q, minutes, label)
+                    marked.add(q)
+        
+        # Changing vehicles takes CHANGE_MINUTES; an earlier label may still board sooner
+        for p in marked:
+            if best[p] + CHANGE_MINUTES < ready[p]:
+                ready[p] = best[p] + CHANGE_MINUTES
+                ready_label[p] = best_label[p]
+        
+        # Best arrival at the destination using k vehicles
+        final_label = None
+        for p in marked:
+            if p in egress and best[p] + egress[p] < target_arrival:
+                target_arrival = best[p] + egress[p]
+                final_label = best_label[p]
+        if final_label is not None:
+            journeys.append((k, target_arrival, final_label))
+        
+        if not marked:
+            break
+    
+    return journeys
+
+def _label_stop(transit, label):
+    """Stop index a label arrives at"""
+    if label[0] == "trip":
+        _, r, _, _, position = label
+        return transit['route_stops'][transit['route_offsets'][r] + position]
+    return label[1]
+
+def _journey_legs(transit, network, label, departure):
+    """Follow a label chain back to the origin into a list of journey legs"""
+    node_names = network['node_names']
+    stops = transit['stops']
+    stop_times = transit['stop_times']
+    
+    legs = []
+    while True:
+        stop = _label_stop(transit, label)
+        
+        if label[0] == "access":
+            legs.append({"mode": "access", "route": None, "from": None, "to": node_names[stops[stop]],
+                         "depart": departure, "arrive": departure + label[2]})
+            break
+        
+        if label[0] == "walk":
+            # Walks always start where the previous vehicle was left
+            _, _, minutes, label = label
+            _, r, trip, _, position = label
+            left = stop_times[transit['time_offsets'][r] + position * transit['num_trips'][r] + trip]
+            legs.append({"mode": "walk", "route": None,
+                         "from": node_names[stops[_label_stop(transit, label)]], "to": node_names[stops[stop]],
+                         "depart": left, "arrive": left + minutes})
+            continue
+        
+        _, r, trip, (board_position, previous), alight_position = label
+        trips = transit['num_trips'][r]
+        base = transit['time_offsets'][r]
+        legs.append({
+            "mode": transit['route_modes'][r],
+            "route": transit['route_ids'][r],
+            "from": node_names[stops[_label_stop(transit, previous)]],
+            "to": node_names[stops[stop]],
+            "depart": stop_times[base + board_position * trips + trip],
+            "arrive": stop_times[base + alight_position * trips + trip],
+            "stops": alight_position - board_position
+        })
+        label = previous
+    
+    legs.reverse()
+    return legs
+
+def run_journey_planner(network, origin, destination, departure_time, time_period, traffic_flows,
+                        metro_lines, bus_routes, access_mode='walk', objective='earliest',
+                        max_transfers=MAX_TRANSFERS, bus_allocation=None, station_aliases=None):
+    """
+    Plans a public transport journey over the metro lines and bus routes.
+    
+    The origin and destination are road network nodes; the first and last legs are
+    walked (or driven, with access_mode='drive') over the road network to any stop
+    within MAX_ACCESS_MINUTES.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        origin: ID of the origin node
+        destination: ID of the destination node
+        departure_time: Departure time in minutes after midnight
+        time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
+        traffic_flows: Dictionary containing traffic flow data
+        metro_lines: List of metro line data
+        bus_routes: List of bus route data
+        access_mode: 'walk' or 'drive' for the legs to and from the stops
+        objective: 'earliest' (earliest arrival) or 'fewest_transfers'
+        max_transfers: Maximum number of changes between vehicles
+        bus_allocation: Optional dictionary of bus route ID -> number of buses
+        station_aliases: Optional dictionary of station name -> node ID (data['station_aliases'])
+    
+    Returns:
+        journey: Dictionary with 'arrival', 'travel_time', 'vehicles', 'transfers' and 'legs'
+                 (None if the destination cannot be reached)
+        results: Dictionary with every Pareto-optimal journey ('journeys', by number
+                 of transfers), the stops used for access and egress, and the stops
+                 and routes that could not be placed on the network
+    """
+    node_index = network['node_index']
+    if origin not in node_index or destination not in node_index:
+        return None, {"error": "Unknown node"}
+    
+    transit = get_transit_network(network, metro_lines, bus_routes, traffic_flows, time_period, bus_allocation,
+                                  station_aliases)
+    stop_index = transit['stop_index']
+    
+    if access_mode == 'drive':
+        access_arcs = get_period_weights(network, traffic_flows)["arc_weights"][time_period]
+    else:
+        access_arcs = (network['distance'] * (60 / WALK_SPEED))[network['arc_edge']].tolist()
+    
+    # Roads are two-way with one weight, so one search from each end covers access and egress
+    _, from_origin = truncated_search(network, access_arcs, [node_index[origin]], MAX_ACCESS_MINUTES)
+    _, to_destination = truncated_search(network, access_arcs, [node_index[destination]], MAX_ACCESS_MINUTES)
+    access = {stop_index[node]: minutes for node, minutes in from_origin.items() if node in stop_index}
+    egress = {stop_index[node]: minutes for node, minutes in to_destination.items() if node in stop_index}
+    
+    journeys = []
+    
+    # Going straight there without any vehicle
+    direct = from_origin.get(node_index[destination])
+    if direct is not None:
+        journeys.append({
+            "arrival": departure_time + direct,
+            "travel_time": direct,
+            "vehicles": 0,
+            "transfers": 0,
+            "legs": [{"mode": access_mode, "route": None, "from": get_node_name(network, origin),
+                      "to": get_node_name(network, destination), "depart": departure_time,
+                      "arrive": departure_time + direct}]
+        })
+    
+    node_names = network['node_names']
+    for vehicles, arrival, label in raptor_search(transit, access, egress, departure_time, max_transfers):
+        if journeys and arrival >= journeys[-1]["arrival"]:
+            continue
+        if journeys and journeys[-1]["vehicles"] == vehicles:
+            # Passing a stop on foot beats the direct leg
+            journeys.pop()
+        final_stop = _label_stop(transit, label)
+        legs = _journey_legs(transit, network, label, departure_time)
+        legs[0]["mode"] = access_mode
+        legs[0]["from"] = get_node_name(network, origin)
+        last = legs[-1]["arrive"]
+        legs.append({"mode": access_mode, "route": None, "from": node_names[transit['stops'][final_stop]],
+                     "to": get_node_name(network, destination), "depart": last, "arrive": arrival})
+        journeys.append({
+            "arrival": arrival,
+            "travel_time": arrival - departure_time,
+            "vehicles": vehicles,
+            "transfers": max(vehicles - 1, 0),
+            "legs": [leg for leg in legs if leg["arrive"] > leg["depart"] or leg["mode"] not in ("walk", "drive")]
+        })
+    
+    results = {
+        "journeys": journeys,
+        "access_stops": [node_names[transit['stops'][s]] for s in access],
+        "egress_stops": [node_names[transit['stops'][s]] for s in egress],
+        "unmapped_stops": transit['unmapped_stops'],
+        "dropped_routes": transit['dropped_routes']
+    }
+    
+    if not journeys:
+        return None, results
+    if objective == 'fewest_transfers':
+        return journeys[0], results
+    return journeys[-1], results
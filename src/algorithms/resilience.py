@@ -0,0 +1,223 @@
+import numpy as np
+
+from src.data.network import get_adjacency, FACILITY_MEDICAL
+
+def build_resilience_index(network, closed_roads=None, hospital_ids=None):
+    """
+    Finds bridges, articulation points and 2-edge-connected components in one pass.
+    
+    A single depth-first search with low-link values marks every road whose
+    closure disconnects the network (a bridge) and every junction whose loss
+    does. Nodes are numbered in discovery order, so the part cut off by closing
+    a bridge is the search subtree below it: one contiguous range of that order.
+    Hospital counts are kept as prefix sums over the same order, which turns
+    "who loses hospital access if this road closes" into a range lookup.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        closed_roads: Optional iterable of "from-to" road IDs that are already closed
+        hospital_ids: List of hospital node IDs (defaults to every Medical facility)
+    
+    Returns:
+        index: Dictionary with 'bridges' (edge indices), 'articulation_points'
+               (node indices), per-node 'component' (2-edge-connected component)
+               and 'connected' (connected component) labels, and the lookup
+               arrays used by road_closure_impact
+    """
+    indptr, indices, arc_edge = get_adjacency(network)
+    num_nodes = network['num_nodes']
+    road_lookup = {road_id: e for e, road_id in enumerate(network['road_ids'])}
+    
+    is_open = [True] * network['num_edges']
+    for road_id in closed_roads or ():
+        if road_id in road_lookup:
+            is_open[road_lookup[road_id]] = False
+    
+    disc = [-1] * num_nodes
+    low = [0] * num_nodes
+    size = [1] * num_nodes
+    parent = [-1] * num_nodes
+    parent_edge = [-1] * num_nodes
+    root_of = [-1] * num_nodes
+    order = []
+    bridge_child = [-1] * network['num_edges']
+    is_articulation = [False] * num_nodes
+    
+    for root in range(num_nodes):
+        if disc[root] != -1:
+            continue
+        
+        disc[root] = low[root] = len(order)
+        root_of[root] = root
+        order.append(root)
+        root_children = 0
+        stack = [[root, indptr[root]]]
+        
+        # Iterative DFS; each frame holds the node and its next arc to look at
+        while stack:
+            frame = stack[-1]
+            u, arc = frame
+            if arc < indptr[u + 1]:
+                frame[1] += 1
+                e = arc_edge[arc]
+                # Skip closed roads and the road we came in on (but not parallel roads)
+                if not is_open[e] or e == parent_edge[u]:
+                    continue
+                v = indices[arc]
+                if disc[v] == -1:
+                    disc[v] = low[v] = len(order)
+                    parent[v] = u
+                    parent_edge[v] = e
+                    root_of[v] = root
+                    order.append(v)
+                    stack.append([v, indptr[v]])
+                    if u == root:
+                        root_children += 1
+                elif disc[v] < low[u]:
+                    low[u] = disc[v]
+                continue
+            
+            stack.pop()
+            p = parent[u]
+            if p == -1:
+                continue
+            size[p] += size[u]
+            if low[u] < low[p]:
+                low[p] = low[u]
+            # No back edge from below u reaches above p
+            if low[u] > disc[p]:
+                bridge_child[parent_edge[u]] = u
+            if p != root and low[u] >= disc[p]:
+                is_articulation[p] = True
+        
+        if root_children > 1:
+            is_articulation[root] = True
+    
+    # A node shares its parent's 2-edge-connected component unless it hangs below a bridge
+    component = [-1] * num_nodes
+    num_components = 0
+    for v in order:
+        if parent[v] == -1 or bridge_child[parent_edge[v]] == v:
+            component[v] = num_components
+            num_components += 1
+        else:
+            component[v] = component[parent[v]]
+    
+    if hospital_ids is None:
+        hospitals = np.flatnonzero(network['facility_flags'] & FACILITY_MEDICAL)
+    else:
+        hospitals = [network['node_index'][h] for h in hospital_ids if h in network['node_index']]
+    is_hospital = np.zeros(num_nodes, dtype=np.int64)
+    is_hospital[hospitals] = 1
+    
+    order = np.array(order, dtype=np.int64)
+    hospital_prefix = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(is_hospital[order], out=hospital_prefix[1:])
+    
+    return {
+        "bridges": [e for e, child in enumerate(bridge_child) if child != -1],
+        "articulation_points": [v for v in range(num_nodes) if is_articulation[v]],
+        "component": component,
+        "num_components": num_components,
+        "connected": root_of,
+        "order": order,
+        "disc": disc,
+        "size": size,
+        "bridge_child": bridge_child,
+        "hospital_prefix": hospital_prefix,
+        "road_lookup": road_lookup
+    }
+
+def get_resilience_index(network, closed_roads=None):
+    """
+    Returns the cached resilience index for a set of closed roads, building it on first use.
+    
+    Args:
+        network: CSR road network
+        closed_roads: Optional iterable of "from-to" road IDs that are closed
+    
+    Returns:
+        index: Resilience index (see build_resilience_index)
+    """
+    key = frozenset(closed_roads or ())
+    cache = network.setdefault('_resilience', {})
+    if key not in cache:
+        cache[key] = build_resilience_index(network, key)
+    return cache[key]
+
+def road_closure_impact(network, index, from_id, to_id):
+    """
+    Looks up what closing a road disconnects, without searching the network.
+    
+    Args:
+        network: CSR road network
+        index: Resilience index (see build_resilience_index)
+        from_id: ID of the road's first endpoint
+        to_id: ID of the road's second endpoint
+    
+    Returns:
+        impact: Dictionary with 'is_bridge', the node IDs split off from the rest
+                ('separated_nodes', the side without the search root), the
+                districts left without any reachable hospital
+                ('districts_losing_access') and their 'population_affected'
+    """
+    lookup = index['road_lookup']
+    edge = lookup.get(f"{from_id}-{to_id}", lookup.get(f"{to_id}-{from_id}"))
+    if edge is None:
+        raise KeyError(f"No road between {from_id} and {to_id}")
+    
+    impact = {"is_bridge": False, "separated_nodes": [], "districts_losing_access": [], "population_affected": 0.0}
+    child = index['bridge_child'][edge]
+    if child == -1:
+        return impact
+    
+    order = index['order']
+    disc = index['disc']
+    size = index['size']
+    prefix = index['hospital_prefix']
+    root = index['connected'][child]
+    
+    # The cut-off side is the subtree below the bridge; its connected component is the root's subtree
+    sub_start, sub_end = disc[child], disc[child] + size[child]
+    all_start, all_end = disc[root], disc[root] + size[root]
+    sub_hospitals = prefix[sub_end] - prefix[sub_start]
+    all_hospitals = prefix[all_end] - prefix[all_start]
+    
+    if all_hospitals == 0 or 0 < sub_hospitals < all_hospitals:
+        losing = np.array([], dtype=np.int64)
+    elif sub_hospitals == 0:
+        losing = order[sub_start:sub_end]
+    else:
+        losing = np.concatenate([order[all_start:sub_start], order[sub_end:all_end]])
+    
+    node_ids = network['node_ids']
+    districts = [v for v in losing.tolist() if network['node_kinds'][v] == 'neighborhood']
+    
+    impact["is_bridge"] = True
+    impact["separated_nodes"] = [node_ids[v] for v in order[sub_start:sub_end].tolist()]
+    impact["districts_losing_access"] = [node_ids[v] for v in districts]
+    impact["population_affected"] = float(network['population'][districts].sum())
+    return impact
+
+def critical_roads(network, index):
+    """
+    Ranks every bridge by the population that would lose hospital access if it closed.
+    
+    Args:
+        network: CSR road network
+        index: Resilience index (see build_resilience_index)
+    
+    Returns:
+        roads: List of (road ID, population affected, district IDs) tuples for
+               bridges that cut districts off from every hospital, worst first
+    """
+    roads = []
+    for edge in index['bridges']:
+        from_id = network['node_ids'][network['edge_from'][edge]]
+        to_id = network['node_ids'][network['edge_to'][edge]]
+        impact = road_closure_impact(network, index, from_id, to_id)
+        if impact["districts_losing_access"]:
+            roads.append((network['road_ids'][edge], impact["population_affected"], impact["districts_losing_access"]))
+    
+    roads.sort(key=lambda road: road[1], reverse=True)
+    return roads
@@ -0,0 +1,220 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from src.data.network import get_adjacency
+from src.algorithms.bpr import bpr_travel_times, edge_flow_matrix
+from src.algorithms.shortestpath import TIME_PERIODS, dijkstra_search, get_period_weights
+from src.algorithms.matrix import PARALLEL_MIN_ORIGINS
+
+# Network view installed in each worker process by _init_worker
+_WORKER_STATE = {}
+
+def _init_worker(adjacency, num_nodes, period_arc_weights):
+    """Install the shared adjacency and base period weights once per worker process"""
+    _WORKER_STATE['network'] = {"_adjacency": adjacency, "num_nodes": num_nodes}
+    _WORKER_STATE['arc_weights'] = period_arc_weights
+
+def _run_task(period, arc_changes, sources, targets, want_edges):
+    """Worker entry point: search rows under one scenario's weight mask"""
+    return _masked_rows(_WORKER_STATE['network'], _WORKER_STATE['arc_weights'][period],
+                        arc_changes, sources, targets, want_edges)
+
+def _masked_rows(network, arc_weights, arc_changes, sources, targets, want_edges):
+    """
+    Runs one search per source with a few arc weights overridden.
+    
+    Args:
+        network: CSR road network (only the adjacency and size are used)
+        arc_weights: Shared list of base weights per CSR arc (left untouched)
+        arc_changes: Dictionary of arc position -> scenario weight
+        sources: List of source node indices
+        targets: List of target node indices
+        want_edges: Also return the edges on each source's routes to the targets
+    
+    Returns:
+        rows: List of distance lists, one per source
+        used: List of sets of edge indices per source (None unless want_edges)
+    """
+    if arc_changes:
+        arc_weights = list(arc_weights)
+        for arc, weight in arc_changes.items():
+            arc_weights[arc] = weight
+    
+    rows = []
+    used = [] if want_edges else None
+    for source in sources:
+        dist, pred, pred_edge = dijkstra_search(network, arc_weights, [source])
+        rows.append([dist[t] for t in targets])
+        
+        if want_edges:
+            # Edges on the routes to the targets; only they can make a row change
+            # when scenario weights go up
+            edges = set()
+            seen = set()
+            for t in targets:
+                node = t
+                while pred[node] != -1 and node not in seen:
+                    seen.add(node)
+                    edges.add(pred_edge[node])
+                    node = pred[node]
+            used.append(edges)
+    
+    return rows, used
+
+def _scenario_edge_weights(network, scenario, road_lookup, flow, has_flow, time_periods):
+    """
+    Converts a scenario into new weights for the roads it touches.
+    
+    Returns:
+        changes: Dictionary of edge index -> array of new travel times per period
+                 (inf for closed roads)
+    """
+    def edge_of(road_id):
+        from_id, _, to_id = str(road_id).partition('-')
+        edge = road_lookup.get(str(road_id), road_lookup.get(f"{to_id}-{from_id}"))
+        if edge is None:
+            raise KeyError(f"Unknown road {road_id}")
+        return edge
+    
+    changes = {}
+    conditions = {edge_of(road_id): condition for road_id, condition in scenario.get('conditions', {}).items()}
+    if conditions:
+        edges = np.array(list(conditions), dtype=np.int64)
+        travel_time, _ = bpr_travel_times(
+            network['distance'][edges], network['capacity'][edges],
+            np.array(list(conditions.values()), dtype=float), flow[edges], has_flow[edges]
+        )
+        for edge, times in zip(edges.tolist(), travel_time):
+            changes[edge] = times
+    
+    for road_id in scenario.get('closed_roads', []):
+        changes[edge_of(road_id)] = np.full(len(time_periods), math.inf)
+    
+    return changes
+
+def run_closure_scenarios(network, traffic_flows, scenarios, time_periods=None, origins=None,
+                          destinations=None, processes=None):
+    """
+    Runs a batch of road closure / condition change what-if scenarios.
+    
+    Each scenario is applied as a small set of overridden arc weights on top of
+    the shared period weights, so the network itself is never copied. Base routes
+    are searched once; when a scenario only makes roads slower or closes them,
+    only origins whose base routes use one of those roads are searched again,
+    and all remaining searches are fanned out across a process pool.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data
+        scenarios: List of dictionaries with an optional 'name', 'closed_roads'
+                   (list of "from-to" road IDs) and 'conditions' ({road ID: new condition})
+        time_periods: List of time periods (defaults to all four)
+        origins: List of origin node IDs (defaults to every district)
+        destinations: List of destination node IDs (defaults to the origins)
+        processes: Number of worker processes (None picks automatically, 1 runs serially)
+    
+    Returns:
+        deltas: DataFrame with one row per scenario, period and origin-destination
+                pair whose travel time changed: scenario, time_period, origin,
+                destination, base_time, scenario_time, delta (inf if disconnected)
+    """
+    if time_periods is None:
+        time_periods = TIME_PERIODS
+    if origins is None:
+        origins = [node_id for node_id, kind in zip(network['node_ids'], network['node_kinds']) if kind == 'neighborhood']
+    if destinations is None:
+        destinations = origins
+    
+    node_index = network['node_index']
+    sources = [node_index[o] for o in origins]
+    targets = [node_index[d] for d in destinations]
+    road_lookup = {road_id: e for e, road_id in enumerate(network['road_ids'])}
+    
+    table = get_period_weights(network, traffic_flows)
+    period_arc_weights = {period: table["arc_weights"][period] for period in time_periods}
+    flow, has_flow = edge_flow_matrix(network, traffic_flows, time_periods)
+    
+    # Positions of each edge's two arcs in the CSR arrays
+    edge_arcs = np.argsort(network['arc_edge'], kind='stable').reshape(-1, 2).tolist()
+    
+    if processes is None:
+        searches = len(sources) * len(time_periods) * (len(scenarios) + 1)
+        processes = (os.cpu_count() or 1) if searches >= PARALLEL_MIN_ORIGINS else 1
+    
+    executor = None
+    if processes > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(get_adjacency(network), network['num_nodes'], period_arc_weights)
+        )
+    
+    def run(tasks):
+        # tasks: list of (period, arc_changes, sources, want_edges)
+        if executor is None:
+            return [_masked_rows(network, period_arc_weights[period], changes, task_sources, targets, want_edges)
+                    for period, changes, task_sources, want_edges in tasks]
+        futures = [executor.submit(_run_task, period, changes, task_sources, targets, want_edges)
+                   for period, changes, task_sources, want_edges in tasks]
+        return [future.result() for future in futures]
+    
+    try:
+        # Base travel times and the roads each origin's routes use, one task per period
+        base = {}
+        base_used = {}
+        for period, (rows, used) in zip(time_periods, run([(p, {}, sources, True) for p in time_periods])):
+            base[period] = np.array(rows, dtype=float).reshape(len(sources), len(targets))
+            base_used[period] = used
+        
+        tasks = []
+        labels = []
+        for s, scenario in enumerate(scenarios):
+            name = scenario.get('name', f"scenario_{s + 1}")
+            changes = _scenario_edge_weights(network, scenario, road_lookup, flow, has_flow, time_periods)
+            
+            for p, period in enumerate(time_periods):
+                base_weights = table["weights"][period]
+                edge_weights = {edge: float(times[p]) for edge, times in changes.items()
+                                if float(times[p]) != base_weights[edge]}
+                if not edge_weights:
+                    continue
+                
+                if all(weight > base_weights[edge] for edge, weight in edge_weights.items()):
+                    # Slower roads only: origins whose routes avoid them are unaffected
+                    rows = [i for i, used in enumerate(base_used[period]) if not used.isdisjoint(edge_weights)]
+                else:
+                    rows = list(range(len(sources)))
+                if not rows:
+                    continue
+                
+                arc_changes = {arc: weight for edge, weight in edge_weights.items() for arc in edge_arcs[edge]}
+                tasks.append((period, arc_changes, [sources[i] for i in rows], False))
+                labels.append((name, period, rows))
+        
+        results = run(tasks)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    records = []
+    for (name, period, rows), (scenario_rows, _) in zip(labels, results):
+        for i, row in zip(rows, scenario_rows):
+            for j, scenario_time in enumerate(row):
+                base_time = base[period][i, j]
+                if scenario_time != base_time:
+                    records.append({
+                        "scenario": name,
+                        "time_period": period,
+                        "origin": origins[i],
+                        "destination": destinations[j],
+                        "base_time": base_time,
+                        "scenario_time": scenario_time,
+                        "delta": scenario_time - base_time
+                    })
+    
+    return pd.DataFrame(records, columns=[
+        "scenario", "time_period", "origin", "destination", "base_time", "scenario_time", "delta"
+    ])
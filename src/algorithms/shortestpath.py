@@ -1,222 +1,585 @@
-import networkx as nx
+import numpy as np
 import heapq
 import math
-from collections import deque
 
-def run_dijkstra(G, origin, destination, time_period, traffic_flows):
+from src.data.network import condition_fingerprint, get_adjacency, get_node_name, traffic_fingerprint
+from src.algorithms.bpr import edge_flow_matrix, bpr_travel_times
+
+TIME_PERIODS = ["morning_peak", "afternoon", "evening_peak", "night"]
+
+def compile_period_weights(network, traffic_flows, speed_multiplier=1.0, capacity_multiplier=1.0):
+    """
+    Compiles per-edge travel time tables for every time period.
+    
+    Each period gets one contiguous NumPy array aligned with the network's edge arrays,
+    so route queries can look weights up instead of copying the graph and
+    recomputing the BPR function edge by edge.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data
+        speed_multiplier: Free-flow speed multiplier (e.g. from weather conditions)
+        capacity_multiplier: Road capacity multiplier (e.g. from weather conditions)
+    
+    Returns:
+        table: Dictionary with per-period 'weights', 'traffic_factors' and
+               per-arc 'arc_weights' used by the search loops
+    """
+    # Find the traffic flow record for each edge once, for all periods
+    flow, has_flow = edge_flow_matrix(network, traffic_flows, TIME_PERIODS)
+    
+    # One BPR pass over every edge and period
+    travel_time, traffic_factor = bpr_travel_times(
+        network['distance'], network['capacity'], network['condition'], flow, has_flow,
+        speed_multiplier, capacity_multiplier
+    )
+    
+    weights = {}
+    traffic_factors = {}
+    arc_weights = {}
+    for p, period in enumerate(TIME_PERIODS):
+        weights[period] = np.ascontiguousarray(travel_time[:, p])
+        traffic_factors[period] = np.ascontiguousarray(traffic_factor[:, p])
+        arc_weights[period] = weights[period][network['arc_edge']].tolist()
+    
+    return {
+        "weights": weights,
+        "traffic_factors": traffic_factors,
+        "arc_weights": arc_weights,
+        "weights_hash": {}
+    }
+
+def get_period_weights(network, traffic_flows):
+    """
+    Returns the compiled period weight table for a network, compiling it on first use.
+    
+    The table is stored on the network itself and reused for as long as the
+    traffic flow snapshot stays the same.
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+    
+    Returns:
+        table: Compiled period weight table (see compile_period_weights)
+    """
+    traffic_key = traffic_fingerprint(traffic_flows, TIME_PERIODS)
+    
+    cached = network.get('_period_weights')
+    if cached is not None and cached[0] == traffic_key:
+        return cached[1]
+    
+    table = compile_period_weights(network, traffic_flows)
+    network['_period_weights'] = (traffic_key, table)
+    return table
+
+def period_weights_hash(table, period):
+    """
+    Returns the fingerprint of a period's compiled weights, computed once per table.
+    
+    Precomputed indexes (contraction hierarchies, hub labels) store the same
+    fingerprint of the weights they were built for, so comparing the two tells
+    whether an index still matches the current traffic snapshot.
+    
+    Args:
+        table: Compiled period weight table (see compile_period_weights)
+        period: Time period
+    
+    Returns:
+        str: Fingerprint of the period's weights (see src.algorithms.ch.weights_fingerprint)
+    """
+    from src.algorithms.ch import weights_fingerprint
+    
+    hashes = table["weights_hash"]
+    if period not in hashes:
+        hashes[period] = weights_fingerprint(table["weights"][period])
+    return hashes[period]
+
+def dijkstra_search(network, arc_weights, sources, target=None):
+    """
+    Runs Dijkstra's algorithm over the CSR adjacency.
+    
+    Args:
+        network: CSR road network
+        arc_weights: List with one non-negative weight per CSR arc
+        sources: Iterable of source node indices (all start at distance 0)
+        target: Optional node index; the search stops once it is settled
+    
+    Returns:
+        dist: List of distances per node index (inf if unreachable)
+        pred: List of predecessor node index per node (-1 for sources/unreached)
+        pred_edge: List of edge index used to reach each node (-1 if none)
+    """
+    indptr, indices, arc_edge = get_adjacency(network)
+    num_nodes = network['num_nodes']
+    
+    dist = [math.inf] * num_nodes
+    pred = [-1] * num_nodes
+    pred_edge = [-1] * num_nodes
+    settled = [False] * num_nodes
+    
+    heap = []
+    for s in sources:
+        dist[s] = 0.0
+        heap.append((0.0, s))
+    heapq.heapify(heap)
+    
+    while heap:
+        d, u = heapq.heappop(heap)
+        if settled[u]:
+            continue
+        settled[u] = True
+        if u == target:
+            break
+        
+        for arc in range(indptr[u], indptr[u + 1]):
+            v = indices[arc]
+            nd = d + arc_weights[arc]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                pred_edge[v] = arc_edge[arc]
+                heapq.heappush(heap, (nd, v))
+    
+    return dist, pred, pred_edge
+
+def reconstruct_path(pred, pred_edge, target):
+    """
+    Walks predecessor arrays back from a target node.
+    
+    Args:
+        pred: Predecessor node index per node
+        pred_edge: Edge index used to reach each node
+        target: Target node index
+    
+    Returns:
+        nodes: List of node indices from source to target
+        edges: List of edge indices along the path
+    """
+    nodes = [target]
+    edges = []
+    while pred[nodes[-1]] != -1:
+        edges.append(pred_edge[nodes[-1]])
+        nodes.append(pred[nodes[-1]])
+    nodes.reverse()
+    edges.reverse()
+    return nodes, edges
+
+def bidirectional_dijkstra(network, arc_weights, source, target):
+    """
+    Runs a point-to-point Dijkstra from both ends at once.
+    
+    Roads are two-way with one weight per road, so the backward search uses the
+    same arcs as the forward one. The search with the smaller queue key advances,
+    and both stop once their keys together reach the best meeting cost, so far
+    fewer nodes are settled than by a one-sided search.
+    
+    Args:
+        network: CSR road network
+        arc_weights: List with one non-negative weight per CSR arc, equal in both directions
+        source: Source node index
+        target: Target node index
+    
+    Returns:
+        length: Shortest path cost (inf if unreachable)
+        path_nodes: List of node indices (None if unreachable)
+        path_edge_ids: List of edge indices along the path
+        settled: Number of nodes settled by both searches
+    """
+    if source == target:
+        return 0.0, [source], [], 0
+    
+    indptr, indices, arc_edge = get_adjacency(network)
+    num_nodes = network['num_nodes']
+    
+    # Index 0 is the forward search from source, 1 the backward search from target
+    dist = ([math.inf] * num_nodes, [math.inf] * num_nodes)
+    pred = ([-1] * num_nodes, [-1] * num_nodes)
+    pred_edge = ([-1] * num_nodes, [-1] * num_nodes)
+    done = ([False] * num_nodes, [False] * num_nodes)
+    heaps = ([(0.0, source)], [(0.0, target)])
+    dist[0][source] = 0.0
+    dist[1][target] = 0.0
+    
+    best = math.inf
+    meet = -1
+    settled = 0
+    
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        heap = heaps[side]
+        d, u = heapq.heappop(heap)
+        done_here = done[side]
+        if done_here[u]:
+            continue
+        done_here[u] = True
+        settled += 1
+        
+        dist_here, dist_there = dist[side], dist[1 - side]
+        pred_here, pred_edge_here = pred[side], pred_edge[side]
+        for arc in range(indptr[u], indptr[u + 1]):
+            v = indices[arc]
+            nd = d + arc_weights[arc]
+            if nd < dist_here[v]:
+                dist_here[v] = nd
+                pred_here[v] = u
+                pred_edge_here[v] = arc_edge[arc]
+                heapq.heappush(heap, (nd, v))
+                
+                # A node labelled from both ends closes a candidate path
+                if nd + dist_there[v] < best:
+                    best = nd + dist_there[v]
+                    meet = v
+    
+    if meet == -1:
+        return math.inf, None, [], settled
+    
+    # Forward half: source -> meet, then backward half: meet -> target
+    path_nodes, path_edge_ids = reconstruct_path(pred[0], pred_edge[0], meet)
+    node = meet
+    while pred[1][node] != -1:
+        path_edge_ids.append(pred_edge[1][node])
+        node = pred[1][node]
+        path_nodes.append(node)
+    
+    return dist[0][meet] + dist[1][meet], path_nodes, path_edge_ids, settled
+
+def _period_route(network, table, period, source, target, hierarchies=None, landmarks=None):
+    """
+    Finds the shortest route for one period, using its contraction hierarchy
+    (if built for the current weights) or landmark bounds when available.
+    
+    Returns:
+        travel_time: Route cost in minutes (inf if unreachable)
+        path_nodes: List of node indices (None if unreachable)
+        path_edge_ids: List of edge indices along the route
+        settled: Nodes settled by the graph search (None when a hierarchy answered)
+    """
+    # A hierarchy built from other data or an older traffic snapshot would route on stale costs
+    hierarchy = hierarchies.get(period) if hierarchies else None
+    if (hierarchy is not None and hierarchy['network_version'] == network['version']
+            and hierarchy['weights_hash'] == period_weights_hash(table, period)):
+        from src.algorithms.ch import ch_shortest_path
+        return ch_shortest_path(hierarchy, source, target) + (None,)
+    
+    if landmarks and period in landmarks:
+        from src.algorithms.alt import alt_heuristic
+        heuristic = alt_heuristic(landmarks[period], target)
+        return _a_star_search(network, table["arc_weights"][period], source, target, heuristic)
+    
+    return bidirectional_dijkstra(network, table["arc_weights"][period], source, target)
+
+def describe_route(network, table, time_period, path_nodes, path_edge_ids):
+    """
+    Expands a route into the per-road records and display table used by route results.
+    
+    Args:
+        network: CSR road network
+        table: Compiled period weight table (see compile_period_weights)
+        time_period: Time period the route was computed for
+        path_nodes: List of node indices along the route
+        path_edge_ids: List of edge indices along the route
+    
+    Returns:
+        path: List of node IDs
+        path_edges: List of per-road dictionaries (from, to, distance, time, traffic_factor, road_type)
+        total_distance: Route length in km
+        congestion_level: Average congestion on a 1-10 scale
+        route_details: List of display rows
+    """
+    node_ids = network['node_ids']
+    path = [node_ids[i] for i in path_nodes]
+    
+    # Get edges along the path
+    path_edges = []
+    total_distance = 0
+    
+    weights = table["weights"][time_period]
+    traffic_factors = table["traffic_factors"][time_period]
+    
+    for i, e in enumerate(path_edge_ids):
+        # Extract relevant information
+        road_info = {
+            "from": path[i],
+            "to": path[i + 1],
+            "distance": float(network['distance'][e]),
+            "time": float(weights[e]),
+            "traffic_factor": float(traffic_factors[e]),
+            "road_type": network['road_type']
+        }
+        
+        path_edges.append(road_info)
+        total_distance += road_info["distance"]
+    
+    # Calculate congestion level (1-10 scale)
+    avg_traffic_factor = sum(edge['traffic_factor'] for edge in path_edges) / len(path_edges) if path_edges else 0
+    congestion_level = min(10, int(avg_traffic_factor * 5))
+    
+    # Create route details for display
+    route_details = []
+    for i, edge in enumerate(path_edges):
+        from_node = get_node_name(network, edge["from"])
+        to_node = get_node_name(network, edge["to"])
+        
+        route_details.append({
+            "Step": i + 1,
+            "From": from_node,
+            "To": to_node,
+            "Distance (km)": f"{edge['distance']:.1f}",
+            "Time (min)": f"{edge['time']:.1f}",
+            "Traffic": "Heavy" if edge['traffic_factor'] > 1.3 else
+                       "Moderate" if edge['traffic_factor'] > 1.1 else "Light"
+        })
+    
+    return path, path_edges, total_distance, congestion_level, route_details
+
+def run_dijkstra(network, origin, destination, time_period, traffic_flows, hierarchies=None, landmarks=None,
+                 compare_periods=False, departure_profile=False):
     """
     Implements Dijkstra's algorithm for finding the shortest path with time-dependent weights.
     
     Args:
-        G: NetworkX graph representing the road network
+        network: CSR road network (see src.data.network)
         origin: ID of the origin node
         destination: ID of the destination node
         time_period: Time period to consider (morning_peak, afternoon, evening_peak, night)
         traffic_flows: Dictionary containing traffic flow data
-        
+        hierarchies: Optional dictionary of time period -> contraction hierarchy
+                     (see src.algorithms.ch) answering queries instead of a graph search;
+                     a hierarchy built from another network or other weights is ignored
+        landmarks: Optional dictionary of time period -> landmark set (see
+                   src.algorithms.alt.get_period_landmarks) guiding an A* search
+        compare_periods: Also compute the travel time when departing at each period's
+                         anchor time (results['time_comparison'])
+        departure_profile: Also compute travel times for every 15-minute departure slot
+                           (results['departure_profile'], e.g. for a chart); the
+                           period comparison is then read from the same profile
+    
     Returns:
         path: List of nodes in the shortest path
         travel_time: Estimated travel time in minutes
         path_edges: List of edges in the path
         results: Dictionary with additional information
     """
-    # Create a copy of the graph to modify weights
-    temp_graph = G.copy()
-    
-    # Dictionary to map bidirectional road IDs
-    road_id_map = {}
-    for road_id in traffic_flows:
-        nodes = road_id.split("-")
-        road_id_map[(nodes[0], nodes[1])] = road_id
-        road_id_map[(nodes[1], nodes[0])] = road_id  # Bidirectional
-    
-    # Update edge weights based on time period and traffic flows
-    for u, v, data in temp_graph.edges(data=True):
-        # Create a consistent key for the edge
-        edge_key = (str(u), str(v))
-        reversed_edge_key = (str(v), str(u))
-        
-        # Get original distance
-        distance = data.get('distance', 1.0)
-        
-        # Find traffic flow data for this road if it exists
-        traffic_factor = 1.0
-        
-        if edge_key in road_id_map:
-            road_id = road_id_map[edge_key]
-            if road_id in traffic_flows:
-                # Calculate traffic factor based on flow vs capacity
-                flow = traffic_flows[road_id].get(time_period, 0)
-                capacity = data.get('capacity', 3000)
-                
-                # Volume-to-capacity ratio affects speed
-                v_c_ratio = flow / capacity if capacity > 0 else 1.0
-                
-                # Use BPR function for travel time
-                # t = t0 * (1 + 0.15 * (v/c)^4)
-                traffic_factor = 1.0 + 0.15 * (v_c_ratio ** 4)
-        
-        elif reversed_edge_key in road_id_map:
-            road_id = road_id_map[reversed_edge_key]
-            if road_id in traffic_flows:
-                # Calculate traffic factor based on flow vs capacity
-                flow = traffic_flows[road_id].get(time_period, 0)
-                capacity = data.get('capacity', 3000)
-                
-                # Volume-to-capacity ratio affects speed
-                v_c_ratio = flow / capacity if capacity > 0 else 1.0
-                
-                # Use BPR function for travel time
-                traffic_factor = 1.0 + 0.15 * (v_c_ratio ** 4)
-        
-        # Consider road condition for speed
-        condition = data.get('condition', 5)
-        condition_factor = 1.2 - (condition / 10)  # Better condition means faster travel
-        
-        # Update weight as travel time (distance / speed, where speed is affected by traffic and condition)
-        # Assume base speed of 60 km/h for a road with condition 10 and no traffic
-        time_weight = distance / (60 * (1 / traffic_factor) * (1 / condition_factor)) * 60  # Travel time in minutes
-        
-        # Update the edge weight
-        temp_graph[u][v]['weight'] = time_weight
-        temp_graph[u][v]['time'] = time_weight
-        temp_graph[u][v]['traffic_factor'] = traffic_factor
-    
-    # Run Dijkstra's algorithm
-    try:
-        path = nx.shortest_path(temp_graph, source=origin, target=destination, weight='weight')
-        travel_time = nx.shortest_path_length(temp_graph, source=origin, target=destination, weight='weight')
-        
-        # Get edges along the path
-        path_edges = []
-        total_distance = 0
+    node_index = network['node_index']
+    if origin not in node_index or destination not in node_index:
+        return None, float('inf'), [], {"error": "No path found"}
+    
+    source = node_index[origin]
+    target = node_index[destination]
+    
+    # Look up the compiled weights instead of copying the graph per query
+    table = get_period_weights(network, traffic_flows)
+    
+    # Run a single bidirectional Dijkstra search for both the path and its length
+    travel_time, path_nodes, path_edge_ids, settled = _period_route(network, table, time_period, source, target, hierarchies, landmarks)
+    
+    if travel_time == math.inf:
+        return None, float('inf'), [], {"error": "No path found"}
+    
+    path, path_edges, total_distance, congestion_level, route_details = describe_route(
+        network, table, time_period, path_nodes, path_edge_ids
+    )
+    
+    # Prepare results
+    results = {
+        "total_distance": total_distance,
+        "congestion_level": congestion_level,
+        "route_details": route_details,
+        "settled_nodes": settled
+    }
+    
+    if departure_profile or compare_periods:
+        # Compare with other times of day: travel time when departing at each
+        # period's anchor time, under the same time-dependent model for every period
+        from src.algorithms.profile import (
+            build_travel_time_functions, departure_times, profile_search, PERIOD_ANCHORS, SLOT_MINUTES
+        )
+        ttf = build_travel_time_functions(network, traffic_flows)
+        anchors = [PERIOD_ANCHORS[period] for period in TIME_PERIODS]
         
-        for i in range(len(path) - 1):
-            u = path[i]
-            v = path[i+1]
-            
-            # Get edge data
-            edge_data = temp_graph[u][v]
-            
-            # Extract relevant information
-            road_info = {
-                "from": u,
-                "to": v,
-                "distance": edge_data.get('distance', 0),
-                "time": edge_data.get('time', 0),
-                "traffic_factor": edge_data.get('traffic_factor', 1.0),
-                "road_type": edge_data.get('road_type', 'existing')
+        if departure_profile:
+            # Full profile over every departure slot, only when it is displayed
+            departures, profile_times = profile_search(network, ttf, source, target)
+            results["departure_profile"] = {
+                "departure_minutes": departures.tolist(),
+                "travel_time": profile_times.tolist()
             }
-            
-            path_edges.append(road_info)
-            total_distance += edge_data.get('distance', 0)
-        
-        # Calculate congestion level (1-10 scale)
-        avg_traffic_factor = sum(edge['traffic_factor'] for edge in path_edges) / len(path_edges)
-        congestion_level = min(10, int(avg_traffic_factor * 5))
-        
-        # Compare with other time periods (without recursion)
-        time_comparison = {}
-        for period in ["morning_peak", "afternoon", "evening_peak", "night"]:
-            if period == time_period:
-                # Already calculated for current period
-                time_comparison[period] = travel_time
-                continue
-                
-            # Create a temporary graph for this time period
-            period_graph = G.copy()
-            
-            # Update edge weights for this period
-            for u, v, data in period_graph.edges(data=True):
-                # Create a consistent key for the edge
-                edge_key = (str(u), str(v))
-                reversed_edge_key = (str(v), str(u))
-                
-                # Get original distance
-                distance = data.get('distance', 1.0)
-                
-                # Calculate traffic factor
-                traffic_factor = 1.0
-                if edge_key in road_id_map and road_id_map[edge_key] in traffic_flows:
-                    flow = traffic_flows[road_id_map[edge_key]].get(period, 0)
-                    capacity = data.get('capacity', 3000)
-                    v_c_ratio = flow / capacity if capacity > 0 else 1.0
-                    traffic_factor = 1.0 + 0.15 * (v_c_ratio ** 4)
-                elif reversed_edge_key in road_id_map and road_id_map[reversed_edge_key] in traffic_flows:
-                    flow = traffic_flows[road_id_map[reversed_edge_key]].get(period, 0)
-                    capacity = data.get('capacity', 3000)
-                    v_c_ratio = flow / capacity if capacity > 0 else 1.0
-                    traffic_factor = 1.0 + 0.15 * (v_c_ratio ** 4)
-                
-                # Consider road condition
-                condition = data.get('condition', 5)
-                condition_factor = 1.2 - (condition / 10)
-                
-                # Update weight
-                time_weight = distance / (60 * (1 / traffic_factor) * (1 / condition_factor)) * 60
-                period_graph[u][v]['weight'] = time_weight
-            
-            # Calculate shortest path for this period
-            try:
-                period_time = nx.shortest_path_length(period_graph, source=origin, target=destination, weight='weight')
-                time_comparison[period] = period_time
-            except (nx.NetworkXNoPath, nx.NodeNotFound):
-                time_comparison[period] = float('inf')
-        
-        # Create route details for display
-        route_details = []
-        for i, edge in enumerate(path_edges):
-            from_node = get_node_name(G, edge["from"])
-            to_node = get_node_name(G, edge["to"])
-            
-            route_details.append({
-                "Step": i + 1,
-                "From": from_node,
-                "To": to_node,
-                "Distance (km)": f"{edge['distance']:.1f}",
-                "Time (min)": f"{edge['time']:.1f}",
-                "Traffic": "Heavy" if edge['traffic_factor'] > 1.3 else 
-                           "Moderate" if edge['traffic_factor'] > 1.1 else "Light"
-            })
+            anchor_times = profile_times[[anchor // SLOT_MINUTES for anchor in anchors]]
+        else:
+            # A* per anchor departure, bounded by the route just found
+            anchor_times = departure_times(network, ttf, source, target, anchors, path_edge_ids)
         
-        # Prepare results
-        results = {
-            "total_distance": total_distance,
-            "congestion_level": congestion_level,
-            "time_comparison": time_comparison,
-            "route_details": route_details
+        results["time_comparison"] = {
+            period: float(minutes) for period, minutes in zip(TIME_PERIODS, anchor_times)
         }
-        
-        return path, travel_time, path_edges, results
     
-    except nx.NetworkXNoPath:
-        return None, float('inf'), [], {"error": "No path found"}
+    return path, travel_time, path_edges, results
 
-def get_node_name(G, node_id):
-    """Helper function to get node name from id"""
-    if node_id in G.nodes:
-        if 'name' in G.nodes[node_id]:
-            return G.nodes[node_id]['name']
-    return str(node_id)
+def emergency_penalty_factor(network, min_road_condition):
+    """
+    Computes the per-edge penalty for roads below the minimum acceptable condition.
+    
+    Args:
+        network: CSR road network
+        min_road_condition: Minimum acceptable road condition
+    
+    Returns:
+        penalty_factor: NumPy array, 1.0 for acceptable roads and larger the worse the road
+    """
+    condition = network['condition']
+    return np.where(condition < min_road_condition, 1 + ((min_road_condition - condition) / 5), 1.0)
+
+def emergency_edge_costs(network, min_road_condition):
+    """
+    Computes the per-edge cost model used for emergency routing.
+    
+    Args:
+        network: CSR road network
+        min_road_condition: Minimum acceptable road condition
+    
+    Returns:
+        penalized_distance: Distance with a penalty for roads below the minimum condition
+        edge_cost: Penalized distance weighted by road condition (the A* cost)
+    """
+    # Apply road condition penalties instead of removing edges
+    condition = network['condition']
+    penalized_distance = network['distance'] * emergency_penalty_factor(network, min_road_condition)
+    
+    # Calculate edge cost considering both distance and road condition
+    # Better condition = lower cost
+    condition_penalty = (11 - condition) / 10  # 0 for condition 10, 1 for condition 1
+    edge_cost = penalized_distance * (1 + condition_penalty)
+    
+    return penalized_distance, edge_cost
 
-def run_a_star(G, emergency_location, target_hospital, neighborhoods, facilities, min_road_condition=6):
+def emergency_edge_times(network):
+    """
+    Computes the per-edge driving time of an emergency vehicle in minutes.
+    
+    Args:
+        network: CSR road network
+    
+    Returns:
+        edge_times: NumPy array with one travel time per edge
+    """
+    # Emergency vehicles can travel faster
+    # Better road condition means higher speed (whole condition points, as reported per road)
+    condition = network['condition'].astype(np.int64)
+    speed_factor = 1.0 + (condition / 10) * 0.5  # Up to 50% speed boost for good roads
+    
+    # Emergency speed (km/h) - base 80 km/h adjusted for road condition
+    emergency_speed = 80 * speed_factor
+    
+    # Time in minutes
+    return (network['distance'] / emergency_speed) * 60
+
+def build_nearest_hospital_index(network, hospital_ids, min_road_condition=6):
+    """
+    Builds a "nearest hospital per node" index with one multi-source search.
+    
+    All hospitals start at distance 0, so each node is settled from the hospital
+    with the lowest condition-penalized distance, the criterion run_a_star uses
+    to pick the nearest hospital.
+    
+    Args:
+        network: CSR road network
+        hospital_ids: List of hospital facility IDs
+        min_road_condition: Minimum acceptable road condition
+    
+    Returns:
+        index: Dictionary with per-node 'hospital' index (-1 if unreachable) and
+               'distance' (penalized distance to that hospital) lists
+    """
+    node_index = network['node_index']
+    hospital_nodes = [node_index[h] for h in hospital_ids if h in node_index]
+    
+    penalized_distance, _ = emergency_edge_costs(network, min_road_condition)
+    distance_arcs = penalized_distance[network['arc_edge']].tolist()
+    distance, pred, _ = dijkstra_search(network, distance_arcs, hospital_nodes)
+    
+    # Label every node with the hospital at the root of its search tree
+    hospital = [-1] * network['num_nodes']
+    for h in hospital_nodes:
+        hospital[h] = h
+    for node in range(network['num_nodes']):
+        if hospital[node] != -1 or distance[node] == math.inf:
+            continue
+        chain = []
+        current = node
+        while hospital[current] == -1:
+            chain.append(current)
+            current = pred[current]
+        for n in chain:
+            hospital[n] = hospital[current]
+    
+    return {
+        "hospital": hospital,
+        "distance": distance
+    }
+
+def get_nearest_hospital_index(network, hospital_ids, min_road_condition=6):
+    """
+    Returns the cached nearest-hospital index, rebuilding it when road conditions change.
+    
+    The cache is keyed on the network version and its condition fingerprint
+    (see condition_fingerprint), so a lookup costs no pass over the roads.
+    
+    Args:
+        network: CSR road network
+        hospital_ids: List of hospital facility IDs
+        min_road_condition: Minimum acceptable road condition
+    
+    Returns:
+        index: Nearest hospital index (see build_nearest_hospital_index)
+    """
+    condition_key = (network['version'], condition_fingerprint(network))
+    key = (tuple(hospital_ids), min_road_condition)
+    
+    cache = network.get('_hospital_index')
+    if cache is None or cache['condition_key'] != condition_key:
+        # Road conditions changed (or first use): drop every stale index
+        cache = {"condition_key": condition_key, "indexes": {}}
+        network['_hospital_index'] = cache
+    
+    if key not in cache['indexes']:
+        cache['indexes'][key] = build_nearest_hospital_index(network, hospital_ids, min_road_condition)
+    
+    return cache['indexes'][key]
+
+def invalidate_hospital_index(network):
+    """Drop every cached nearest-hospital index and the condition fingerprint stored on a network"""
+    network.pop('_hospital_index', None)
+    network.pop('_condition_fingerprint', None)
+
+def run_a_star(network, emergency_location, target_hospital, neighborhoods, facilities, min_road_condition=6):
     """
     Implements A* search algorithm for emergency response planning.
     
+    When no target hospital is given, the nearest one (by condition-penalized
+    distance) comes from the cached nearest-hospital index. The route to the
+    chosen hospital is the A* path with the lowest emergency cost.
+    
     Args:
-        G: NetworkX graph representing the road network
+        network: CSR road network (see src.data.network)
         emergency_location: ID of the emergency location
         target_hospital: ID of the target hospital (or None for nearest)
         neighborhoods: List of neighborhood data
         facilities: List of facility data
         min_road_condition: Minimum acceptable road condition
-        
+    
     Returns:
         path: List of nodes in the shortest path
         travel_time: Estimated travel time in minutes
         path_edges: List of edges in the path
         results: Dictionary with additional information
     """
+    node_index = network['node_index']
+    node_ids = network['node_ids']
+    
     # First, make sure the hospital IDs are valid
     hospital_ids = []
     for facility in facilities:
@@ -226,195 +589,172 @@ def run_a_star(G, emergency_location, target_hospital, neighborhoods, facilities
     if not hospital_ids:
         hospital_ids = ["F9", "F10"]  # Fallback to default if no medical facilities found
     
-    # Step 1: Check if the emergency location has any path to a hospital in the original graph
-    original_graph = G.copy()
-    has_any_path = False
-    for hospital_id in hospital_ids:
-        try:
-            if nx.has_path(original_graph, source=emergency_location, target=hospital_id):
-                has_any_path = True
-                break
-        except Exception as e:
-            print(f"Path check error: {str(e)}")
-            continue
+    if emergency_location not in node_index:
+        return None, float('inf'), [], {"error": "No path exists to any hospital in the network"}
+    source = node_index[emergency_location]
+    
+    # The nearest-hospital index answers reachability without another traversal
+    index = get_nearest_hospital_index(network, hospital_ids, min_road_condition)
     
-    if not has_any_path:
+    if index['hospital'][source] == -1:
         # Critical situation: No path exists even in the original graph
         return None, float('inf'), [], {"error": "No path exists to any hospital in the network"}
     
-    # Step 2: Create a copy of the graph for emergency routing
-    emergency_graph = G.copy()
-    
-    # Step 3: Apply road condition penalties instead of removing edges
-    for u, v, data in emergency_graph.edges(data=True):
-        condition = data.get('condition', 5)
-        if condition < min_road_condition:
-            # Apply a penalty based on road condition
-                penalty_factor = 1 + ((min_road_condition - condition) / 5)
-                if 'distance' in data:
-                    emergency_graph[u][v]['distance'] *= penalty_factor
-                # Also store the original distance for travel time calculation
-                emergency_graph[u][v]['original_distance'] = data['distance']
+    penalized_distance, edge_cost = emergency_edge_costs(network, min_road_condition)
     
     # If target hospital not specified, find nearest hospital
     target_hospital_id = target_hospital
     
     if not target_hospital_id:
-        # Use standard Dijkstra to find nearest hospital
-        distances = {}
-        for hospital_id in hospital_ids:
-            try:
-                # Check if there's a path to this hospital
-                path_length = nx.shortest_path_length(
-                    emergency_graph, 
-                    source=emergency_location, 
-                    target=hospital_id, 
-                    weight='distance'
-                )
-                distances[hospital_id] = path_length
-            except nx.NetworkXNoPath:
-                distances[hospital_id] = float('inf')
-        
-        # Find the closest hospital with a valid path
-        if distances:
-            min_distance = float('inf')
-            for hosp_id, dist in distances.items():
-                if dist < min_distance:
-                    min_distance = dist
-                    target_hospital_id = hosp_id
-        else:
-            return None, float('inf'), [], {"error": "No path to any hospital"}
+        # Nearest by condition-penalized distance, straight from the index
+        target_hospital_id = node_ids[index['hospital'][source]]
     
     # Get hospital coordinates
     hospital_data = next((f for f in facilities if f['id'] == target_hospital_id), None)
     
-    if not hospital_data:
+    if not hospital_data or target_hospital_id not in node_index:
         return None, float('inf'), [], {"error": "Hospital not found"}
     
-    hospital_coords = (hospital_data['x'], hospital_data['y'])
+    target = node_index[target_hospital_id]
     
-    # Define heuristic function for A* (Euclidean distance)
-    def heuristic(node):
-        node_data = None
-        
-        # Find coordinates of the node
-        for n in neighborhoods:
-            if n['id'] == node:
-                node_data = n
-                break
-        
-        if not node_data:
-            for f in facilities:
-                if f['id'] == node:
-                    node_data = f
-                    break
+    # Heuristic for every node in one vectorized pass: the tighter of the
+    # landmark bound on the emergency cost and the Euclidean distance
+    from src.algorithms.alt import get_landmarks, alt_heuristic
+    landmark_set = get_landmarks(network, ('emergency', min_road_condition), edge_cost,
+                                 weights_key=(network['version'], condition_fingerprint(network)))
+    heuristic = np.maximum(alt_heuristic(landmark_set, target), euclidean_heuristic(network, target)).tolist()
+    
+    cost_arcs = edge_cost[network['arc_edge']].tolist()
+    _, path_nodes, path_edge_ids, expanded = _a_star_search(network, cost_arcs, source, target, heuristic)
+    
+    if path_nodes is None:
+        return None, float('inf'), [], {"error": "No path found"}
+    
+    path = [node_ids[i] for i in path_nodes]
+    
+    # Calculate travel time and get path edges
+    distance = network['distance']
+    condition = network['condition']
+    edge_times = emergency_edge_times(network)
+    path_edges = []
+    total_distance = 0
+    total_time = 0
+    total_condition = 0
+    
+    for i, e in enumerate(path_edge_ids):
+        # Use original distance for travel time calculation
+        edge_distance = float(distance[e])
+        edge_condition = int(condition[e])
+        time = float(edge_times[e])
         
-        if node_data:
-            # Calculate Euclidean distance
-            node_coords = (node_data['x'], node_data['y'])
-            return math.sqrt((node_coords[0] - hospital_coords[0])**2 + 
-                             (node_coords[1] - hospital_coords[1])**2) * 10  # Scale to km approx
+        road_info = {
+            "from": path[i],
+            "to": path[i + 1],
+            "distance": edge_distance,
+            "time": time,
+            "condition": edge_condition,
+            "road_type": network['road_type']
+        }
         
-        return 0
+        path_edges.append(road_info)
+        total_distance += edge_distance
+        total_time += time
+        total_condition += edge_condition
+    
+    avg_road_condition = total_condition / len(path_edges) if path_edges else 0
+    
+    # Calculate standard routing time for comparison: the index already holds the
+    # penalized distance to the nearest hospital, other targets need a bounded search
+    if index['hospital'][source] == target:
+        standard_time = index['distance'][source] / 60
+    else:
+        distance_arcs = penalized_distance[network['arc_edge']].tolist()
+        standard_dist, _, _ = dijkstra_search(network, distance_arcs, [source], target)
+        standard_time = standard_dist[target] / 60
+    
+    # Prepare results
+    results = {
+        "total_distance": total_distance,
+        "avg_road_condition": avg_road_condition,
+        "standard_time": standard_time,
+        "hospital_id": target_hospital_id,
+        "route_details": path_edges,
+        "expanded_nodes": expanded
+    }
+    
+    return path, total_time, path_edges, results
+
+def euclidean_heuristic(network, target):
+    """
+    Computes the A* Euclidean heuristic from every node to a target at once.
     
-    # Implement A* algorithm
-    open_set = [(0, emergency_location)]  # Priority queue with (f_score, node)
+    Args:
+        network: CSR road network
+        target: Target node index
+    
+    Returns:
+        heuristic: List of cost estimates indexed by node index
+    """
+    x = network['x']
+    y = network['y']
+    return (np.hypot(x - x[target], y - y[target]) * 10).tolist()  # Scale to km approx
+
+def _a_star_search(network, arc_costs, source, target, heuristic):
+    """
+    Runs A* over the CSR adjacency.
+    
+    Args:
+        network: CSR road network
+        arc_costs: List with one non-negative cost per CSR arc
+        source: Source node index
+        target: Target node index
+        heuristic: List of consistent lower bounds on the cost to the target, indexed by node index
+    
+    Returns:
+        cost: Path cost (inf if no path)
+        path_nodes: List of node indices (None if no path)
+        path_edge_ids: List of edge indices along the path
+        expanded: Number of nodes expanded
+    """
+    indptr, indices, arc_edge = get_adjacency(network)
+    
+    open_set = [(heuristic[source], source)]  # Priority queue with (f_score, node)
     came_from = {}
-    g_score = {node: float('inf') for node in emergency_graph.nodes()}
-    g_score[emergency_location] = 0
-    f_score = {node: float('inf') for node in emergency_graph.nodes()}
-    f_score[emergency_location] = heuristic(emergency_location)
+    came_by_edge = {}
+    g_score = [float('inf')] * network['num_nodes']
+    g_score[source] = 0
+    expanded = 0
     
     while open_set:
         # Get node with lowest f_score
         current_f, current = heapq.heappop(open_set)
         
-        if current == target_hospital_id:
+        if current_f > g_score[current] + heuristic[current]:
+            # Stale entry, a cheaper route to this node was already expanded
+            continue
+        expanded += 1
+        
+        if current == target:
             # Reconstruct path
-            path = [current]
+            path_nodes = [current]
+            path_edge_ids = []
             while current in came_from:
+                path_edge_ids.append(came_by_edge[current])
                 current = came_from[current]
-                path.append(current)
-            path.reverse()
-            
-            # Calculate travel time and get path edges
-            path_edges = []
-            total_distance = 0
-            total_time = 0
-            total_condition = 0
-            
-            for i in range(len(path) - 1):
-                u = path[i]
-                v = path[i+1]
-                
-                # Get edge data
-                edge_data = emergency_graph[u][v]
-                
-                # Use original distance for travel time calculation
-                distance = edge_data.get('original_distance', edge_data.get('distance', 0))
-                condition = edge_data.get('condition', 5)
-                
-                # Emergency vehicles can travel faster
-                # Better road condition means higher speed
-                speed_factor = 1.0 + (condition / 10) * 0.5  # Up to 50% speed boost for good roads
-                
-                # Emergency speed (km/h) - base 80 km/h adjusted for road condition
-                emergency_speed = 80 * speed_factor
-                
-                # Time in minutes
-                time = (distance / emergency_speed) * 60
-                
-                road_info = {
-                    "from": u,
-                    "to": v,
-                    "distance": distance,
-                    "time": time,
-                    "condition": condition,
-                    "road_type": edge_data.get('road_type', 'existing')
-                }
-                
-                path_edges.append(road_info)
-                total_distance += distance
-                total_time += time
-                total_condition += condition
-            
-            avg_road_condition = total_condition / len(path_edges) if path_edges else 0
-            
-            # Calculate standard routing time for comparison
-            try:
-                standard_time = nx.shortest_path_length(emergency_graph, source=emergency_location, target=target_hospital_id, weight='distance') / 60
-            except nx.NetworkXNoPath:
-                standard_time = float('inf')
-            
-            # Prepare results
-            results = {
-                "total_distance": total_distance,
-                "avg_road_condition": avg_road_condition,
-                "standard_time": standard_time,
-                "hospital_id": target_hospital_id,
-                "route_details": path_edges
-            }
-            
-            return path, total_time, path_edges, results
+                path_nodes.append(current)
+            path_nodes.reverse()
+            path_edge_ids.reverse()
+            return g_score[target], path_nodes, path_edge_ids, expanded
         
         # Explore neighbors
-        for neighbor in emergency_graph.neighbors(current):
-            # Calculate edge cost considering both distance and road condition
-            edge_data = emergency_graph[current][neighbor]
-            distance = edge_data.get('distance', 0)
-            condition = edge_data.get('condition', 5)
-            
-            # Calculate edge cost: distance * (1 + condition penalty)
-            # Better condition = lower cost
-            condition_penalty = (11 - condition) / 10  # 0 for condition 10, 1 for condition 1
-            edge_cost = distance * (1 + condition_penalty)
-            
-            tentative_g_score = g_score[current] + edge_cost
+        for arc in range(indptr[current], indptr[current + 1]):
+            neighbor = indices[arc]
+            tentative_g_score = g_score[current] + arc_costs[arc]
             
             if tentative_g_score < g_score[neighbor]:
                 came_from[neighbor] = current
+                came_by_edge[neighbor] = arc_edge[arc]
                 g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = g_score[neighbor] + heuristic(neighbor)
-                heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                heapq.heappush(open_set, (g_score[neighbor] + heuristic[neighbor], neighbor))
     
-    return None, float('inf'), [], {"error": "No path found"}
+    return math.inf, None, [], expanded
@@ -5,6 +5,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
+from src.algorithms.shortestpath import compile_period_weights, get_period_weights
+
 # Weather impact factors on traffic conditions
 # Source: Based on published research on weather impacts on urban traffic
 WEATHER_IMPACT_FACTORS = {
@@ -145,13 +147,21 @@ def simulate_weather_period(start_date, num_days=7, season_override=None):
     
     return weather_period
 
-def calculate_weather_impact_on_route(route_data, weather_conditions):
+def calculate_weather_impact_on_route(route_data, weather_conditions, network=None, traffic_flows=None):
     """
     Calculate the impact of weather on a route
     
+    When a road network is given and the route lists its edges ('path_edges'),
+    travel times come from the weather-adjusted BPR edge weights for the route's
+    'time_period' (see route_weather_times); otherwise the whole route is slowed
+    down by the speed reduction.
+    
     Args:
-        route_data: Dictionary with route information (distance, normal_time)
+        route_data: Dictionary with route information (distance, normal_time and
+                    optionally path_edges and time_period)
         weather_conditions: Dictionary with weather conditions or list of weather conditions for multi-day
+        network: Optional CSR road network the route's edges belong to
+        traffic_flows: Dictionary containing traffic flow data (with network)
         
     Returns:
         Dictionary with impact metrics
@@ -160,28 +170,40 @@ def calculate_weather_impact_on_route(route_data, weather_conditions):
     if isinstance(weather_conditions, list):
         # For multi-day simulation, use the worst-case weather conditions
         worst_conditions = max(weather_conditions, key=lambda x: x['speed_reduction'])
+        weather_type = worst_conditions['weather_type']
         speed_reduction = worst_conditions['speed_reduction']
         capacity_reduction = worst_conditions['capacity_reduction']
         accident_risk = worst_conditions['accident_risk']
     else:
         # For single-day analysis
+        weather_type = weather_conditions['weather_type']
         speed_reduction = weather_conditions['speed_reduction']
         capacity_reduction = weather_conditions['capacity_reduction']
         accident_risk = weather_conditions['accident_risk']
     
-    # Calculate new travel time based on speed reduction
-    normal_time = route_data['normal_time']  # in minutes
-    weather_time = normal_time / (1 - speed_reduction)
-    
-    # Calculate delay
-    delay = weather_time - normal_time
-    
     # Calculate congestion impact based on capacity reduction
     congestion_factor = 1 / (1 - capacity_reduction) if capacity_reduction < 1 else float('inf')
     
-    # During peak hours, congestion has more impact
-    peak_hour_factor = 1.5
-    peak_weather_time = normal_time * (1 + (congestion_factor - 1) * peak_hour_factor)
+    if network is not None and 'path_edges' in route_data:
+        # Travel times over the route's roads under the period's traffic, with and without the weather
+        times = route_weather_times(network, traffic_flows, route_data['path_edges'], weather_type)
+        time_period = route_data.get('time_period', 'afternoon')
+        normal_time = times['normal'][time_period]
+        weather_time = times['weather'][time_period]
+        
+        # Peak hours: the busier of the two peak periods in this weather
+        peak_weather_time = max(times['weather']['morning_peak'], times['weather']['evening_peak'])
+    else:
+        # Calculate new travel time based on speed reduction
+        normal_time = route_data['normal_time']  # in minutes
+        weather_time = normal_time / (1 - speed_reduction)
+        
+        # During peak hours, congestion has more impact
+        peak_hour_factor = 1.5
+        peak_weather_time = normal_time * (1 + (congestion_factor - 1) * peak_hour_factor)
+    
+    # Calculate delay
+    delay = weather_time - normal_time
     peak_delay = peak_weather_time - normal_time
     
     # Calculate visibility and capacity impacts
@@ -225,13 +247,15 @@ def calculate_weather_impact_on_route(route_data, weather_conditions):
         'recommendations': recommendations
     }
 
-def simulate_weather_impact_on_network(routes, weather_conditions):
+def simulate_weather_impact_on_network(routes, weather_conditions, network=None, traffic_flows=None):
     """
     Simulate the impact of weather on an entire road network
     
     Args:
         routes: Dictionary of routes with their normal conditions
         weather_conditions: Dictionary with weather conditions or list of weather conditions for multi-day
+        network: Optional CSR road network the routes' edges belong to (see calculate_weather_impact_on_route)
+        traffic_flows: Dictionary containing traffic flow data (with network)
         
     Returns:
         Dictionary with network-wide metrics
@@ -241,7 +265,7 @@ def simulate_weather_impact_on_network(routes, weather_conditions):
         # For multi-day simulation, calculate daily metrics
         daily_metrics = []
         for day_weather in weather_conditions:
-            day_impact = calculate_network_metrics(routes, day_weather)
+            day_impact = calculate_network_metrics(routes, day_weather, network, traffic_flows)
             daily_metrics.append({
                 'date': day_weather['date'],
                 'avg_delay': day_impact['total_delay'] / len(routes),
@@ -251,7 +275,7 @@ def simulate_weather_impact_on_network(routes, weather_conditions):
         
         # Calculate overall metrics using the worst day
         worst_day = max(weather_conditions, key=lambda x: x['speed_reduction'])
-        overall_impact = calculate_network_metrics(routes, worst_day)
+        overall_impact = calculate_network_metrics(routes, worst_day, network, traffic_flows)
         
         # Identify critical days (days with significant impact)
         critical_days = [
@@ -276,9 +300,9 @@ def simulate_weather_impact_on_network(routes, weather_conditions):
         }
     else:
         # For single-day analysis
-        return calculate_network_metrics(routes, weather_conditions)
+        return calculate_network_metrics(routes, weather_conditions, network, traffic_flows)
 
-def calculate_network_metrics(routes, weather_conditions):
+def calculate_network_metrics(routes, weather_conditions, network=None, traffic_flows=None):
     """Helper function to calculate network metrics for a single day"""
     route_impacts = {}
     total_delay = 0
@@ -287,7 +311,7 @@ def calculate_network_metrics(routes, weather_conditions):
     most_affected_route = None
     
     for route_id, route_data in routes.items():
-        impact = calculate_weather_impact_on_route(route_data, weather_conditions)
+        impact = calculate_weather_impact_on_route(route_data, weather_conditions, network, traffic_flows)
         route_impacts[route_id] = impact
         
         total_delay += impact['delay']
@@ -307,6 +331,89 @@ def calculate_network_metrics(routes, weather_conditions):
         'max_delay_percentage': max_delay_percentage
     }
 
+def weather_multipliers(weather_type):
+    """
+    Get the speed and capacity multipliers a weather type applies to every road
+    
+    Args:
+        weather_type: Key of WEATHER_IMPACT_FACTORS (e.g. 'heavy_rain')
+        
+    Returns:
+        Tuple of (speed_multiplier, capacity_multiplier)
+    """
+    speed_reduction = WEATHER_IMPACT_FACTORS['speed_reduction'][weather_type]
+    capacity_reduction = WEATHER_IMPACT_FACTORS['capacity_reduction'][weather_type]
+    return 1 - speed_reduction, 1 - capacity_reduction
+
+def calculate_weather_edge_weights(network, traffic_flows, weather_type):
+    """
+    Compile weather-adjusted travel times for every road and time period
+    
+    Uses the same vectorized BPR kernel as route planning, with free-flow speed
+    and road capacity reduced by the weather impact factors.
+    
+    Args:
+        network: CSR road network (see src.data.network)
+        traffic_flows: Dictionary containing traffic flow data
+        weather_type: Key of WEATHER_IMPACT_FACTORS (e.g. 'heavy_rain')
+        
+    Returns:
+        Dictionary with per-period 'weights', 'traffic_factors' and 'arc_weights',
+        usable wherever compile_period_weights output is
+    """
+    speed_multiplier, capacity_multiplier = weather_multipliers(weather_type)
+    return compile_period_weights(network, traffic_flows, speed_multiplier, capacity_multiplier)
+
+def get_weather_edge_weights(network, traffic_flows, weather_type):
+    """
+    Get the weather-adjusted travel time table, compiling it on first use
+    
+    Tables are stored on the network per weather type and recompiled whenever
+    the period weights are recompiled for a new traffic snapshot.
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+        weather_type: Key of WEATHER_IMPACT_FACTORS (e.g. 'heavy_rain')
+        
+    Returns:
+        Weather-adjusted table (see calculate_weather_edge_weights)
+    """
+    table = get_period_weights(network, traffic_flows)
+    if weather_type == 'normal':
+        return table
+    
+    cached = network.get('_weather_weights')
+    if cached is None or cached[0] is not table:
+        cached = (table, {})
+        network['_weather_weights'] = cached
+    
+    if weather_type not in cached[1]:
+        cached[1][weather_type] = calculate_weather_edge_weights(network, traffic_flows, weather_type)
+    return cached[1][weather_type]
+
+def route_weather_times(network, traffic_flows, path_edges, weather_type):
+    """
+    Get a route's travel time in every time period, with and without the weather
+    
+    Args:
+        network: CSR road network
+        traffic_flows: Dictionary containing traffic flow data
+        path_edges: List of edge indices along the route
+        weather_type: Key of WEATHER_IMPACT_FACTORS (e.g. 'heavy_rain')
+        
+    Returns:
+        Dictionary with 'normal' and 'weather' dictionaries of time period -> minutes
+    """
+    edges = np.asarray(path_edges, dtype=np.int64)
+    normal = get_period_weights(network, traffic_flows)["weights"]
+    weather = get_weather_edge_weights(network, traffic_flows, weather_type)["weights"]
+    
+    return {
+        'normal': {period: float(weights[edges].sum()) for period, weights in normal.items()},
+        'weather': {period: float(weights[edges].sum()) for period, weights in weather.items()}
+    }
+
 def display_weather_simulation(routes=None):
     """
     Display weather simulation interface in Streamlit
@@ -225,6 +225,19 @@ def load_data():
         }
     ]
     
+    # Transit station and stop names that differ from the road network's node names
+    station_aliases = {
+        "Downtown": 3,
+        "Sadat": 3,
+        "Attaba": 3,
+        "6th October": 7,
+        "Imbaba": 9,
+        "Rehab": 14,
+        "NAC": 13,
+        "Ramses": "F2",
+        "Airport": "F1"
+    }
+    
     # Bundle all data
     data = {
         "neighborhoods": neighborhoods,
@@ -233,7 +246,8 @@ def load_data():
         "potential_roads": potential_roads,
         "traffic_flows": traffic_flows,
         "metro_lines": metro_lines,
-        "bus_routes": bus_routes
+        "bus_routes": bus_routes,
+        "station_aliases": station_aliases
     }
     
     return data
@@ -0,0 +1,214 @@
+import hashlib
+import numpy as np
+
+from src.data.loader import load_data
+
+# Built networks, keyed by the fingerprint of the data they were built from
+_NETWORK_CACHE = {}
+
+# Fingerprints of recently seen traffic snapshots, keyed by object identity
+_TRAFFIC_FINGERPRINTS = {}
+TRAFFIC_FINGERPRINT_SLOTS = 8
+
+# Facility-type bits stored per node in network['facility_flags']
+FACILITY_MEDICAL = 1
+FACILITY_AIRPORT = 2
+FACILITY_TYPE_FLAGS = {"Medical": FACILITY_MEDICAL, "Airport": FACILITY_AIRPORT}
+
+def build_road_network(neighborhoods, facilities, roads, road_type='existing'):
+    """
+    Builds a compact compressed-sparse-row (CSR) representation of the road network.
+    
+    Nodes are stored by integer index, edges as flat NumPy arrays, and adjacency as
+    CSR offsets where every undirected road contributes two arcs. Node attributes
+    (population, facility-type bitmask) are indexed the same way.
+    
+    Args:
+        neighborhoods: List of neighborhood data
+        facilities: List of facility data
+        roads: List of road data (from, to, distance, capacity, condition)
+        road_type: Road type label stored for every edge
+    
+    Returns:
+        network: Dictionary with node arrays, edge arrays and CSR adjacency
+    """
+    # Node index covers both integer neighborhood ids and "F*" facility ids
+    node_ids = [n['id'] for n in neighborhoods] + [f['id'] for f in facilities]
+    node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+    
+    nodes = list(neighborhoods) + list(facilities)
+    node_names = [n['name'] for n in nodes]
+    node_types = [n['type'] for n in nodes]
+    node_kinds = ['neighborhood'] * len(neighborhoods) + ['facility'] * len(facilities)
+    x = np.array([n['x'] for n in nodes], dtype=float)
+    y = np.array([n['y'] for n in nodes], dtype=float)
+    population = np.array([n.get('population', 0) for n in nodes], dtype=float)
+    facility_flags = np.array([FACILITY_TYPE_FLAGS.get(t, 0) for t in node_types], dtype=np.uint8)
+    
+    # Edge arrays (one entry per undirected road)
+    edge_from = np.array([node_index[r['from']] for r in roads], dtype=np.int32)
+    edge_to = np.array([node_index[r['to']] for r in roads], dtype=np.int32)
+    distance = np.array([r.get('distance', 1.0) for r in roads], dtype=float)
+    capacity = np.array([r.get('capacity', 3000) for r in roads], dtype=float)
+    condition = np.array([r.get('condition', 5) for r in roads], dtype=float)
+    road_ids = [f"{r['from']}-{r['to']}" for r in roads]
+    
+    # CSR adjacency: each road is traversable in both directions
+    num_nodes = len(node_ids)
+    num_edges = len(roads)
+    arc_tail = np.concatenate([edge_from, edge_to])
+    arc_head = np.concatenate([edge_to, edge_from])
+    arc_edge = np.concatenate([np.arange(num_edges), np.arange(num_edges)]).astype(np.int32)
+    
+    order = np.argsort(arc_tail, kind='stable')
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(arc_tail, minlength=num_nodes), out=indptr[1:])
+    
+    return {
+        "node_ids": node_ids,
+        "node_index": node_index,
+        "node_names": node_names,
+        "node_types": node_types,
+        "node_kinds": node_kinds,
+        "x": x,
+        "y": y,
+        "population": population,
+        "facility_flags": facility_flags,
+        "edge_from": edge_from,
+        "edge_to": edge_to,
+        "distance": distance,
+        "capacity": capacity,
+        "condition": condition,
+        "road_ids": road_ids,
+        "road_type": road_type,
+        "indptr": indptr,
+        "indices": arc_head[order].astype(np.int32),
+        "arc_edge": arc_edge[order],
+        "num_nodes": num_nodes,
+        "num_edges": num_edges,
+        "version": network_fingerprint(neighborhoods, facilities, roads)
+    }
+
+def network_fingerprint(neighborhoods, facilities, roads):
+    """
+    Computes a stable fingerprint of the data a network is built from.
+    
+    Args:
+        neighborhoods: List of neighborhood data
+        facilities: List of facility data
+        roads: List of road data
+    
+    Returns:
+        str: Hex digest identifying this network snapshot
+    """
+    digest = hashlib.sha1()
+    for n in list(neighborhoods) + list(facilities):
+        digest.update(repr((n['id'], n['x'], n['y'], n['type'], n.get('population', 0))).encode())
+    for r in roads:
+        digest.update(repr((r['from'], r['to'], r.get('distance'), r.get('capacity'), r.get('condition'))).encode())
+    return digest.hexdigest()
+
+def traffic_fingerprint(traffic_flows, periods=("morning_peak", "afternoon", "evening_peak", "night")):
+    """
+    Computes an in-process fingerprint of a traffic count snapshot.
+    
+    Hashing a snapshot walks every traffic record, so the result is computed once
+    per snapshot object and reused by every later lookup (weight tables, travel
+    time functions, route cache keys). Snapshots are treated as immutable: new
+    traffic counts come as a new dictionary, as load_data and
+    assignment_traffic_flows produce.
+    
+    Args:
+        traffic_flows: Dictionary of road id -> {period: vehicles per hour}
+        periods: Time periods that make up each record
+    
+    Returns:
+        int: Hash identifying this traffic snapshot
+    """
+    key = (id(traffic_flows), tuple(periods))
+    cached = _TRAFFIC_FINGERPRINTS.get(key)
+    # The stored reference keeps the object alive, so its id cannot be reused
+    if cached is not None and cached[0] is traffic_flows:
+        return cached[1]
+    
+    fingerprint = hash(tuple(
+        (road_id, tuple(flows.get(period, 0) for period in periods))
+        for road_id, flows in traffic_flows.items()
+    ))
+    
+    _TRAFFIC_FINGERPRINTS[key] = (traffic_flows, fingerprint)
+    while len(_TRAFFIC_FINGERPRINTS) > TRAFFIC_FINGERPRINT_SLOTS:
+        _TRAFFIC_FINGERPRINTS.pop(next(iter(_TRAFFIC_FINGERPRINTS)))
+    return fingerprint
+
+def condition_fingerprint(network):
+    """
+    Computes a fingerprint of a network's road conditions.
+    
+    The hash is computed once per condition array and kept on the network.
+    Conditions are changed by assigning a new array to network['condition'];
+    code that edits the array in place must drop the cached indexes built from
+    it (see invalidate_hospital_index).
+    
+    Args:
+        network: CSR road network
+    
+    Returns:
+        int: Hash identifying the current road conditions
+    """
+    condition = network['condition']
+    cached = network.get('_condition_fingerprint')
+    if cached is None or cached[0] is not condition:
+        cached = (condition, hash(condition.tobytes()))
+        network['_condition_fingerprint'] = cached
+    return cached[1]
+
+def get_road_network(data=None):
+    """
+    Returns the shared road network, building it only when the underlying data changes.
+    
+    Args:
+        data: Output of load_data() (loaded if not provided)
+    
+    Returns:
+        network: Shared CSR road network (see build_road_network)
+    """
+    if data is None:
+        data = load_data()
+    
+    neighborhoods = data['neighborhoods']
+    facilities = data['facilities']
+    existing_roads = data['existing_roads']
+    
+    version = network_fingerprint(neighborhoods, facilities, existing_roads)
+    if version not in _NETWORK_CACHE:
+        # Only the current snapshot is kept
+        _NETWORK_CACHE.clear()
+        _NETWORK_CACHE[version] = build_road_network(neighborhoods, facilities, existing_roads)
+    
+    return _NETWORK_CACHE[version]
+
+def get_adjacency(network):
+    """
+    Returns the CSR adjacency as plain Python lists for tight search loops.
+    
+    Args:
+        network: CSR road network
+    
+    Returns:
+        indptr, indices, arc_edge: Lists mirroring the network's CSR arrays
+    """
+    if '_adjacency' not in network:
+        network['_adjacency'] = (
+            network['indptr'].tolist(),
+            network['indices'].tolist(),
+            network['arc_edge'].tolist()
+        )
+    return network['_adjacency']
+
+def get_node_name(network, node_id):
+    """Helper function to get node name from id"""
+    i = network['node_index'].get(node_id)
+    if i is None:
+        return str(node_id)
+    return network['node_names'][i]
@@ -0,0 +1,128 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from src.data.network import traffic_fingerprint
+
+# Most route results kept at once, and how long (seconds) one stays valid
+ROUTE_CACHE_SIZE = 1024
+ROUTE_CACHE_TTL = 15 * 60
+
+# Process-wide route cache shared by every session
+_ROUTE_CACHE = OrderedDict()
+_ROUTE_CACHE_LOCK = threading.Lock()
+_ROUTE_CACHE_STATE = {
+    "version": None,
+    "traffic": None,
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0
+}
+
+def route_cache_key(network, traffic_flows, origin, destination, period, algorithm):
+    """
+    Builds the cache key for a route query.
+    
+    Args:
+        network: CSR road network (its version fingerprints the loaded data)
+        traffic_flows: Dictionary containing traffic flow data (None if the route ignores traffic)
+        origin: ID of the origin node
+        destination: ID of the destination node (or None, e.g. nearest hospital)
+        period: Time period (or None)
+        algorithm: Algorithm name with every option that changes the result, e.g.
+                   ('a_star', min_road_condition) or ('dijkstra', departure_profile);
+                   queries whose options differ must not share a key
+    
+    Returns:
+        tuple: Hashable cache key
+    """
+    traffic_key = traffic_fingerprint(traffic_flows) if traffic_flows is not None else None
+    return ((network['version'], traffic_key), origin, destination, period, algorithm)
+
+def cached_route(key, compute):
+    """
+    Returns a cached route result, computing and storing it on a miss.
+    
+    Entries are evicted least-recently-used first once ROUTE_CACHE_SIZE is
+    reached and expire after ROUTE_CACHE_TTL seconds. A key for a different
+    network drops every entry; a key for a different traffic snapshot drops only
+    the entries that depend on traffic, so routes that ignore traffic (e.g.
+    emergency routes) survive. Every caller gets its own copy of the result, so
+    changing it cannot corrupt the stored entry.
+    
+    Args:
+        key: Cache key (see route_cache_key)
+        compute: Function with no arguments producing the result on a miss
+    
+    Returns:
+        result: A copy of the cached or freshly computed result
+    """
+    now = time.monotonic()
+    with _ROUTE_CACHE_LOCK:
+        _evict_stale(key[0])
+        
+        entry = _ROUTE_CACHE.get(key)
+        if entry is not None and now - entry[0] <= ROUTE_CACHE_TTL:
+            _ROUTE_CACHE.move_to_end(key)
+            _ROUTE_CACHE_STATE['hits'] += 1
+            return copy.deepcopy(entry[1])
+        _ROUTE_CACHE_STATE['misses'] += 1
+    
+    # Compute outside the lock so other sessions are not blocked
+    result = compute()
+    
+    with _ROUTE_CACHE_LOCK:
+        if _is_current(key[0]):
+            _ROUTE_CACHE[key] = (now, result)
+            _ROUTE_CACHE.move_to_end(key)
+            while len(_ROUTE_CACHE) > ROUTE_CACHE_SIZE:
+                _ROUTE_CACHE.popitem(last=False)
+                _ROUTE_CACHE_STATE['evictions'] += 1
+    
+    return copy.deepcopy(result)
+
+def _evict_stale(snapshot):
+    """Drop the entries made stale by a key's (network version, traffic key) snapshot"""
+    version, traffic_key = snapshot
+    if version != _ROUTE_CACHE_STATE['version']:
+        # Data changed: every stored route is stale
+        _ROUTE_CACHE.clear()
+        _ROUTE_CACHE_STATE['version'] = version
+        _ROUTE_CACHE_STATE['traffic'] = traffic_key
+    elif traffic_key is not None and traffic_key != _ROUTE_CACHE_STATE['traffic']:
+        # Traffic counts changed: only routes computed from traffic are stale
+        for stale in [k for k in _ROUTE_CACHE if k[0][1] is not None]:
+            del _ROUTE_CACHE[stale]
+        _ROUTE_CACHE_STATE['traffic'] = traffic_key
+
+def _is_current(snapshot):
+    """Whether results for a snapshot may still be stored"""
+    version, traffic_key = snapshot
+    if version != _ROUTE_CACHE_STATE['version']:
+        return False
+    return traffic_key is None or traffic_key == _ROUTE_CACHE_STATE['traffic']
+
+def route_cache_stats():
+    """
+    Returns the route cache counters.
+    
+    Returns:
+        stats: Dictionary with hits, misses, evictions, size and hit_rate
+    """
+    with _ROUTE_CACHE_LOCK:
+        hits = _ROUTE_CACHE_STATE['hits']
+        misses = _ROUTE_CACHE_STATE['misses']
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": _ROUTE_CACHE_STATE['evictions'],
+            "size": len(_ROUTE_CACHE),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+        }
+
+def clear_route_cache():
+    """Drop every cached route and reset the counters"""
+    with _ROUTE_CACHE_LOCK:
+        _ROUTE_CACHE.clear()
+        _ROUTE_CACHE_STATE.update(version=None, traffic=None, hits=0, misses=0, evictions=0)
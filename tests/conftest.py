@@ -0,0 +1,141 @@
+import os
+import sys
+import random
+import networkx as nx
+import pytest
+
+# Tests import the app's modules the same way the Streamlit pages do
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data.loader import load_data
+from src.data.network import build_road_network, get_road_network
+
+TIME_PERIODS = ["morning_peak", "afternoon", "evening_peak", "night"]
+
+def make_network_data(num_nodes, extra_roads, seed, hospitals=2, connected=True):
+    """
+    Builds random city data in the same layout as load_data.
+    
+    Args:
+        num_nodes: Number of districts
+        extra_roads: Roads added on top of a random spanning tree (which closes cycles)
+        seed: Random seed
+        hospitals: Number of Medical facilities, each joined to one district
+        connected: Whether to start from a spanning tree (False leaves islands)
+    
+    Returns:
+        data: Dictionary with 'neighborhoods', 'facilities', 'existing_roads', 'potential_roads'
+              and 'traffic_flows'
+    """
+    rng = random.Random(seed)
+    neighborhoods = [
+        {"id": i, "name": f"District {i}", "population": rng.randint(10, 500) * 1000,
+         "type": "Residential", "x": 31 + rng.random(), "y": 30 + rng.random()}
+        for i in range(1, num_nodes + 1)
+    ]
+    facilities = [
+        {"id": f"F{h}", "name": f"Hospital {h}", "type": "Medical", "x": 31 + rng.random(), "y": 30 + rng.random()}
+        for h in range(1, hospitals + 1)
+    ]
+    
+    pairs = set()
+    if connected:
+        for i in range(2, num_nodes + 1):
+            pairs.add((rng.randint(1, i - 1), i))
+    while len(pairs) < (num_nodes - 1 if connected else 0) + extra_roads:
+        a, b = rng.sample(range(1, num_nodes + 1), 2)
+        if (a, b) not in pairs and (b, a) not in pairs:
+            pairs.add((a, b))
+    for h in range(1, hospitals + 1):
+        pairs.add((f"F{h}", rng.randint(1, num_nodes)))
+    
+    roads = [
+        {"from": a, "to": b, "distance": round(rng.uniform(1, 20), 1),
+         "capacity": rng.choice([2000, 3000, 4000]), "condition": rng.randint(1, 10)}
+        for a, b in sorted(pairs, key=str)
+    ]
+    traffic_flows = {
+        f"{r['from']}-{r['to']}": {period: rng.randint(300, 4000) for period in TIME_PERIODS}
+        for r in roads if rng.random() < 0.7
+    }
+    
+    # Candidate roads for the MST planner, between districts not joined yet
+    potential_roads = []
+    while len(potential_roads) < extra_roads // 2:
+        a, b = rng.sample(range(1, num_nodes + 1), 2)
+        if (a, b) not in pairs and (b, a) not in pairs:
+            pairs.add((a, b))
+            potential_roads.append({"from": a, "to": b, "distance": round(rng.uniform(1, 20), 1),
+                                    "capacity": rng.choice([3000, 4000]), "cost": rng.randint(50, 900)})
+    
+    return {
+        "neighborhoods": neighborhoods,
+        "facilities": facilities,
+        "existing_roads": roads,
+        "potential_roads": potential_roads,
+        "traffic_flows": traffic_flows
+    }
+
+def build_city(num_nodes, extra_roads, seed, **options):
+    """Random city data (see make_network_data) and its road network"""
+    data = make_network_data(num_nodes, extra_roads, seed, **options)
+    return data, build_road_network(data['neighborhoods'], data['facilities'], data['existing_roads'])
+
+def to_networkx(network, edge_weights):
+    """Copy a CSR network into an undirected networkx graph keeping the cheapest parallel road"""
+    graph = nx.Graph()
+    graph.add_nodes_from(range(network['num_nodes']))
+    for e, (u, v) in enumerate(zip(network['edge_from'].tolist(), network['edge_to'].tolist())):
+        weight = float(edge_weights[e])
+        if not graph.has_edge(u, v) or graph[u][v]['weight'] > weight:
+            graph.add_edge(u, v, weight=weight, edge=e)
+    return graph
+
+def assert_route(network, edge_weights, source, target, cost, path_nodes, path_edge_ids):
+    """Check that a route runs from source to target over real roads and costs what it claims"""
+    assert path_nodes[0] == source and path_nodes[-1] == target
+    assert len(path_edge_ids) == len(path_nodes) - 1
+    for u, v, e in zip(path_nodes, path_nodes[1:], path_edge_ids):
+        assert {u, v} == {int(network['edge_from'][e]), int(network['edge_to'][e])}
+    assert float(sum(edge_weights[e] for e in path_edge_ids)) == pytest.approx(cost)
+
+def reference_road_times(data, time_period):
+    """
+    Travel time per road with the original per-edge BPR loop from run_dijkstra.
+    
+    Returns:
+        times: Dictionary of (from ID, to ID) -> travel time in minutes
+    """
+    traffic_flows = data['traffic_flows']
+    times = {}
+    for road in data['existing_roads']:
+        road_id = f"{road['from']}-{road['to']}"
+        if road_id not in traffic_flows:
+            road_id = f"{road['to']}-{road['from']}"
+        
+        traffic_factor = 1.0
+        if road_id in traffic_flows:
+            v_c_ratio = traffic_flows[road_id].get(time_period, 0) / road['capacity']
+            traffic_factor = 1.0 + 0.15 * (v_c_ratio ** 4)
+        condition_factor = 1.2 - (road['condition'] / 10)
+        times[(road['from'], road['to'])] = road['distance'] / (60 * (1 / traffic_factor) * (1 / condition_factor)) * 60
+    return times
+
+def reference_graph(data, time_period):
+    """Road graph weighted with reference_road_times, for checking routes with networkx"""
+    G = nx.Graph()
+    G.add_nodes_from(node['id'] for node in data['neighborhoods'] + data['facilities'])
+    for (u, v), time in reference_road_times(data, time_period).items():
+        G.add_edge(u, v, weight=time)
+    return G
+
+@pytest.fixture(scope="session")
+def cairo():
+    """The bundled Cairo data and its shared road network"""
+    data = load_data()
+    return data, get_road_network(data)
+
+@pytest.fixture(params=[1, 2, 3])
+def city(request):
+    """A random 60-district city (data, network), rebuilt for every test"""
+    return build_city(60, 50, seed=request.param)
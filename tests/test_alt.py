@@ -0,0 +1,74 @@
+import random
+import numpy as np
+import pytest
+
+from conftest import TIME_PERIODS
+from src.algorithms.alt import build_landmarks, alt_heuristic, get_period_landmarks
+from src.algorithms.shortestpath import (
+    dijkstra_search, emergency_edge_costs, get_period_weights, run_a_star, run_dijkstra
+)
+
+def test_landmark_bounds_are_admissible(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    weights = table["weights"]["afternoon"]
+    landmark_set = build_landmarks(network, weights, count=4)
+    
+    for target in range(0, network['num_nodes'], 5):
+        dist, _, _ = dijkstra_search(network, table["arc_weights"]["afternoon"], [target])
+        heuristic = alt_heuristic(landmark_set, target)
+        assert heuristic[target] == pytest.approx(0.0)
+        assert all(h <= d + 1e-9 for h, d in zip(heuristic, dist))
+
+def test_run_dijkstra_with_landmarks_matches_plain_search(city):
+    data, network = city
+    landmarks = get_period_landmarks(network, data['traffic_flows'])
+    rng = random.Random(1)
+    
+    for _ in range(20):
+        origin, destination = rng.sample(network['node_ids'], 2)
+        period = rng.choice(TIME_PERIODS)
+        _, expected, _, _ = run_dijkstra(network, origin, destination, period, data['traffic_flows'])
+        _, travel_time, _, _ = run_dijkstra(network, origin, destination, period, data['traffic_flows'],
+                                            landmarks=landmarks)
+        assert travel_time == pytest.approx(expected)
+
+def test_run_a_star_finds_the_cheapest_emergency_route(city):
+    data, network = city
+    penalized_distance, edge_cost = emergency_edge_costs(network, 6)
+    cost_arcs = edge_cost[network['arc_edge']].tolist()
+    distance_arcs = penalized_distance[network['arc_edge']].tolist()
+    node_index = network['node_index']
+    hospitals = [f['id'] for f in data['facilities']]
+    
+    for origin in network['node_ids'][::6]:
+        source = node_index[origin]
+        dist, _, _ = dijkstra_search(network, cost_arcs, [source])
+        distance, _, _ = dijkstra_search(network, distance_arcs, [source])
+        
+        for hospital in hospitals:
+            path, _, _, results = run_a_star(network, origin, hospital, data['neighborhoods'], data['facilities'])
+            path_nodes = [node_index[node_id] for node_id in path]
+            route_cost = min_cost_along(network, edge_cost, path_nodes)
+            assert route_cost == pytest.approx(dist[node_index[hospital]])
+            assert results["hospital_id"] == hospital
+        
+        # Without a target the nearest hospital by penalized distance is chosen,
+        # then reached on the cheapest emergency route
+        path, _, _, results = run_a_star(network, origin, None, data['neighborhoods'], data['facilities'])
+        nearest = min(distance[node_index[h]] for h in hospitals)
+        assert distance[node_index[results["hospital_id"]]] == pytest.approx(nearest)
+        assert path[0] == origin and path[-1] == results["hospital_id"]
+        path_nodes = [node_index[node_id] for node_id in path]
+        assert min_cost_along(network, edge_cost, path_nodes) == pytest.approx(dist[node_index[results["hospital_id"]]])
+
+def min_cost_along(network, edge_cost, path_nodes):
+    """Cost of a node path, taking the cheapest road between each pair of consecutive nodes"""
+    total = 0.0
+    for u, v in zip(path_nodes, path_nodes[1:]):
+        roads = np.flatnonzero(
+            ((network['edge_from'] == u) & (network['edge_to'] == v)) |
+            ((network['edge_from'] == v) & (network['edge_to'] == u))
+        )
+        total += float(edge_cost[roads].min())
+    return total
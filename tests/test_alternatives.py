@@ -0,0 +1,39 @@
+import random
+from itertools import islice
+import networkx as nx
+import pytest
+
+from conftest import to_networkx, assert_route
+from src.algorithms.alternatives import k_shortest_routes, run_k_alternatives
+from src.algorithms.shortestpath import get_period_weights
+
+def test_k_shortest_routes_match_networkx(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    weights = table["weights"]["morning_peak"]
+    graph = to_networkx(network, weights)
+    rng = random.Random(4)
+    
+    for _ in range(10):
+        source, target = rng.sample(range(network['num_nodes']), 2)
+        routes = k_shortest_routes(network, table["arc_weights"]["morning_peak"], weights, source, target, k=5)
+        expected = [nx.path_weight(graph, path, "weight")
+                    for path in islice(nx.shortest_simple_paths(graph, source, target, weight="weight"), 5)]
+        
+        assert [cost for cost, _, _ in routes] == pytest.approx(expected)
+        for cost, path_nodes, path_edge_ids in routes:
+            assert_route(network, weights, source, target, cost, path_nodes, path_edge_ids)
+            assert len(set(path_nodes)) == len(path_nodes)
+        assert len({tuple(path_edge_ids) for _, _, path_edge_ids in routes}) == len(routes)
+
+def test_run_k_alternatives_ranks_routes(city):
+    data, network = city
+    origin, destination = network['node_ids'][2], network['node_ids'][45]
+    alternatives = run_k_alternatives(network, origin, destination, "evening_peak", data['traffic_flows'], k=4)
+    
+    assert [route["rank"] for route in alternatives] == list(range(1, len(alternatives) + 1))
+    times = [route["travel_time"] for route in alternatives]
+    assert times == sorted(times)
+    for route in alternatives:
+        assert route["path"][0] == origin and route["path"][-1] == destination
+    assert run_k_alternatives(network, origin, "nowhere", "evening_peak", data['traffic_flows']) == []
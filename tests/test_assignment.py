@@ -0,0 +1,97 @@
+import random
+import numpy as np
+import pytest
+
+from conftest import build_city
+from src.algorithms.assignment import (
+    ASSIGNMENT_GAP, ASSIGNMENT_MAX_ITERATIONS, assignment_traffic_flows, run_traffic_assignment
+)
+
+@pytest.fixture(scope="module")
+def congested_city():
+    """A small city with enough demand to congest its roads"""
+    data, network = build_city(40, 40, seed=5)
+    rng = random.Random(5)
+    demand = {}
+    while len(demand) < 80:
+        origin, destination = rng.sample(network['node_ids'], 2)
+        demand[(origin, destination)] = rng.randint(200, 1500)
+    return network, demand
+
+@pytest.fixture(scope="module")
+def city_demand():
+    """A 200-district city with 400 OD pairs, the size the defaults are calibrated on"""
+    data, network = build_city(200, 200, seed=7)
+    rng = random.Random(7)
+    demand = {}
+    while len(demand) < 400:
+        origin, destination = rng.sample(network['node_ids'], 2)
+        demand[(origin, destination)] = rng.randint(100, 1000)
+    return network, demand
+
+@pytest.mark.parametrize("method", ['conjugate', 'frank_wolfe'])
+def test_defaults_converge(city_demand, method):
+    network, demand = city_demand
+    results = run_traffic_assignment(network, demand, method=method, processes=1)
+    assert results["converged"]
+    assert results["relative_gap"][-1] <= ASSIGNMENT_GAP
+    assert results["iterations"] < ASSIGNMENT_MAX_ITERATIONS / 4
+
+def test_warm_start_saves_iterations(city_demand):
+    network, demand = city_demand
+    before = run_traffic_assignment(network, demand, processes=1)
+    
+    # The busiest road loses 30% of its capacity
+    closed = dict(network, capacity=network['capacity'].copy())
+    closed['capacity'][int(before['flow'].argmax())] *= 0.7
+    cold = run_traffic_assignment(closed, demand, processes=1)
+    warm = run_traffic_assignment(closed, demand, processes=1, warm_start=before)
+    assert cold["converged"] and warm["converged"]
+    assert warm["iterations"] <= cold["iterations"] / 2
+    assert warm["total_travel_time"] == pytest.approx(cold["total_travel_time"], rel=1e-2)
+
+def test_relative_gap_decreases(congested_city):
+    network, demand = congested_city
+    results = run_traffic_assignment(network, demand, method='frank_wolfe', max_iterations=60, gap=0, processes=1)
+    gaps = results["relative_gap"]
+    assert len(gaps) == results["iterations"] == 60 and not results["converged"]
+    assert gaps[-1] < gaps[0] / 10
+    assert min(gaps[-10:]) < min(gaps[:10])
+
+def test_conjugate_and_plain_frank_wolfe_agree(congested_city):
+    network, demand = congested_city
+    conjugate = run_traffic_assignment(network, demand, gap=1e-4, max_iterations=2000, processes=1)
+    plain = run_traffic_assignment(network, demand, method='frank_wolfe', gap=1e-4, max_iterations=2000, processes=1)
+    assert conjugate["converged"] and plain["converged"]
+    assert conjugate["iterations"] < plain["iterations"]
+    
+    # BPR costs strictly increase with flow, so the equilibrium link flows are unique
+    assert conjugate["total_travel_time"] == pytest.approx(plain["total_travel_time"], rel=1e-3)
+    assert np.allclose(conjugate["flow"], plain["flow"], rtol=0.05, atol=20)
+    assert conjugate["unassigned_demand"] == plain["unassigned_demand"] == 0
+
+def test_all_demand_is_routed(congested_city):
+    network, demand = congested_city
+    results = run_traffic_assignment(network, {**demand, ("nowhere", 1): 100}, max_iterations=1, processes=1)
+    assert results["unassigned_demand"] == 100
+    
+    # Free-flow loading puts every trip on some road leaving its origin
+    for origin in {o for o, _ in demand}:
+        node = network['node_index'][origin]
+        leaving = (network['edge_from'] == node) | (network['edge_to'] == node)
+        assert results["flow"][leaving].sum() >= sum(t for (o, _), t in demand.items() if o == origin) - 1e-6
+
+def test_parallel_loading_matches_serial(congested_city):
+    network, demand = congested_city
+    serial = run_traffic_assignment(network, demand, max_iterations=15, gap=0, processes=1)
+    parallel = run_traffic_assignment(network, demand, max_iterations=15, gap=0, processes=2)
+    assert parallel["relative_gap"] == pytest.approx(serial["relative_gap"])
+    assert np.allclose(parallel["flow"], serial["flow"])
+
+def test_assignment_traffic_flows(congested_city):
+    network, demand = congested_city
+    results = run_traffic_assignment(network, demand, max_iterations=5, processes=1)
+    traffic_flows = assignment_traffic_flows(network, {"morning_peak": results})
+    assert set(traffic_flows) == set(network['road_ids'])
+    for road_id, flow in results["road_flows"].items():
+        assert traffic_flows[road_id]["morning_peak"] == round(flow)
@@ -0,0 +1,62 @@
+import random
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import TIME_PERIODS, to_networkx
+from src.algorithms.betweenness import edge_betweenness, road_criticality
+from src.algorithms.shortestpath import get_period_weights
+
+def networkx_betweenness(network, graph, values):
+    """Spread networkx's per-node-pair values back over road edge indices"""
+    result = np.zeros(network['num_edges'])
+    for (u, v), value in values.items():
+        result[graph.edges[u, v]['edge']] = value
+    return result
+
+def test_exact_betweenness_matches_networkx(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    weights = table["weights"]["morning_peak"]
+    graph = to_networkx(network, weights)
+    
+    betweenness, error = edge_betweenness(network, table["arc_weights"]["morning_peak"], processes=1)
+    expected = networkx_betweenness(
+        network, graph, nx.edge_betweenness_centrality(graph, normalized=False, weight="weight")
+    )
+    assert betweenness == pytest.approx(expected)
+    assert not error.any()
+
+def test_sampled_betweenness_scales_the_sources_contributions(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    graph = to_networkx(network, table["weights"]["night"])
+    sources = random.Random(12).sample(range(network['num_nodes']), 20)
+    
+    betweenness, error = edge_betweenness(network, table["arc_weights"]["night"], sources, processes=1)
+    subset = nx.edge_betweenness_centrality_subset(graph, sources, list(graph.nodes), normalized=False, weight="weight")
+    # Both halve the per-source counts of an undirected graph; the sample is scaled up by n / k
+    expected = networkx_betweenness(network, graph, subset) * network['num_nodes'] / len(sources)
+    assert betweenness == pytest.approx(expected)
+    assert (error >= 0).all() and error.any()
+
+def test_process_pool_matches_serial(city):
+    data, network = city
+    arc_weights = get_period_weights(network, data['traffic_flows'])["arc_weights"]["afternoon"]
+    serial, _ = edge_betweenness(network, arc_weights, processes=1)
+    parallel, _ = edge_betweenness(network, arc_weights, processes=2)
+    assert parallel == pytest.approx(serial)
+
+def test_road_criticality_ranking(city):
+    data, network = city
+    report = road_criticality(network, data['traffic_flows'], processes=1)
+    assert report["exact"] and report["sources"] == network['num_nodes']
+    
+    means = [row["mean_betweenness"] for row in report["ranking"]]
+    assert means == sorted(means, reverse=True)
+    for row in report["ranking"][:5]:
+        e = network['road_ids'].index(row["road"])
+        assert row["mean_betweenness"] == pytest.approx(np.mean([report["betweenness"][p][e] for p in TIME_PERIODS]))
+    
+    sampled = road_criticality(network, data['traffic_flows'], samples=15, exact_max_nodes=10, processes=1, seed=3)
+    assert not sampled["exact"] and sampled["sources"] == 15
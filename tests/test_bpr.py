@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from conftest import TIME_PERIODS, reference_road_times
+from src.algorithms.bpr import bpr_travel_times, edge_flow_matrix
+from src.algorithms.shortestpath import compile_period_weights
+
+def test_kernel_matches_the_per_edge_formula(city):
+    data, network = city
+    flow, has_flow = edge_flow_matrix(network, data['traffic_flows'], TIME_PERIODS)
+    travel_time, traffic_factor = bpr_travel_times(
+        network['distance'], network['capacity'], network['condition'], flow, has_flow
+    )
+    assert travel_time.shape == traffic_factor.shape == (network['num_edges'], len(TIME_PERIODS))
+    
+    node_ids = network['node_ids']
+    for p, period in enumerate(TIME_PERIODS):
+        expected = reference_road_times(data, period)
+        for e in range(network['num_edges']):
+            u, v = node_ids[network['edge_from'][e]], node_ids[network['edge_to'][e]]
+            assert travel_time[e, p] == pytest.approx(expected[(u, v)])
+            assert (traffic_factor[e, p] > 1.0) == bool(has_flow[e])
+
+def test_flows_recorded_in_either_direction(city):
+    data, network = city
+    flows = {}
+    for road_id, counts in data['traffic_flows'].items():
+        from_id, _, to_id = road_id.partition('-')
+        flows[f"{to_id}-{from_id}"] = counts
+    
+    forward, forward_has = edge_flow_matrix(network, data['traffic_flows'], TIME_PERIODS)
+    reverse, reverse_has = edge_flow_matrix(network, flows, TIME_PERIODS)
+    assert np.array_equal(forward, reverse) and np.array_equal(forward_has, reverse_has)
+
+def test_weather_multipliers_scale_speed_and_capacity(city):
+    data, network = city
+    speed_multiplier, capacity_multiplier = 0.8, 0.7
+    table = compile_period_weights(network, data['traffic_flows'], speed_multiplier, capacity_multiplier)
+    
+    # The original formula with a slower base speed and reduced capacities
+    roads = [dict(road, capacity=road['capacity'] * capacity_multiplier) for road in data['existing_roads']]
+    for period in TIME_PERIODS:
+        expected = reference_road_times(dict(data, existing_roads=roads), period)
+        for e, road in enumerate(data['existing_roads']):
+            assert table["weights"][period][e] == pytest.approx(expected[(road['from'], road['to'])] / speed_multiplier)
+
+def test_vector_flow_for_a_single_period(cairo):
+    data, network = cairo
+    flow, has_flow = edge_flow_matrix(network, data['traffic_flows'], TIME_PERIODS)
+    full, _ = bpr_travel_times(network['distance'], network['capacity'], network['condition'], flow, has_flow)
+    single, _ = bpr_travel_times(network['distance'], network['capacity'], network['condition'], flow[:, 2], has_flow)
+    assert np.allclose(single, full[:, 2])
@@ -0,0 +1,124 @@
+import pytest
+
+from src.algorithms.shortestpath import run_dijkstra
+from src.utils import cache
+from src.utils.cache import cached_route, clear_route_cache, route_cache_key, route_cache_stats
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_route_cache()
+    yield
+    clear_route_cache()
+
+def counting(value):
+    """A compute function that records how often it ran"""
+    calls = []
+    def compute():
+        calls.append(value)
+        return value
+    return compute, calls
+
+def test_repeated_queries_hit(cairo):
+    data, network = cairo
+    key = route_cache_key(network, data['traffic_flows'], 1, 3, "morning_peak", 'dijkstra')
+    compute, calls = counting("route")
+    
+    assert cached_route(key, compute) == "route"
+    assert cached_route(key, compute) == "route"
+    assert calls == ["route"]
+    
+    # The same query from a copy of the traffic data shares the entry
+    same = route_cache_key(network, {k: dict(v) for k, v in data['traffic_flows'].items()}, 1, 3, "morning_peak", 'dijkstra')
+    assert cached_route(same, compute) == "route" and len(calls) == 1
+    
+    stats = route_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+def test_least_recently_used_entry_is_evicted(cairo, monkeypatch):
+    data, network = cairo
+    monkeypatch.setattr(cache, "ROUTE_CACHE_SIZE", 2)
+    keys = [route_cache_key(network, data['traffic_flows'], 1, d, "night", 'dijkstra') for d in (2, 3, 4)]
+    
+    cached_route(keys[0], lambda: "a")
+    cached_route(keys[1], lambda: "b")
+    cached_route(keys[0], lambda: "a")  # keys[1] is now the least recently used
+    cached_route(keys[2], lambda: "c")
+    
+    assert route_cache_stats()["evictions"] == 1
+    compute, calls = counting("b again")
+    assert cached_route(keys[0], lambda: "a fresh") == "a"
+    assert cached_route(keys[1], compute) == "b again" and calls
+
+def test_entries_expire(cairo, monkeypatch):
+    data, network = cairo
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    key = route_cache_key(network, data['traffic_flows'], 1, 3, "afternoon", 'dijkstra')
+    
+    cached_route(key, lambda: "old")
+    now[0] += cache.ROUTE_CACHE_TTL
+    assert cached_route(key, lambda: "new") == "old"
+    now[0] += 1
+    assert cached_route(key, lambda: "new") == "new"
+
+def test_new_traffic_counts_invalidate(cairo):
+    data, network = cairo
+    key = route_cache_key(network, data['traffic_flows'], 1, 3, "evening_peak", 'dijkstra')
+    cached_route(key, lambda: "before")
+    
+    flows = {road_id: dict(counts, evening_peak=counts['evening_peak'] + 100)
+             for road_id, counts in data['traffic_flows'].items()}
+    changed = route_cache_key(network, flows, 1, 3, "evening_peak", 'dijkstra')
+    assert changed != key
+    assert cached_route(changed, lambda: "after") == "after"
+    assert route_cache_stats()["size"] == 1
+
+def test_traffic_independent_routes_survive_new_traffic(cairo):
+    data, network = cairo
+    emergency = route_cache_key(network, None, 1, None, None, ('a_star', 6))
+    cached_route(emergency, lambda: "ambulance")
+    cached_route(route_cache_key(network, data['traffic_flows'], 1, 3, "night", 'dijkstra'), lambda: "car")
+    
+    flows = {road_id: dict(counts, night=counts['night'] + 1) for road_id, counts in data['traffic_flows'].items()}
+    cached_route(route_cache_key(network, flows, 1, 3, "night", 'dijkstra'), lambda: "car again")
+    assert cached_route(emergency, lambda: "recomputed") == "ambulance"
+    assert route_cache_stats()["size"] == 2
+
+def test_new_network_version_invalidates(cairo):
+    data, network = cairo
+    key = route_cache_key(network, data['traffic_flows'], 1, 3, "evening_peak", 'dijkstra')
+    cached_route(key, lambda: "before")
+    
+    rebuilt = dict(network, version="another snapshot")
+    changed = route_cache_key(rebuilt, data['traffic_flows'], 1, 3, "evening_peak", 'dijkstra')
+    assert cached_route(changed, lambda: "after") == "after"
+    assert cached_route(key, lambda: "recomputed") == "recomputed"
+
+def test_callers_get_their_own_copy(cairo):
+    data, network = cairo
+    key = route_cache_key(network, data['traffic_flows'], 1, 3, "night", 'dijkstra')
+    
+    first = cached_route(key, lambda: ([1, 2, 3], {"route_details": [{"from": 1, "to": 3}]}))
+    first[0].append(99)
+    first[1]["route_details"].clear()
+    
+    again = cached_route(key, lambda: None)
+    assert again == ([1, 2, 3], {"route_details": [{"from": 1, "to": 3}]})
+    again[1]["extra"] = True
+    assert "extra" not in cached_route(key, lambda: None)[1]
+
+def test_run_dijkstra_options_are_part_of_the_key(cairo):
+    data, network = cairo
+    flows = data['traffic_flows']
+    
+    def route(show_profile):
+        return cached_route(
+            route_cache_key(network, flows, 1, 3, "morning_peak", ('dijkstra', show_profile)),
+            lambda: run_dijkstra(network, 1, 3, "morning_peak", flows, departure_profile=show_profile)
+        )
+    
+    assert "departure_profile" not in route(False)[3]
+    assert "departure_profile" in route(True)[3]
+    assert "departure_profile" not in route(False)[3]
+    assert route_cache_stats()["size"] == 2
@@ -0,0 +1,109 @@
+import math
+import random
+import pytest
+
+from conftest import TIME_PERIODS, build_city, assert_route
+from src.data.network import build_road_network
+from src.algorithms.ch import (
+    build_contraction_hierarchy, ch_shortest_path, save_contraction_hierarchy,
+    load_contraction_hierarchy, get_period_hierarchies, weights_fingerprint
+)
+from src.algorithms.shortestpath import dijkstra_search, get_period_weights, run_dijkstra
+
+def test_ch_distances_match_dijkstra(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    rng = random.Random(0)
+    
+    for period in TIME_PERIODS:
+        weights = table["weights"][period]
+        hierarchy = build_contraction_hierarchy(network, weights)
+        for _ in range(20):
+            source = rng.randrange(network['num_nodes'])
+            target = rng.randrange(network['num_nodes'])
+            dist, _, _ = dijkstra_search(network, table["arc_weights"][period], [source])
+            
+            cost, path_nodes, path_edge_ids = ch_shortest_path(hierarchy, source, target)
+            assert cost == pytest.approx(dist[target])
+            assert_route(network, weights, source, target, cost, path_nodes, path_edge_ids)
+
+def test_ch_unreachable_target():
+    data, network = build_city(30, 10, seed=7, connected=False)
+    weights = get_period_weights(network, data['traffic_flows'])["weights"]["night"]
+    arc_weights = weights[network['arc_edge']].tolist()
+    hierarchy = build_contraction_hierarchy(network, weights)
+    
+    for source in range(network['num_nodes']):
+        dist, _, _ = dijkstra_search(network, arc_weights, [source])
+        for target in range(network['num_nodes']):
+            cost, path_nodes, _ = ch_shortest_path(hierarchy, source, target)
+            if dist[target] == math.inf:
+                assert cost == math.inf and path_nodes is None
+            else:
+                assert cost == pytest.approx(dist[target])
+
+def test_saved_hierarchy_is_rejected_for_other_weights(city, tmp_path):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    hierarchy = build_contraction_hierarchy(network, table["weights"]["morning_peak"])
+    path = str(tmp_path / "ch.npz")
+    save_contraction_hierarchy(hierarchy, path)
+    
+    loaded = load_contraction_hierarchy(path, network, table["weights"]["morning_peak"])
+    assert loaded is not None
+    assert loaded['weights_hash'] == weights_fingerprint(table["weights"]["morning_peak"])
+    assert load_contraction_hierarchy(path, network, table["weights"]["night"]) is None
+
+def test_run_dijkstra_with_hierarchies_matches_plain_search(city):
+    data, network = city
+    hierarchies = get_period_hierarchies(network, data['traffic_flows'])
+    assert get_period_hierarchies(network, data['traffic_flows']) is hierarchies
+    rng = random.Random(2)
+    
+    for _ in range(20):
+        origin, destination = rng.sample(network['node_ids'], 2)
+        period = rng.choice(TIME_PERIODS)
+        path, travel_time, path_edges, results = run_dijkstra(
+            network, origin, destination, period, data['traffic_flows'], hierarchies=hierarchies, compare_periods=True
+        )
+        _, expected, _, expected_results = run_dijkstra(network, origin, destination, period, data['traffic_flows'],
+                                                        compare_periods=True)
+        assert results["settled_nodes"] is None
+        assert travel_time == pytest.approx(expected)
+        assert path[0] == origin and path[-1] == destination
+        assert sum(edge["time"] for edge in path_edges) == pytest.approx(travel_time)
+        for other in TIME_PERIODS:
+            assert results["time_comparison"][other] == pytest.approx(expected_results["time_comparison"][other])
+    
+    # New traffic counts compile new weights, and the hierarchies are rebuilt for them
+    flows = {road_id: dict(counts, night=counts['night'] * 2) for road_id, counts in data['traffic_flows'].items()}
+    assert get_period_hierarchies(network, flows) is not hierarchies
+
+def test_run_dijkstra_ignores_hierarchy_for_other_weights(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    origin, destination = network['node_ids'][0], network['node_ids'][-1]
+    
+    # The night hierarchy handed in as the morning one must not answer morning queries
+    stale = {"morning_peak": build_contraction_hierarchy(network, table["weights"]["night"])}
+    _, expected, _, _ = run_dijkstra(network, origin, destination, "morning_peak", data['traffic_flows'])
+    _, travel_time, _, _ = run_dijkstra(network, origin, destination, "morning_peak", data['traffic_flows'],
+                                        hierarchies=stale)
+    assert travel_time == pytest.approx(expected)
+
+def test_run_dijkstra_ignores_hierarchy_for_another_network(city):
+    data, network = city
+    
+    # Same roads and weights, but one more district: only the network version differs
+    island = {"id": 999, "name": "Island", "population": 0, "type": "Residential", "x": 31.0, "y": 30.0}
+    other = build_road_network(data['neighborhoods'] + [island], data['facilities'], data['existing_roads'])
+    weights = get_period_weights(network, data['traffic_flows'])["weights"]["morning_peak"]
+    hierarchy = build_contraction_hierarchy(other, get_period_weights(other, data['traffic_flows'])["weights"]["morning_peak"])
+    assert hierarchy['weights_hash'] == weights_fingerprint(weights)
+    
+    origin, destination = network['node_ids'][0], network['node_ids'][-1]
+    _, travel_time, _, results = run_dijkstra(network, origin, destination, "morning_peak", data['traffic_flows'],
+                                              hierarchies={"morning_peak": hierarchy})
+    _, expected, _, _ = run_dijkstra(network, origin, destination, "morning_peak", data['traffic_flows'])
+    assert results["settled_nodes"] is not None
+    assert travel_time == pytest.approx(expected)
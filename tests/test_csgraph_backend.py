@@ -0,0 +1,75 @@
+import math
+import numpy as np
+import pytest
+
+from src.algorithms.csgraph_backend import (
+    sparse_weight_graph, get_sparse_graph, sparse_distance_matrix, run_sparse_routes
+)
+from src.algorithms.matrix import travel_time_matrix
+from src.algorithms.shortestpath import run_dijkstra
+from src.data.network import build_road_network
+
+def test_sparse_graph_keeps_the_cheapest_parallel_road(city):
+    data, network = city
+    roads = list(data['existing_roads'])
+    first = roads[0]
+    # A slower and a faster road alongside the first one
+    roads.append(dict(first, distance=first['distance'] * 3))
+    roads.append(dict(first, **{"from": first['to'], "to": first['from'], "distance": first['distance'] / 2}))
+    network = build_road_network(data['neighborhoods'], data['facilities'], roads)
+    
+    # Close one other road
+    weights = network['distance'].copy()
+    closed = 1
+    weights[closed] = math.inf
+    
+    graph = sparse_weight_graph(network, weights)
+    matrix = graph["matrix"]
+    u, v = network['node_index'][first['from']], network['node_index'][first['to']]
+    assert matrix[u, v] == matrix[v, u] == pytest.approx(first['distance'] / 2)
+    
+    # Every stored entry maps back to a road joining its row and column, at that road's weight
+    rows = np.repeat(np.arange(network['num_nodes']), np.diff(matrix.indptr))
+    for row, col, weight, e in zip(rows, matrix.indices, matrix.data, graph["entry_edge"]):
+        assert {row, col} == {int(network['edge_from'][e]), int(network['edge_to'][e])}
+        assert weight == weights[e]
+    assert closed not in graph["entry_edge"].tolist()
+    assert len(graph["entry_edge"]) == 2 * (len(roads) - 3)
+
+def test_sparse_matrix_matches_the_dijkstra_backend(city):
+    data, network = city
+    districts = network['node_ids'][::3]
+    for period in ("morning_peak", "night"):
+        expected = travel_time_matrix(network, data['traffic_flows'], period, districts, processes=1)
+        matrix = travel_time_matrix(network, data['traffic_flows'], period, districts, backend="csgraph")
+        assert matrix == pytest.approx(expected)
+        assert sparse_distance_matrix(network, data['traffic_flows'], period, districts) == pytest.approx(expected)
+
+def test_sparse_graph_is_rebuilt_for_new_traffic(city):
+    data, network = city
+    graph = get_sparse_graph(network, data['traffic_flows'], "afternoon")
+    assert get_sparse_graph(network, data['traffic_flows'], "afternoon") is graph
+    
+    busier = {road_id: {period: flow * 2 for period, flow in flows.items()}
+              for road_id, flows in data['traffic_flows'].items()}
+    assert get_sparse_graph(network, busier, "afternoon") is not graph
+    
+    expected = travel_time_matrix(network, busier, "afternoon", processes=1)
+    assert sparse_distance_matrix(network, busier, "afternoon") == pytest.approx(expected)
+
+def test_sparse_routes_match_run_dijkstra(city):
+    data, network = city
+    origins = network['node_ids'][:4]
+    destinations = network['node_ids'][-5:] + ["nowhere"]
+    routes = run_sparse_routes(network, origins, destinations, "evening_peak", data['traffic_flows'])
+    
+    for origin in origins:
+        for destination in destinations:
+            path, travel_time, path_edges = routes[(origin, destination)]
+            if destination == "nowhere":
+                assert (path, travel_time, path_edges) == (None, math.inf, [])
+                continue
+            _, expected, _, _ = run_dijkstra(network, origin, destination, "evening_peak", data['traffic_flows'])
+            assert travel_time == pytest.approx(expected)
+            assert path[0] == origin and path[-1] == destination
+            assert len(path_edges) == len(path) - 1
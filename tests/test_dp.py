@@ -0,0 +1,71 @@
+import math
+import random
+import pytest
+
+from src.algorithms.dp import allocate_buses, run_transit_optimization, BULK_ALLOCATION_MIN
+
+def waiting_time(wait_weights, buses):
+    return sum(k / b for k, b in zip(wait_weights, buses))
+
+def optimal_waiting_time(wait_weights, lower, upper, total_buses):
+    """Exact minimum of sum(K / b) with lower <= b <= upper and sum(b) == total, by DP over routes"""
+    best = {0: 0.0}
+    for k, lo, hi in zip(wait_weights, lower, upper):
+        step = {}
+        for used, cost in best.items():
+            for b in range(lo, min(hi, total_buses - used) + 1):
+                value = cost + k / b
+                if value < step.get(used + b, math.inf):
+                    step[used + b] = value
+        best = step
+    return best[total_buses]
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_allocation_is_optimal_for_small_fleets(bulk):
+    rng = random.Random(10)
+    for _ in range(300):
+        n = rng.randint(1, 5)
+        wait_weights = [rng.choice([0.0, rng.uniform(1, 1000)]) for _ in range(n)]
+        current = [rng.randint(1, 12) for _ in range(n)]
+        total = rng.randint(n, sum(current) + 15)
+        
+        buses = allocate_buses(wait_weights, current, total, bulk=bulk)
+        assert sum(buses) == total
+        if total >= sum(current):
+            # Adding buses never takes any away from a route
+            assert all(b >= c for b, c in zip(buses, current))
+            expected = optimal_waiting_time(wait_weights, current, [total] * n, total)
+        else:
+            # Removing buses never adds any to a route or drops it below one bus
+            assert all(1 <= b <= c for b, c in zip(buses, current))
+            expected = optimal_waiting_time(wait_weights, [1] * n, current, total)
+        assert waiting_time(wait_weights, buses) == pytest.approx(expected)
+
+def test_bulk_allocation_keeps_the_fleet_total():
+    rng = random.Random(11)
+    for _ in range(500):
+        n = rng.randint(1, 12)
+        wait_weights = [rng.choice([0.0, 0.0, rng.uniform(0, 1000)]) for _ in range(n)]
+        current = [rng.randint(1, 120) for _ in range(n)]
+        total = rng.randint(n, sum(current) + 300)
+        
+        bulk = allocate_buses(wait_weights, current, total, bulk=True)
+        heap = allocate_buses(wait_weights, current, total, bulk=False)
+        assert sum(bulk) == total == sum(heap)
+        assert waiting_time(wait_weights, bulk) == pytest.approx(waiting_time(wait_weights, heap))
+
+def test_bulk_removal_with_zero_weight_routes():
+    # Zero-weight routes sit at one bus in the continuous optimum, which alone
+    # cannot reach the total; the remaining buses must be handed back
+    wait_weights = [0.0, 0.0, 500.0, 800.0]
+    current = [300, 300, 60, 80]
+    total = sum(current) - BULK_ALLOCATION_MIN
+    
+    buses = allocate_buses(wait_weights, current, total)
+    assert sum(buses) == total
+    assert buses[2:] == [60, 80]
+
+def test_transit_optimization_uses_the_whole_fleet():
+    for total_buses in (20, 100, 227, 400):
+        optimized_schedule, results = run_transit_optimization(total_buses, 15, True)
+        assert sum(optimized_schedule["bus_allocation"].values()) == total_buses
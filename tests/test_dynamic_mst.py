@@ -0,0 +1,80 @@
+import random
+import networkx as nx
+import pytest
+
+from conftest import build_city
+from src.algorithms.dynamic_mst import (
+    build_mst_state, insert_road, mst_snapshot, remove_road, set_mst_priorities, update_road
+)
+from src.algorithms.mst import run_mst_algorithm
+
+def assert_matches_full_run(state, data, existing_roads, potential_roads):
+    """Compare the maintained tree with a from-scratch Kruskal run on the same roads"""
+    mst_graph, total_cost, results = mst_snapshot(state)
+    expected_graph, expected_cost, expected = run_mst_algorithm(
+        state['network'], data['neighborhoods'], data['facilities'], existing_roads, potential_roads,
+        state['prioritize_hospitals'], state['prioritize_high_population']
+    )
+    
+    # Every minimum spanning forest has the same sorted weights and components
+    weights = sorted(road['weight'] for road in results["selected_roads"])
+    assert weights == pytest.approx(sorted(road['weight'] for road in expected["selected_roads"]))
+    assert results["all_connected"] == expected["all_connected"]
+    assert ({frozenset(c) for c in nx.connected_components(mst_graph)} ==
+            {frozenset(c) for c in nx.connected_components(expected_graph)})
+    
+    roads = {(road['from'], road['to'], road['road_type']) for road in results["selected_roads"]}
+    if roads == {(road['from'], road['to'], road['road_type']) for road in expected["selected_roads"]}:
+        assert total_cost == pytest.approx(expected_cost)
+    
+    # Replacements are looked up through the endpoint index of the roads outside the tree
+    indexed = {road_id for road_ids in state['non_tree_adjacency'] for road_id in road_ids}
+    assert indexed == {i for i, edge in enumerate(state['roads']) if edge is not None and not state['in_tree'][i]}
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_random_edits_match_a_full_rebuild(seed):
+    data, network = build_city(40, 30, seed, hospitals=3)
+    rng = random.Random(seed)
+    existing = list(data['existing_roads'])
+    potential = list(data['potential_roads'])
+    state = build_mst_state(network, data['neighborhoods'], data['facilities'], existing, potential)
+    assert_matches_full_run(state, data, existing, potential)
+    
+    node_ids = network['node_ids']
+    for step in range(150):
+        action = rng.random()
+        if action < 0.3:
+            a, b = rng.sample(node_ids, 2)
+            if any({r['from'], r['to']} == {a, b} for r in potential):
+                continue
+            road = {"from": a, "to": b, "distance": round(rng.uniform(1, 20), 1), "capacity": 3000,
+                    "cost": rng.randint(50, 900)}
+            insert_road(state, road)
+            potential.append(road)
+        elif action < 0.5 and potential:
+            road = potential.pop(rng.randrange(len(potential)))
+            remove_road(state, road['from'], road['to'])
+        elif action < 0.65 and existing:
+            road = existing.pop(rng.randrange(len(existing)))
+            remove_road(state, road['from'], road['to'], 'existing')
+        elif action < 0.9 and existing:
+            i = rng.randrange(len(existing))
+            existing[i] = dict(existing[i], condition=rng.randint(1, 10))
+            update_road(state, existing[i]['from'], existing[i]['to'], 'existing', condition=existing[i]['condition'])
+        elif potential:
+            i = rng.randrange(len(potential))
+            potential[i] = dict(potential[i], cost=rng.randint(50, 900))
+            update_road(state, potential[i]['from'], potential[i]['to'], 'potential', cost=potential[i]['cost'])
+        
+        if step % 50 == 49:
+            set_mst_priorities(state, rng.random() < 0.5, rng.random() < 0.5)
+        assert_matches_full_run(state, data, existing, potential)
+
+def test_duplicate_and_unknown_roads_are_rejected(cairo):
+    data, network = cairo
+    state = build_mst_state(network, data['neighborhoods'], data['facilities'],
+                            data['existing_roads'], data['potential_roads'])
+    with pytest.raises(ValueError):
+        insert_road(state, data['potential_roads'][0])
+    with pytest.raises(KeyError):
+        remove_road(state, 1, 2, 'existing')
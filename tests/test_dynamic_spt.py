@@ -0,0 +1,67 @@
+import math
+import random
+import pytest
+
+from src.algorithms.dynamic_spt import build_spt_state, set_edge_weight, spt_route, update_road
+from src.algorithms.shortestpath import dijkstra_search
+
+def assert_trees_current(state):
+    """Every maintained tree must equal a fresh search over the state's current weights"""
+    network = state['network']
+    for source_id, tree in state['trees'].items():
+        dist, _, _ = dijkstra_search(network, state['arc_weights'], [tree['source']])
+        assert tree['dist'] == pytest.approx(dist)
+        
+        for node in range(network['num_nodes']):
+            parent = tree['pred'][node]
+            if parent == -1:
+                continue
+            # Tree edges join parent and child and are tight
+            e = tree['pred_edge'][node]
+            assert {parent, node} == {int(network['edge_from'][e]), int(network['edge_to'][e])}
+            assert tree['dist'][parent] + state['edge_weights'][e] == pytest.approx(tree['dist'][node])
+
+@pytest.mark.parametrize("time_period", [None, "evening_peak"])
+def test_trees_follow_random_weight_changes(city, time_period):
+    data, network = city
+    sources = network['node_ids'][::12]
+    state = build_spt_state(network, data['traffic_flows'], time_period, sources)
+    rng = random.Random(5)
+    
+    for step in range(60):
+        edge = rng.randrange(network['num_edges'])
+        old_weight = float(state['edge_weights'][edge])
+        weight = rng.choice([old_weight * rng.uniform(0.1, 0.9), old_weight * rng.uniform(1.1, 5), math.inf])
+        set_edge_weight(state, edge, weight)
+        if step % 10 == 0:
+            assert_trees_current(state)
+    assert_trees_current(state)
+
+def test_update_road_applies_the_cost_model(city):
+    data, network = city
+    state = build_spt_state(network, data['traffic_flows'], "morning_peak", network['node_ids'][:3])
+    rng = random.Random(6)
+    
+    for _ in range(20):
+        e = rng.randrange(network['num_edges'])
+        from_id = network['node_ids'][network['edge_from'][e]]
+        to_id = network['node_ids'][network['edge_to'][e]]
+        update_road(state, from_id, to_id, condition=rng.randint(1, 10), flow=rng.randint(100, 5000))
+    assert_trees_current(state)
+    
+    # The shared network keeps its original conditions
+    assert (state['condition'] != network['condition']).any()
+    with pytest.raises(KeyError):
+        update_road(state, "nowhere", network['node_ids'][0], condition=3)
+
+def test_spt_route_follows_the_tree(city):
+    data, network = city
+    source_id = network['node_ids'][0]
+    state = build_spt_state(network, data['traffic_flows'], None, [source_id])
+    dist, _, _ = dijkstra_search(network, state['arc_weights'], [network['node_index'][source_id]])
+    
+    for target_id in network['node_ids']:
+        cost, path, roads = spt_route(state, source_id, target_id)
+        assert cost == pytest.approx(dist[network['node_index'][target_id]])
+        assert path[0] == source_id and path[-1] == target_id
+        assert len(roads) == len(path) - 1
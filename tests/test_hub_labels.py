@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from conftest import build_city
+from src.algorithms.ch import build_contraction_hierarchy
+from src.algorithms.hub_labels import (
+    build_hub_labels, hub_distance, hub_distance_matrix, save_hub_labels, load_hub_labels, get_period_hub_labels
+)
+from src.algorithms.matrix import travel_time_matrix, weighted_distance_matrix
+from src.algorithms.shortestpath import get_period_weights
+
+# Label distances are float64; a hub sum adds the same edge weights as Dijkstra
+# in a different order, so only rounding separates the two
+LABEL_TOLERANCE = 1e-12
+
+def all_pairs(network, arc_weights):
+    return weighted_distance_matrix(network, arc_weights, processes=1)
+
+@pytest.mark.parametrize("use_hierarchy", [False, True])
+def test_hub_distances_match_dijkstra(city, use_hierarchy):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    weights = table["weights"]["morning_peak"]
+    hierarchy = build_contraction_hierarchy(network, weights) if use_hierarchy else None
+    labels = build_hub_labels(network, weights, hierarchy)
+    expected = all_pairs(network, table["arc_weights"]["morning_peak"])
+    
+    nodes = list(range(network['num_nodes']))
+    assert hub_distance_matrix(labels, nodes, nodes) == pytest.approx(expected, rel=LABEL_TOLERANCE)
+    for source in nodes[::9]:
+        for target in nodes[::4]:
+            assert hub_distance(labels, source, target) == pytest.approx(expected[source, target], rel=LABEL_TOLERANCE)
+
+def test_unreachable_pairs_are_infinite():
+    data, network = build_city(30, 10, seed=8, connected=False)
+    table = get_period_weights(network, data['traffic_flows'])
+    labels = build_hub_labels(network, table["weights"]["night"])
+    expected = all_pairs(network, table["arc_weights"]["night"])
+    
+    nodes = list(range(network['num_nodes']))
+    matrix = hub_distance_matrix(labels, nodes, nodes)
+    assert np.array_equal(np.isinf(matrix), np.isinf(expected))
+    assert matrix[np.isfinite(expected)] == pytest.approx(expected[np.isfinite(expected)], rel=LABEL_TOLERANCE)
+
+def test_stored_labels_are_memory_mapped_and_checked(city, tmp_path):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    labels = build_hub_labels(network, table["weights"]["afternoon"])
+    save_hub_labels(labels, str(tmp_path / "labels"))
+    
+    loaded = load_hub_labels(str(tmp_path / "labels"), network, table["weights"]["afternoon"])
+    assert isinstance(loaded['hubs'], np.memmap)
+    assert hub_distance_matrix(loaded, [0, 1, 2], [3, 4, 5]) == pytest.approx(hub_distance_matrix(labels, [0, 1, 2], [3, 4, 5]))
+    assert load_hub_labels(str(tmp_path / "labels"), network, table["weights"]["night"]) is None
+    assert load_hub_labels(str(tmp_path / "missing")) is None
+    
+    # Labels saved with float32 distances by earlier versions are rebuilt
+    save_hub_labels(dict(labels, dists=labels['dists'].astype(np.float32)), str(tmp_path / "old"))
+    assert load_hub_labels(str(tmp_path / "old"), network, table["weights"]["afternoon"]) is None
+
+def test_travel_time_matrix_uses_only_current_labels(city, tmp_path):
+    data, network = city
+    hub_labels = get_period_hub_labels(network, data['traffic_flows'], str(tmp_path))
+    districts = network['node_ids'][:20]
+    expected = travel_time_matrix(network, data['traffic_flows'], "evening_peak", districts, districts, processes=1)
+    
+    matrix = travel_time_matrix(network, data['traffic_flows'], "evening_peak", districts, districts, hub_labels=hub_labels)
+    assert matrix == pytest.approx(expected, rel=LABEL_TOLERANCE)
+    
+    # Labels of another period stand in for stale ones and must be ignored
+    stale = {"evening_peak": hub_labels["night"]}
+    matrix = travel_time_matrix(network, data['traffic_flows'], "evening_peak", districts, districts, hub_labels=stale)
+    assert matrix == pytest.approx(expected)
@@ -0,0 +1,64 @@
+import pytest
+
+from src.algorithms.isochrone import compute_isochrones, hospital_coverage, isochrone_edge_weights
+from src.algorithms.shortestpath import dijkstra_search, run_a_star
+
+THRESHOLDS = (10, 30, 60)
+
+def test_isochrones_match_dijkstra(city):
+    data, network = city
+    weights = isochrone_edge_weights(network, data['traffic_flows'], "morning_peak")
+    arc_weights = weights[network['arc_edge']].tolist()
+    sources = network['node_ids'][::10]
+    isochrones = compute_isochrones(network, sources, "morning_peak", data['traffic_flows'], THRESHOLDS)
+    
+    for source_id in sources:
+        dist, _, _ = dijkstra_search(network, arc_weights, [network['node_index'][source_id]])
+        reach = isochrones[source_id]
+        for threshold in THRESHOLDS:
+            layer = reach["isochrones"][threshold]
+            assert set(layer["nodes"]) == {network['node_ids'][v] for v, d in enumerate(dist) if d <= threshold}
+            
+            for e, road_id in enumerate(network['road_ids']):
+                a, b = dist[network['edge_from'][e]], dist[network['edge_to'][e]]
+                covered = (max(threshold - a, 0) + max(threshold - b, 0)) / weights[e]
+                if covered >= 1:
+                    assert road_id in layer["edges"]
+                elif covered > 0:
+                    assert layer["partial_edges"][road_id] == pytest.approx(covered)
+                else:
+                    assert road_id not in layer["edges"] and road_id not in layer["partial_edges"]
+    
+    assert compute_isochrones(network, ["nowhere"], "night", data['traffic_flows']) == {"nowhere": {"error": "Unknown node"}}
+
+def test_emergency_coverage_matches_run_a_star(city):
+    data, network = city
+    coverage = hospital_coverage(network, THRESHOLDS)
+    combined = coverage["combined"]["travel_time"]
+    
+    for node_id in network['node_ids']:
+        path, travel_time, _, results = run_a_star(network, node_id, None, data['neighborhoods'], data['facilities'])
+        if travel_time <= THRESHOLDS[-1]:
+            assert combined[node_id] == pytest.approx(travel_time)
+        else:
+            assert node_id not in combined
+    
+    for hospital_id, reach in coverage["hospitals"].items():
+        for node_id, minutes in list(reach["travel_time"].items())[::5]:
+            _, travel_time, _, _ = run_a_star(network, node_id, hospital_id, data['neighborhoods'], data['facilities'])
+            assert minutes == pytest.approx(travel_time)
+    
+    node_index = network['node_index']
+    for threshold in THRESHOLDS:
+        nodes = [node_index[node_id] for node_id, minutes in combined.items() if minutes <= threshold]
+        assert coverage["population_covered"][threshold] == pytest.approx(float(network['population'][nodes].sum()))
+
+def test_emergency_isochrones_do_not_depend_on_the_period(city):
+    data, network = city
+    sources = network['node_ids'][::25]
+    emergency = compute_isochrones(network, sources, thresholds=THRESHOLDS, emergency=True)
+    for period in ["morning_peak", "night"]:
+        assert compute_isochrones(network, sources, period, data['traffic_flows'], THRESHOLDS, emergency=True) == emergency
+    
+    with pytest.raises(ValueError):
+        isochrone_edge_weights(network, data['traffic_flows'])
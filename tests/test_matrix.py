@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from conftest import build_city
+from src.algorithms.matrix import travel_time_matrix, weighted_distance_matrix
+from src.algorithms.shortestpath import get_period_weights, run_dijkstra
+
+def test_matrix_matches_run_dijkstra_per_pair(cairo):
+    data, network = cairo
+    districts = [n['id'] for n in data['neighborhoods']]
+    hospitals = [f['id'] for f in data['facilities']]
+    matrix = travel_time_matrix(network, data['traffic_flows'], "evening_peak", districts, hospitals)
+    
+    assert matrix.shape == (len(districts), len(hospitals))
+    for i, origin in enumerate(districts):
+        for j, destination in enumerate(hospitals):
+            _, travel_time, _, _ = run_dijkstra(network, origin, destination, "evening_peak", data['traffic_flows'])
+            assert matrix[i, j] == pytest.approx(travel_time)
+
+def test_unreachable_pairs_are_infinite():
+    data, network = build_city(30, 5, seed=4, connected=False)
+    matrix = travel_time_matrix(network, data['traffic_flows'], "night")
+    assert np.all(np.diag(matrix) == 0) and np.isinf(matrix).any()
+    for i, origin in enumerate(network['node_ids']):
+        for j, destination in enumerate(network['node_ids']):
+            if i != j:
+                _, travel_time, _, _ = run_dijkstra(network, origin, destination, "night", data['traffic_flows'])
+                assert matrix[i, j] == pytest.approx(travel_time)
+
+def test_process_pool_matches_serial(city):
+    data, network = city
+    arc_weights = get_period_weights(network, data['traffic_flows'])["arc_weights"]["morning_peak"]
+    serial = weighted_distance_matrix(network, arc_weights, processes=1)
+    parallel = weighted_distance_matrix(network, arc_weights, processes=2)
+    assert np.array_equal(serial, parallel)
+    assert np.allclose(serial, serial.T)
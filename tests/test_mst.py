@@ -0,0 +1,82 @@
+import pytest
+
+from conftest import build_city
+from src.algorithms.mst import run_mst_algorithm
+
+def reference_mst(data, prioritize_hospitals, prioritize_high_population):
+    """
+    The original Kruskal pass: the same prioritized weights, a stable sort and set-based merging.
+    
+    Returns:
+        selected: List of (from ID, to ID, road type, weight) in selection order
+        total_cost: Maintenance plus construction cost of the selected roads
+        all_connected: Whether the selected roads span every node
+    """
+    population = {n['id']: n['population'] for n in data['neighborhoods']}
+    critical_ids = {f['id'] for f in data['facilities'] if f['type'] in ("Medical", "Airport")}
+    
+    def prioritized(road, weight, population_factor, critical_factor):
+        source_pop = population.get(road['from'])
+        target_pop = population.get(road['to'])
+        if prioritize_high_population and source_pop and target_pop and max(source_pop, target_pop) >= 400000:
+            weight *= population_factor
+        if prioritize_hospitals and (road['from'] in critical_ids or road['to'] in critical_ids):
+            weight *= critical_factor
+        return weight
+    
+    edges = []
+    for road in data['existing_roads']:
+        maintenance_cost = (11 - road['condition']) * 10
+        edges.append((prioritized(road, road['distance'] * maintenance_cost, 0.7, 0.6), road, 'existing', maintenance_cost))
+    for road in data.get('potential_roads', []):
+        edges.append((prioritized(road, road['cost'], 0.8, 0.7), road, 'potential', road['cost']))
+    edges.sort(key=lambda edge: edge[0])
+    
+    trees = {n['id']: {n['id']} for n in data['neighborhoods'] + data['facilities']}
+    selected = []
+    total_cost = 0
+    for weight, road, road_type, cost in edges:
+        u, v = road['from'], road['to']
+        if trees[u] is not trees[v]:
+            selected.append((u, v, road_type, weight))
+            total_cost += cost
+            union = trees[u] | trees[v]
+            for node in union:
+                trees[node] = union
+    
+    return selected, total_cost, len({id(tree) for tree in trees.values()}) == 1
+
+def assert_same_mst(data, network):
+    for prioritize_hospitals in (True, False):
+        for prioritize_high_population in (True, False):
+            mst_graph, total_cost, results = run_mst_algorithm(
+                network, data['neighborhoods'], data['facilities'], data['existing_roads'],
+                data.get('potential_roads', []), prioritize_hospitals, prioritize_high_population
+            )
+            selected, expected_cost, all_connected = reference_mst(data, prioritize_hospitals, prioritize_high_population)
+            roads = results["selected_roads"]
+            assert [(r['from'], r['to'], r['road_type']) for r in roads] == [s[:3] for s in selected]
+            assert [r['weight'] for r in roads] == pytest.approx([s[3] for s in selected])
+            assert total_cost == pytest.approx(expected_cost)
+            assert results["all_connected"] == all_connected
+            assert mst_graph.number_of_edges() == len(selected)
+            assert results["existing_roads_count"] + results["new_roads_count"] == len(selected)
+
+def test_mst_matches_the_original_kruskal(cairo):
+    data, network = cairo
+    assert_same_mst(data, network)
+    
+    # The airport and both hospitals, as the hardcoded F1/F9/F10 ids used to say
+    _, _, results = run_mst_algorithm(network, data['neighborhoods'], data['facilities'],
+                                      data['existing_roads'], data['potential_roads'])
+    assert results["total_critical_facilities"] == 3
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_mst_on_random_cities(seed):
+    data, network = build_city(60, 40, seed, hospitals=4)
+    assert_same_mst(data, network)
+
+def test_mst_of_a_disconnected_network():
+    data, network = build_city(40, 10, seed=5, connected=False)
+    data['potential_roads'] = []
+    assert_same_mst(data, network)
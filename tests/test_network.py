@@ -0,0 +1,77 @@
+import numpy as np
+
+from src.data import network as network_module
+from src.data.network import (
+    FACILITY_AIRPORT, FACILITY_MEDICAL, build_road_network, get_adjacency, get_node_name, get_road_network,
+    traffic_fingerprint
+)
+
+def test_network_indexes_districts_and_facilities(cairo):
+    data, network = cairo
+    nodes = data['neighborhoods'] + data['facilities']
+    assert network['num_nodes'] == len(nodes)
+    assert network['num_edges'] == len(data['existing_roads'])
+    for node in nodes:
+        i = network['node_index'][node['id']]
+        assert network['node_ids'][i] == node['id']
+        assert (network['x'][i], network['y'][i]) == (node['x'], node['y'])
+        assert get_node_name(network, node['id']) == node['name']
+    assert get_node_name(network, "unknown") == "unknown"
+
+def test_node_attribute_index(cairo):
+    data, network = cairo
+    flags = {"Medical": FACILITY_MEDICAL, "Airport": FACILITY_AIRPORT}
+    for node in data['neighborhoods'] + data['facilities']:
+        i = network['node_index'][node['id']]
+        assert network['population'][i] == node.get('population', 0)
+        assert network['facility_flags'][i] == flags.get(node['type'], 0)
+
+def test_every_road_is_two_arcs(city):
+    data, network = city
+    indptr, indices, arc_edge = get_adjacency(network)
+    assert len(indices) == 2 * network['num_edges']
+    
+    arcs = {}
+    for u in range(network['num_nodes']):
+        for arc in range(indptr[u], indptr[u + 1]):
+            arcs.setdefault(arc_edge[arc], []).append((u, indices[arc]))
+    
+    node_index = network['node_index']
+    for e, road in enumerate(data['existing_roads']):
+        u, v = node_index[road['from']], node_index[road['to']]
+        assert sorted(arcs[e]) == sorted([(u, v), (v, u)])
+        assert network['road_ids'][e] == f"{road['from']}-{road['to']}"
+        assert (network['distance'][e], network['capacity'][e], network['condition'][e]) == (
+            road['distance'], road['capacity'], road['condition'])
+
+def test_shared_network_is_rebuilt_only_for_new_data(cairo, monkeypatch):
+    data, _ = cairo
+    monkeypatch.setattr(network_module, "_NETWORK_CACHE", {})
+    network = get_road_network(data)
+    assert get_road_network(data) is network
+    
+    roads = [dict(road) for road in data['existing_roads']]
+    roads[0]['condition'] = 1
+    changed = get_road_network(dict(data, existing_roads=roads))
+    assert changed is not network and changed['version'] != network['version']
+    assert np.count_nonzero(changed['condition'] != network['condition']) == 1
+    
+    rebuilt = build_road_network(data['neighborhoods'], data['facilities'], data['existing_roads'])
+    assert rebuilt['version'] == network['version']
+
+def test_traffic_snapshots_are_fingerprinted_by_content(cairo, monkeypatch):
+    data, _ = cairo
+    monkeypatch.setattr(network_module, "_TRAFFIC_FINGERPRINTS", {})
+    fingerprint = traffic_fingerprint(data['traffic_flows'])
+    assert traffic_fingerprint(data['traffic_flows']) == fingerprint
+    
+    copy = {road_id: dict(counts) for road_id, counts in data['traffic_flows'].items()}
+    assert traffic_fingerprint(copy) == fingerprint
+    
+    road_id = next(iter(copy))
+    changed = dict(copy, **{road_id: dict(copy[road_id], night=copy[road_id]['night'] + 1)})
+    assert traffic_fingerprint(changed) != fingerprint
+    
+    for _ in range(2 * network_module.TRAFFIC_FINGERPRINT_SLOTS):
+        traffic_fingerprint(dict(copy))
+    assert len(network_module._TRAFFIC_FINGERPRINTS) == network_module.TRAFFIC_FINGERPRINT_SLOTS
@@ -0,0 +1,91 @@
+import heapq
+import math
+import random
+import pytest
+
+from src.data.network import get_adjacency
+from src.algorithms.profile import (
+    PERIOD_ANCHORS, SLOT_MINUTES, SLOTS_PER_DAY,
+    build_travel_time_functions, departure_times, profile_search
+)
+from src.algorithms.shortestpath import TIME_PERIODS, run_dijkstra
+
+def time_dependent_dijkstra(network, ttf, source, target, departure):
+    """Reference: one plain time-dependent Dijkstra search for a single departure"""
+    indptr, indices, arc_edge = get_adjacency(network)
+    arrival = {source: departure}
+    heap = [(departure, source)]
+    done = set()
+    while heap:
+        time, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        if u == target:
+            return time - departure
+        done.add(u)
+        
+        position = time / SLOT_MINUTES
+        slot = int(position)
+        fraction = position - slot
+        for arc in range(indptr[u], indptr[u + 1]):
+            values = ttf[arc_edge[arc]]
+            v = indices[arc]
+            next_time = (time + float(values[slot % SLOTS_PER_DAY]) * (1 - fraction) +
+                         float(values[(slot + 1) % SLOTS_PER_DAY]) * fraction)
+            if next_time < arrival.get(v, math.inf):
+                arrival[v] = next_time
+                heapq.heappush(heap, (next_time, v))
+    return math.inf
+
+def test_profile_matches_one_search_per_departure(city):
+    data, network = city
+    ttf = build_travel_time_functions(network, data['traffic_flows'])
+    rng = random.Random(2)
+    
+    for _ in range(4):
+        source, target = rng.sample(range(network['num_nodes']), 2)
+        departures, travel_time = profile_search(network, ttf, source, target)
+        assert len(departures) == SLOTS_PER_DAY
+        for departure, minutes in list(zip(departures, travel_time))[::8]:
+            assert minutes == pytest.approx(time_dependent_dijkstra(network, ttf, source, target, departure))
+
+def test_anchor_departures_match_the_profile(city):
+    data, network = city
+    ttf = build_travel_time_functions(network, data['traffic_flows'])
+    rng = random.Random(3)
+    anchors = [PERIOD_ANCHORS[period] for period in TIME_PERIODS]
+    
+    for _ in range(10):
+        origin, destination = rng.sample(network['node_ids'], 2)
+        source, target = network['node_index'][origin], network['node_index'][destination]
+        path, _, _, results = run_dijkstra(network, origin, destination, "afternoon", data['traffic_flows'],
+                                           compare_periods=True)
+        _, expected = profile_search(network, ttf, source, target, anchors)
+        
+        # The route found for the selected period is the known upper bound
+        path_edge_ids = route_edges(network, path)
+        assert departure_times(network, ttf, source, target, anchors, path_edge_ids) == pytest.approx(expected)
+        assert [results["time_comparison"][period] for period in TIME_PERIODS] == pytest.approx(expected)
+
+def test_departure_profile_only_on_request(city):
+    data, network = city
+    origin, destination = network['node_ids'][5], network['node_ids'][50]
+    _, _, _, results = run_dijkstra(network, origin, destination, "night", data['traffic_flows'])
+    assert "departure_profile" not in results and "time_comparison" not in results
+    
+    _, _, _, results = run_dijkstra(network, origin, destination, "night", data['traffic_flows'],
+                                    departure_profile=True)
+    ttf = build_travel_time_functions(network, data['traffic_flows'])
+    departures, travel_time = profile_search(network, ttf, network['node_index'][origin],
+                                             network['node_index'][destination])
+    assert results["departure_profile"]["departure_minutes"] == departures.tolist()
+    assert results["departure_profile"]["travel_time"] == pytest.approx(travel_time.tolist())
+    
+    # The period comparison is read from the profile at each period's anchor time
+    for period in TIME_PERIODS:
+        assert results["time_comparison"][period] == travel_time[PERIOD_ANCHORS[period] // SLOT_MINUTES]
+
+def route_edges(network, path):
+    """Edge indices along a node ID path, taking the first road between each pair"""
+    lookup = {road_id: e for e, road_id in enumerate(network['road_ids'])}
+    return [lookup.get(f"{u}-{v}", lookup.get(f"{v}-{u}")) for u, v in zip(path, path[1:])]
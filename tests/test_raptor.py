@@ -0,0 +1,135 @@
+import heapq
+import math
+from bisect import bisect_left
+import pytest
+
+from src.algorithms.raptor import (
+    CHANGE_MINUTES, METRO_DWELL_MINUTES, METRO_SPEED, build_transit_network, get_transit_network, raptor_search,
+    run_journey_planner
+)
+from src.algorithms.shortestpath import get_period_weights
+from src.algorithms.isochrone import truncated_search
+
+def earliest_arrival(transit, access, egress, departure):
+    """
+    Reference: Dijkstra over (stop, how it was reached) with unlimited transfers.
+    
+    Riding from an access stop boards at once, changing after a vehicle or a walk
+    takes CHANGE_MINUTES, and walking transfers only follow a vehicle.
+    """
+    route_stops = transit['route_stops']
+    route_offsets = transit['route_offsets']
+    stop_times = transit['stop_times']
+    best = {}
+    heap = [(departure + minutes, stop, "access") for stop, minutes in access.items()]
+    heapq.heapify(heap)
+    arrival = math.inf
+    
+    while heap:
+        time, p, kind = heapq.heappop(heap)
+        if (p, kind) in best:
+            continue
+        best[(p, kind)] = time
+        if p in egress:
+            arrival = min(arrival, time + egress[p])
+        
+        ready = time if kind == "access" else time + CHANGE_MINUTES
+        for i in range(transit['stop_route_offsets'][p], transit['stop_route_offsets'][p + 1]):
+            r, position = transit['stop_routes'][i]
+            trips = transit['num_trips'][r]
+            column = transit['time_offsets'][r] + position * trips
+            trip = bisect_left(stop_times, ready, column, column + trips) - column
+            if trip == trips:
+                continue
+            for later in range(position + 1, route_offsets[r + 1] - route_offsets[r]):
+                q = route_stops[route_offsets[r] + later]
+                heapq.heappush(heap, (stop_times[transit['time_offsets'][r] + later * trips + trip], q, "trip"))
+        
+        if kind == "trip":
+            for i in range(transit['footpath_offsets'][p], transit['footpath_offsets'][p + 1]):
+                q, minutes = transit['footpaths'][i]
+                heapq.heappush(heap, (time + minutes, q, "walk"))
+    
+    return arrival
+
+@pytest.mark.parametrize("time_period", ["morning_peak", "night"])
+def test_raptor_finds_the_earliest_arrival(cairo, time_period):
+    data, network = cairo
+    transit = get_transit_network(network, data['metro_lines'], data['bus_routes'], data['traffic_flows'], time_period,
+                                  station_aliases=data['station_aliases'])
+    stop_index = transit['stop_index']
+    drive_arcs = get_period_weights(network, data['traffic_flows'])["arc_weights"][time_period]
+    
+    checked = 0
+    for origin in range(network['num_nodes']):
+        _, from_origin = truncated_search(network, drive_arcs, [origin], 20)
+        access = {stop_index[v]: minutes for v, minutes in from_origin.items() if v in stop_index}
+        for destination in range(0, network['num_nodes'], 3):
+            _, to_destination = truncated_search(network, drive_arcs, [destination], 20)
+            egress = {stop_index[v]: minutes for v, minutes in to_destination.items() if v in stop_index}
+            for departure in (7 * 60 + 5, 13 * 60 + 47):
+                journeys = raptor_search(transit, access, egress, departure, max_transfers=20)
+                expected = earliest_arrival(transit, access, egress, departure)
+                if expected == math.inf:
+                    assert journeys == []
+                    continue
+                checked += 1
+                assert journeys[-1][1] == pytest.approx(expected)
+                
+                # Each extra vehicle must buy an earlier arrival
+                assert [vehicles for vehicles, _, _ in journeys] == sorted({vehicles for vehicles, _, _ in journeys})
+                arrivals = [arrival for _, arrival, _ in journeys]
+                assert arrivals == sorted(arrivals, reverse=True) and len(set(arrivals)) == len(arrivals)
+    assert checked > 0
+
+def test_journey_legs_are_consistent(cairo):
+    data, network = cairo
+    departure = 8 * 60
+    for origin, destination in [(7, 5), (1, 11), (15, 4), ("F2", 12)]:
+        journey, results = run_journey_planner(
+            network, origin, destination, departure, "morning_peak", data['traffic_flows'],
+            data['metro_lines'], data['bus_routes'], access_mode='drive', station_aliases=data['station_aliases']
+        )
+        assert journey is not None
+        assert journey["legs"][0]["depart"] == departure
+        assert journey["arrival"] == pytest.approx(journey["legs"][-1]["arrive"])
+        assert journey["travel_time"] == pytest.approx(journey["arrival"] - departure)
+        for leg, following in zip(journey["legs"], journey["legs"][1:]):
+            assert leg["arrive"] <= following["depart"] + 1e-9
+            assert leg["to"] == following["from"]
+        assert journey["vehicles"] == sum(leg["mode"] in ("metro", "bus") for leg in journey["legs"])
+        
+        arrivals = [j["arrival"] for j in results["journeys"]]
+        assert arrivals == sorted(arrivals, reverse=True)
+        assert results["unmapped_stops"] == [] and results["dropped_routes"] == {}
+
+def test_metro_segments_follow_station_coordinates(cairo):
+    data, network = cairo
+    transit = build_transit_network(network, data['metro_lines'], data['bus_routes'], data['traffic_flows'],
+                                    "afternoon", station_aliases=data['station_aliases'])
+    
+    # Line 2 calls at Cairo University, which no road reaches, so it can only be timed by coordinates
+    assert {"M1 outbound", "M2 outbound", "M2 inbound", "M3 inbound"} <= set(transit['route_ids'])
+    for r, route_id in enumerate(transit['route_ids']):
+        if transit['route_modes'][r] != "metro":
+            continue
+        stops = [transit['stops'][s] for s in transit['route_stops'][transit['route_offsets'][r]:transit['route_offsets'][r + 1]]]
+        base, trips = transit['time_offsets'][r], transit['num_trips'][r]
+        for position, (a, b) in enumerate(zip(stops, stops[1:])):
+            km = math.hypot((network['x'][a] - network['x'][b]) * math.cos(math.radians((network['y'][a] + network['y'][b]) / 2)),
+                            network['y'][a] - network['y'][b]) * 111.32
+            segment = transit['stop_times'][base + (position + 1) * trips] - transit['stop_times'][base + position * trips]
+            assert segment == pytest.approx(km / METRO_SPEED * 60 + METRO_DWELL_MINUTES)
+
+def test_routes_that_cannot_be_placed_are_reported(cairo):
+    data, network = cairo
+    bus_routes = data['bus_routes'] + [
+        {"id": "B11", "stops": ["Giza", "Cairo University"], "current_buses": 4},
+        {"id": "B12", "stops": ["Giza", "Nowhere"], "current_buses": 4}
+    ]
+    transit = build_transit_network(network, data['metro_lines'], bus_routes, data['traffic_flows'], "night",
+                                    station_aliases=data['station_aliases'])
+    assert set(transit['dropped_routes']) == {"B11", "B12"}
+    assert transit['unmapped_stops'] == ["Nowhere"]
+    assert not any(route_id.startswith(("B11 ", "B12 ")) for route_id in transit['route_ids'])
+    assert len(transit['route_ids']) == 2 * (len(data['metro_lines']) + len(data['bus_routes']))
@@ -0,0 +1,96 @@
+import random
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import build_city
+from src.data.network import FACILITY_MEDICAL
+from src.algorithms.resilience import (
+    build_resilience_index, get_resilience_index, road_closure_impact, critical_roads
+)
+
+@pytest.fixture(params=[(60, 8, True), (60, 30, True), (50, 40, False)])
+def sparse_city(request):
+    """Tree-like cities with many bridges, one of them in pieces"""
+    num_nodes, extra_roads, connected = request.param
+    _, network = build_city(num_nodes, extra_roads, seed=num_nodes + extra_roads, hospitals=3, connected=connected)
+    return network
+
+def open_graph(network, closed=()):
+    graph = nx.Graph()
+    graph.add_nodes_from(range(network['num_nodes']))
+    for e, (u, v) in enumerate(zip(network['edge_from'].tolist(), network['edge_to'].tolist())):
+        if e not in closed:
+            graph.add_edge(u, v, edge=e)
+    return graph
+
+def districts_with_access(network, graph):
+    hospitals = set(np.flatnonzero(network['facility_flags'] & FACILITY_MEDICAL).tolist())
+    reached = set()
+    for component in nx.connected_components(graph):
+        if hospitals & component:
+            reached |= component
+    return {v for v in reached if network['node_kinds'][v] == 'neighborhood'}
+
+def test_bridges_and_articulation_points_match_networkx(sparse_city):
+    network = sparse_city
+    index = build_resilience_index(network)
+    graph = open_graph(network)
+    
+    assert {graph.edges[u, v]['edge'] for u, v in nx.bridges(graph)} == set(index['bridges'])
+    assert set(nx.articulation_points(graph)) == set(index['articulation_points'])
+    
+    # 2-edge-connected components are the connected pieces left after removing every bridge
+    graph.remove_edges_from(list(nx.bridges(graph)))
+    expected = {frozenset(component) for component in nx.connected_components(graph)}
+    labels = {}
+    for v, label in enumerate(index['component']):
+        labels.setdefault(label, set()).add(v)
+    assert {frozenset(nodes) for nodes in labels.values()} == expected
+    assert index['num_components'] == len(expected)
+
+def test_closure_impact_matches_removing_the_road(sparse_city):
+    network = sparse_city
+    index = build_resilience_index(network)
+    node_ids = network['node_ids']
+    before = districts_with_access(network, open_graph(network))
+    
+    for e in range(network['num_edges']):
+        from_id, to_id = node_ids[network['edge_from'][e]], node_ids[network['edge_to'][e]]
+        impact = road_closure_impact(network, index, from_id, to_id)
+        after_graph = open_graph(network, {e})
+        
+        assert impact["is_bridge"] == (e in index['bridges'])
+        losing = {node_ids[v] for v in before - districts_with_access(network, after_graph)}
+        assert set(impact["districts_losing_access"]) == losing
+        assert impact["population_affected"] == pytest.approx(
+            sum(float(network['population'][network['node_index'][d]]) for d in losing)
+        )
+        if impact["is_bridge"]:
+            # The separated side is a whole connected component once the road is gone
+            separated = {network['node_index'][v] for v in impact["separated_nodes"]}
+            assert separated in [set(c) for c in nx.connected_components(after_graph)]
+    
+    with pytest.raises(KeyError):
+        road_closure_impact(network, index, "nowhere", node_ids[0])
+
+def test_index_for_already_closed_roads(sparse_city):
+    network = sparse_city
+    rng = random.Random(9)
+    closed = set(rng.sample(range(network['num_edges']), 5))
+    closed_ids = [network['road_ids'][e] for e in closed]
+    
+    index = get_resilience_index(network, closed_ids)
+    assert get_resilience_index(network, list(reversed(closed_ids))) is index
+    graph = open_graph(network, closed)
+    assert {graph.edges[u, v]['edge'] for u, v in nx.bridges(graph)} == set(index['bridges'])
+
+def test_critical_roads_are_ranked_by_population(sparse_city):
+    network = sparse_city
+    index = build_resilience_index(network)
+    roads = critical_roads(network, index)
+    
+    populations = [population for _, population, _ in roads]
+    assert populations == sorted(populations, reverse=True)
+    assert all(districts for _, _, districts in roads)
+    assert {road_id for road_id, _, _ in roads} <= {network['road_ids'][e] for e in index['bridges']}
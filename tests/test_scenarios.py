@@ -0,0 +1,64 @@
+import math
+import random
+import numpy as np
+import pytest
+
+from conftest import TIME_PERIODS
+from src.data.network import build_road_network
+from src.algorithms.matrix import travel_time_matrix
+from src.algorithms.scenarios import run_closure_scenarios
+
+def rebuilt_matrices(data, scenario, districts):
+    """Reference: rebuild the network with the scenario applied and search it from scratch"""
+    closed = set(scenario.get('closed_roads', []))
+    conditions = scenario.get('conditions', {})
+    roads = [dict(road, condition=conditions.get(f"{road['from']}-{road['to']}", road['condition']))
+             for road in data['existing_roads'] if f"{road['from']}-{road['to']}" not in closed]
+    network = build_road_network(data['neighborhoods'], data['facilities'], roads)
+    return {period: travel_time_matrix(network, data['traffic_flows'], period, districts, processes=1)
+            for period in TIME_PERIODS}
+
+def random_scenarios(network, seed):
+    rng = random.Random(seed)
+    road_ids = network['road_ids']
+    return [
+        {"name": "closures", "closed_roads": rng.sample(road_ids, 4)},
+        {"name": "worse roads", "conditions": {road_id: 1 for road_id in rng.sample(road_ids, 6)}},
+        {"name": "repairs", "conditions": {road_id: 10 for road_id in rng.sample(road_ids, 6)}},
+        {"closed_roads": rng.sample(road_ids, 2), "conditions": {road_id: rng.randint(1, 10) for road_id in rng.sample(road_ids, 3)}},
+        {"name": "nothing"}
+    ]
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_scenario_deltas_match_rebuilt_networks(city, processes):
+    data, network = city
+    districts = network['node_ids'][:15]
+    scenarios = random_scenarios(network, seed=processes)
+    deltas = run_closure_scenarios(network, data['traffic_flows'], scenarios, origins=districts, processes=processes)
+    
+    base = rebuilt_matrices(data, {}, districts)
+    for s, scenario in enumerate(scenarios):
+        name = scenario.get('name', f"scenario_{s + 1}")
+        changed = rebuilt_matrices(data, scenario, districts)
+        rows = deltas[deltas["scenario"] == name]
+        
+        reported = {(row.time_period, row.origin, row.destination): row.scenario_time for row in rows.itertuples()}
+        for period in TIME_PERIODS:
+            for i, origin in enumerate(districts):
+                for j, destination in enumerate(districts):
+                    key = (period, origin, destination)
+                    expected = changed[period][i, j]
+                    if math.isclose(expected, base[period][i, j]) or expected == base[period][i, j]:
+                        assert key not in reported or reported[key] == pytest.approx(expected)
+                    else:
+                        assert reported[key] == pytest.approx(expected)
+        
+        finite = rows[np.isfinite(rows["delta"])]
+        assert finite["delta"].to_numpy() == pytest.approx((finite["scenario_time"] - finite["base_time"]).to_numpy())
+    
+    assert deltas[deltas["scenario"] == "nothing"].empty
+
+def test_unknown_road_is_rejected(city):
+    data, network = city
+    with pytest.raises(KeyError):
+        run_closure_scenarios(network, data['traffic_flows'], [{"closed_roads": ["nowhere-0"]}], processes=1)
@@ -0,0 +1,179 @@
+import math
+import random
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import TIME_PERIODS, build_city, to_networkx, assert_route, reference_road_times, reference_graph
+from src.data.network import build_road_network
+from src.algorithms.shortestpath import (
+    bidirectional_dijkstra, dijkstra_search, emergency_edge_costs, euclidean_heuristic, get_nearest_hospital_index, get_period_weights,
+    invalidate_hospital_index, run_a_star, run_dijkstra
+)
+
+def test_compiled_weights_match_the_per_edge_formula(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    node_ids = network['node_ids']
+    for period in TIME_PERIODS:
+        expected = reference_road_times(data, period)
+        for e, weight in enumerate(table["weights"][period]):
+            u, v = node_ids[network['edge_from'][e]], node_ids[network['edge_to'][e]]
+            assert weight == pytest.approx(expected[(u, v)])
+
+def test_weights_are_recompiled_for_new_traffic(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    assert get_period_weights(network, data['traffic_flows']) is table
+    
+    flows = {road_id: dict(counts, morning_peak=counts['morning_peak'] * 2)
+             for road_id, counts in data['traffic_flows'].items()}
+    assert get_period_weights(network, flows) is not table
+
+def test_dijkstra_matches_networkx(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    weights = table["weights"]["morning_peak"]
+    graph = to_networkx(network, weights)
+    
+    for source in range(0, network['num_nodes'], 7):
+        dist, _, _ = dijkstra_search(network, table["arc_weights"]["morning_peak"], [source])
+        expected = nx.single_source_dijkstra_path_length(graph, source)
+        for node in range(network['num_nodes']):
+            assert dist[node] == pytest.approx(expected.get(node, math.inf))
+
+def test_bidirectional_matches_one_sided_search(city):
+    data, network = city
+    table = get_period_weights(network, data['traffic_flows'])
+    rng = random.Random(0)
+    
+    for period in TIME_PERIODS:
+        arc_weights = table["arc_weights"][period]
+        for _ in range(25):
+            source = rng.randrange(network['num_nodes'])
+            target = rng.randrange(network['num_nodes'])
+            dist, _, _ = dijkstra_search(network, arc_weights, [source])
+            
+            cost, path_nodes, path_edge_ids, settled = bidirectional_dijkstra(network, arc_weights, source, target)
+            assert cost == pytest.approx(dist[target])
+            assert_route(network, table["weights"][period], source, target, cost, path_nodes, path_edge_ids)
+            assert settled <= 2 * network['num_nodes']
+
+def test_bidirectional_unreachable_target():
+    data, network = build_city(30, 5, seed=4, connected=False)
+    arc_weights = get_period_weights(network, data['traffic_flows'])["arc_weights"]["night"]
+    for source in range(network['num_nodes']):
+        dist, _, _ = dijkstra_search(network, arc_weights, [source])
+        for target in range(network['num_nodes']):
+            cost, path_nodes, _, _ = bidirectional_dijkstra(network, arc_weights, source, target)
+            if dist[target] == math.inf:
+                assert cost == math.inf and path_nodes is None
+            else:
+                assert cost == pytest.approx(dist[target])
+
+def test_run_dijkstra_matches_the_reference_weights(city):
+    data, network = city
+    rng = random.Random(0)
+    references = {period: reference_graph(data, period) for period in TIME_PERIODS}
+    for _ in range(20):
+        origin, destination = rng.sample(network['node_ids'], 2)
+        period = rng.choice(TIME_PERIODS)
+        path, travel_time, path_edges, results = run_dijkstra(network, origin, destination, period, data['traffic_flows'])
+        
+        assert travel_time == pytest.approx(nx.shortest_path_length(references[period], origin, destination, weight='weight'))
+        assert path[0] == origin and path[-1] == destination
+        assert sum(edge["time"] for edge in path_edges) == pytest.approx(travel_time)
+        assert "time_comparison" not in results
+
+def test_run_dijkstra_without_a_path(cairo):
+    data, _ = cairo
+    island = {"id": 99, "name": "Island", "population": 0, "type": "Residential", "x": 31.0, "y": 30.0}
+    network = build_road_network(data['neighborhoods'] + [island], data['facilities'], data['existing_roads'])
+    path, travel_time, path_edges, results = run_dijkstra(network, 1, 99, "afternoon", data['traffic_flows'])
+    assert path is None and travel_time == math.inf and path_edges == []
+    assert "error" in results
+
+def test_run_a_star_matches_the_original_search(cairo):
+    data, network = cairo
+    min_road_condition = 6
+    
+    # The original graph-based search: nearest hospital by condition-penalized
+    # distance, then the route with the lowest condition-weighted cost
+    penalized = nx.Graph()
+    cost = nx.Graph()
+    for road in data['existing_roads']:
+        penalty = 1 + (min_road_condition - road['condition']) / 5 if road['condition'] < min_road_condition else 1.0
+        penalized.add_edge(road['from'], road['to'], weight=road['distance'] * penalty)
+        cost.add_edge(road['from'], road['to'], weight=road['distance'] * penalty * (1 + (11 - road['condition']) / 10))
+    hospitals = [f['id'] for f in data['facilities'] if f['type'] == 'Medical']
+    
+    for origin in [n['id'] for n in data['neighborhoods']]:
+        distances = nx.single_source_dijkstra_path_length(penalized, origin)
+        nearest = min(hospitals, key=lambda h: distances.get(h, math.inf))
+        
+        path, travel_time, path_edges, results = run_a_star(
+            network, origin, None, data['neighborhoods'], data['facilities'], min_road_condition
+        )
+        assert path[0] == origin and path[-1] == nearest
+        assert results["standard_time"] == pytest.approx(distances[nearest] / 60)
+        
+        route_cost = sum(cost[u][v]['weight'] for u, v in zip(path, path[1:]))
+        assert route_cost == pytest.approx(nx.shortest_path_length(cost, origin, nearest, weight='weight'))
+        assert travel_time == pytest.approx(sum(
+            edge["distance"] / (80 * (1.0 + edge["condition"] / 10 * 0.5)) * 60 for edge in path_edges
+        ))
+
+def test_nearest_hospital_index_matches_one_search_per_hospital(city):
+    data, network = city
+    hospitals = [f['id'] for f in data['facilities']]
+    index = get_nearest_hospital_index(network, hospitals)
+    
+    penalized_distance, _ = emergency_edge_costs(network, 6)
+    distance_arcs = penalized_distance[network['arc_edge']].tolist()
+    per_hospital = {h: dijkstra_search(network, distance_arcs, [network['node_index'][h]])[0] for h in hospitals}
+    for node in range(network['num_nodes']):
+        nearest = min(per_hospital[h][node] for h in hospitals)
+        assert index['distance'][node] == pytest.approx(nearest)
+        assert per_hospital[network['node_ids'][index['hospital'][node]]][node] == pytest.approx(nearest)
+
+def test_nearest_hospital_index_follows_road_conditions(city):
+    data, network = city
+    hospitals = [f['id'] for f in data['facilities']]
+    index = get_nearest_hospital_index(network, hospitals)
+    assert get_nearest_hospital_index(network, hospitals) is index
+    
+    # Conditions are replaced with a new array; in-place edits invalidate explicitly
+    network['condition'] = network['condition'].copy()
+    network['condition'][0] = 11 - network['condition'][0]
+    replaced = get_nearest_hospital_index(network, hospitals)
+    assert replaced is not index
+    assert get_nearest_hospital_index(network, hospitals) is replaced
+    
+    network['condition'][1] = 11 - network['condition'][1]
+    invalidate_hospital_index(network)
+    assert get_nearest_hospital_index(network, hospitals) is not replaced
+
+def test_euclidean_heuristic_matches_the_coordinate_scan(cairo):
+    data, network = cairo
+    nodes = data['neighborhoods'] + data['facilities']
+    for hospital in [f for f in data['facilities'] if f['type'] == 'Medical']:
+        heuristic = euclidean_heuristic(network, network['node_index'][hospital['id']])
+        for node in nodes:
+            expected = math.sqrt((node['x'] - hospital['x']) ** 2 + (node['y'] - hospital['y']) ** 2) * 10
+            assert heuristic[network['node_index'][node['id']]] == pytest.approx(expected)
+
+def test_run_a_star_to_a_given_hospital(cairo):
+    data, network = cairo
+    _, edge_cost = emergency_edge_costs(network, 6)
+    cost_arcs = edge_cost[network['arc_edge']].tolist()
+    node_index = network['node_index']
+    road_lookup = {road_id: e for e, road_id in enumerate(network['road_ids'])}
+    for origin in [n['id'] for n in data['neighborhoods']]:
+        dist, _, _ = dijkstra_search(network, cost_arcs, [node_index[origin]])
+        for hospital in ["F9", "F10"]:
+            path, _, path_edges, results = run_a_star(network, origin, hospital, data['neighborhoods'], data['facilities'])
+            assert path[0] == origin and path[-1] == hospital and results["hospital_id"] == hospital
+            route_cost = sum(float(edge_cost[road_lookup.get(f"{edge['from']}-{edge['to']}",
+                                                             road_lookup.get(f"{edge['to']}-{edge['from']}"))])
+                             for edge in path_edges)
+            assert route_cost == pytest.approx(dist[node_index[hospital]])